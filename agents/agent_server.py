@@ -0,0 +1,201 @@
+"""
+Agent Server - Bliss Builder
+
+Resident worker that loads the agent tools once and serves them over a local
+HTTP JSON API. The googleapiclient, google.genai, groq, langchain_groq and
+moviepy imports, dotenv loading and client construction happen at startup
+instead of in a fresh interpreter for every pipeline stage.
+
+Usage:
+    python agents/agent_server.py
+    python agents/agent_server.py --host 127.0.0.1 --port 8765
+
+Endpoints:
+    GET  /health                            -> {"status": "ok", "tools": [...]}
+    POST /tools/fetch_trends_tool           {"input": "fetch trends"}
+    POST /tools/generate_narration_tool     {"theme": "..."}
+    POST /tools/generate_video_tool         {"narration_data": {...}, "output_file": "..."}
+    POST /tools/upload_to_youtube_tool      {"video_data": {...}}   ("enqueue": true queues it)
+    POST /tools/drain_upload_queue_tool     {"workers": 2, "wait": false}
+
+Clients (run_pipeline.py --agent-url, n8n HTTP Request nodes) use call_tool().
+This module only imports the standard library at import time, so callers can
+use call_tool() without paying for the heavy tool imports themselves.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import urllib.request
+import urllib.error
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# Populated by load_tools(); maps tool name -> callable(payload) -> dict
+TOOLS = {}
+_TOOLS_LOCK = threading.Lock()
+
+
+def load_tools() -> dict:
+    """Import the agent modules once and register their tool functions."""
+    with _TOOLS_LOCK:
+        if TOOLS:
+            return TOOLS
+
+        started = time.time()
+        print("🔥 Warming agent tools (imports, .env, clients)...", flush=True)
+
+        from agents.fetch_agent import fetch_trends_tool
+        from agents.video_gen_agent import generate_narration_tool, generate_video_tool
+        from agents.upload_agent import upload_to_youtube_tool, drain_upload_queue_tool
+
+        TOOLS.update({
+            "fetch_trends_tool": lambda payload: fetch_trends_tool(
+                payload.get("input", "fetch trends"),
+                trends_file=payload.get("trends_file"),
+                theme_count=int(payload.get("theme_count") or 1)
+            ),
+            "generate_narration_tool": lambda payload: generate_narration_tool(
+                payload.get("theme", "")
+            ),
+            "generate_video_tool": lambda payload: generate_video_tool(
+                payload.get("narration_data") or {},
+                payload.get("output_file")
+            ),
+            "upload_to_youtube_tool": lambda payload: upload_to_youtube_tool(
+                payload.get("video_data") or {}
+            ),
+            "drain_upload_queue_tool": lambda payload: drain_upload_queue_tool(payload),
+        })
+
+        print(f"✅ Tools ready in {time.time() - started:.1f}s: {', '.join(TOOLS)}", flush=True)
+        return TOOLS
+
+
+class AgentRequestHandler(BaseHTTPRequestHandler):
+    """JSON request handler dispatching POST /tools/<name> to a loaded tool."""
+
+    server_version = "BlissAgentServer/1.0"
+
+    def _send_json(self, status_code: int, data: dict):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status_code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/health":
+            self._send_json(200, {"status": "ok", "tools": sorted(TOOLS)})
+        else:
+            self._send_json(404, {"status": "error", "error": f"Unknown path: {self.path}"})
+
+    def do_POST(self):
+        prefix = "/tools/"
+        if not self.path.startswith(prefix):
+            self._send_json(404, {"status": "error", "error": f"Unknown path: {self.path}"})
+            return
+
+        tool_name = self.path[len(prefix):].strip("/")
+        tool = TOOLS.get(tool_name)
+        if tool is None:
+            self._send_json(404, {"status": "error", "error": f"Unknown tool: {tool_name}"})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            payload = json.loads(self.rfile.read(length) or b"{}")
+        except (ValueError, json.JSONDecodeError) as e:
+            self._send_json(400, {"status": "error", "error": f"Invalid JSON body: {e}"})
+            return
+
+        started = time.time()
+        try:
+            result = tool(payload)
+        except Exception as e:
+            print(f"❌ Tool {tool_name} crashed: {e}", file=sys.stderr, flush=True)
+            result = {"status": "error", "error": str(e)}
+        except SystemExit as e:
+            # CLI helpers (get_credentials, gemini_video._fail) exit on fatal errors; keep serving
+            print(f"❌ Tool {tool_name} exited with status {e.code}", file=sys.stderr, flush=True)
+            result = {"status": "error", "error": f"{tool_name} exited with status {e.code} (see server log)"}
+
+        print(f"⏱️ {tool_name} finished in {time.time() - started:.1f}s "
+              f"({result.get('status')})", flush=True)
+        self._send_json(200, result)
+
+    def log_message(self, format, *args):
+        print(f"[{datetime.now().strftime('%H:%M:%S')}] {format % args}", file=sys.stderr, flush=True)
+
+
+def call_tool(tool_name: str, payload: dict, base_url: str = None, timeout: float = 900) -> dict:
+    """Call a tool on a running agent server and return its result dict."""
+    base_url = (base_url or os.getenv("BLISS_AGENT_URL") or
+                f"http://{DEFAULT_HOST}:{DEFAULT_PORT}").rstrip("/")
+    request = urllib.request.Request(
+        f"{base_url}/tools/{tool_name}",
+        data=json.dumps(payload).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+        method="POST"
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return json.loads(response.read().decode("utf-8"))
+    except urllib.error.HTTPError as e:
+        try:
+            return json.loads(e.read().decode("utf-8"))
+        except Exception:
+            return {"status": "error", "error": f"HTTP {e.code} from agent server"}
+    except urllib.error.URLError as e:
+        return {"status": "error", "error": f"Agent server unreachable at {base_url}: {e.reason}"}
+
+
+def run_agent_server(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT):
+    """Warm the tools and serve them until interrupted."""
+    print("=" * 60, flush=True)
+    print("🤖 AGENT SERVER STARTING", flush=True)
+    print("=" * 60, flush=True)
+
+    load_tools()
+
+    server = ThreadingHTTPServer((host, port), AgentRequestHandler)
+    server.daemon_threads = True
+    print(f"🌐 Listening on http://{host}:{port}", flush=True)
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 Shutting down agent server", flush=True)
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve Bliss Builder agent tools over a local JSON API")
+    parser.add_argument(
+        "--host",
+        type=str,
+        default=DEFAULT_HOST,
+        help=f"Interface to bind (default: {DEFAULT_HOST})"
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=DEFAULT_PORT,
+        help=f"Port to listen on (default: {DEFAULT_PORT})"
+    )
+
+    args = parser.parse_args()
+
+    run_agent_server(host=args.host, port=args.port)
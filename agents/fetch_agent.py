@@ -7,6 +7,9 @@ Reuses existing trend_fetch.py functions.
 Usage:
     python agents/fetch_agent.py
     python agents/fetch_agent.py --output-file output/trends/latest.json
+    python agents/fetch_agent.py --cache-dir output/cache/youtube
+    python agents/fetch_agent.py --trends-file output/trends/latest.jsonl
+    python agents/fetch_agent.py --theme-count 5
 """
 
 import os
@@ -16,26 +19,42 @@ import argparse
 from datetime import datetime
 from pathlib import Path
 import sys
-import io
 
-# Force UTF-8 encoding for Windows console
-sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
-sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
+# Force UTF-8 encoding for Windows console (reconfigured in place so several
+# agents can be imported into one process without stacking wrappers)
+sys.stdout.reconfigure(encoding='utf-8')
+sys.stderr.reconfigure(encoding='utf-8')
 
 # Add parent directory to path for imports
 sys.path.append(str(Path(__file__).resolve().parent.parent))
 
 import dotenv
 
-from trend_fetching.trend_fetch import collect_trends_with_metadata, extract_theme_with_llm
+from trend_fetching.trend_fetch import THEME_SAMPLE_SIZE, iter_trends_with_metadata, select_novel_themes
+from trend_fetching.theme_index import get_theme_index
+from trend_fetching.trend_io import TrendWriter
+from trend_fetching.response_cache import get_response_cache
+from trend_fetching.trend_store import TrendStore
+from youtube_api.quota import get_quota_scheduler
 
 dotenv.load_dotenv()
 
 
-def fetch_trends_tool(input_data: str, max_retries: int = 3) -> dict:
-    """Fetches ASMR trends and extracts theme using Groq LLM."""
+def fetch_trends_tool(input_data: str, max_retries: int = 3, cache_dir: str = None,
+                      trends_file: str = None, theme_count: int = 1) -> dict:
+    """Fetches ASMR trends and extracts theme using Groq LLM.
+
+    Trends are streamed to trends_file (NDJSON, see trend_fetching/trend_io.py)
+    as they arrive; only the first few are kept in memory and in the result.
+    With theme_count > 1, one batched LLM call extracts that many distinct
+    themes ("themes" in the result; "theme" is the first).
+    """
     youtube_api_key = os.getenv("YOUTUBE_API_KEY")
     groq_api_key = os.getenv("GROQ_API_KEY")
+    cache_dir = cache_dir or os.getenv("YOUTUBE_CACHE_DIR")
+    cache = get_response_cache(cache_dir) if cache_dir else None
+    store_db = os.getenv("TREND_STORE_DB")
+    store = TrendStore(store_db) if store_db else None
     
     if not youtube_api_key:
         return {"status": "error", "error": "YOUTUBE_API_KEY not set in .env"}
@@ -49,29 +68,49 @@ def fetch_trends_tool(input_data: str, max_retries: int = 3) -> dict:
             print(f"🔍 Fetching ASMR trends from YouTube... (Attempt {attempt + 1}/{max_retries})", flush=True)
             
             # Fetch trends using existing function
-            trends = collect_trends_with_metadata(
+            records = iter_trends_with_metadata(
                 youtube_api_key=youtube_api_key,
                 region="US",
-                max_results=50
+                max_results=50,
+                cache=cache,
+                store=store,
+                quota=get_quota_scheduler()
             )
             
-            if not trends:
-                return {"status": "error", "error": "No trends found"}
+            trends = []
+            trends_count = 0
+            if trends_file:
+                with TrendWriter(trends_file) as writer:
+                    for record in records:
+                        writer.write(record)
+                        if len(trends) < THEME_SAMPLE_SIZE:
+                            trends.append(record)
+                trends_count = writer.count
+            else:
+                for record in records:
+                    trends_count += 1
+                    if len(trends) < THEME_SAMPLE_SIZE:
+                        trends.append(record)
             
-            print(f"✅ Found {len(trends)} trending ASMR videos", flush=True)
-            print("🎨 Extracting creative theme...", flush=True)
+            if not trends_count:
+                return {"status": "error", "error": "No trends found"}
             
-            # Extract theme using existing function
-            theme = extract_theme_with_llm(trends, groq_api_key)
+            print(f"✅ Found {trends_count} trending ASMR videos", flush=True)
+            print(f"🎨 Extracting {theme_count} creative theme(s)...", flush=True)
+            # Near-duplicates of already published themes are regenerated
+            themes = select_novel_themes(trends, groq_api_key, theme_count, index=get_theme_index())
+            theme = themes[0]
             
-            print(f"✨ Theme extracted: {theme}", flush=True)
+            for extracted in themes:
+                print(f"✨ Theme extracted: {extracted}", flush=True)
             
             return {
                 "status": "success",
                 "theme": theme,
-                "trends_count": len(trends),
+                "themes": themes,
+                "trends_count": trends_count,
                 "top_trends": trends[:5],  # Return top 5 for context
-                "all_trends": trends,  # Keep all for downstream processing
+                "trends_file": trends_file,  # Full list for downstream processing
                 "timestamp": datetime.now().isoformat()
             }
             
@@ -87,7 +126,8 @@ def fetch_trends_tool(input_data: str, max_retries: int = 3) -> dict:
                 return {"status": "error", "error": f"Failed after {max_retries} attempts: {str(e)}"}
 
 
-def run_fetch_agent(output_file: str = None):
+def run_fetch_agent(output_file: str = None, cache_dir: str = None, trends_file: str = None,
+                    theme_count: int = 1):
     """Main entry point for the fetch agent."""
     # Redirect stdout to stderr to keep the output clean for N8N
     # Only the final JSON should be on stdout
@@ -100,7 +140,11 @@ def run_fetch_agent(output_file: str = None):
     
     try:
         # Call the tool function directly
-        result_data = fetch_trends_tool("fetch trends")
+        # Default the trends file to sit next to the result file
+        if not trends_file and output_file:
+            trends_file = os.path.splitext(output_file)[0] + ".trends.jsonl"
+        result_data = fetch_trends_tool("fetch trends", cache_dir=cache_dir, trends_file=trends_file,
+                                        theme_count=theme_count)
         
         print("\n" + "=" * 60, flush=True)
         print("✅ FETCH AGENT COMPLETED", flush=True)
@@ -122,9 +166,11 @@ def run_fetch_agent(output_file: str = None):
         n8n_output = {
             "status": result_data.get("status"),
             "theme": result_data.get("theme"),
+            "themes": result_data.get("themes"),
             "trends_count": result_data.get("trends_count"),
             "timestamp": result_data.get("timestamp"),
-            "output_file": output_file  # Pass the file path so next nodes can find the full data
+            "output_file": output_file,  # Pass the file path so next nodes can find the full data
+            "trends_file": result_data.get("trends_file")
         }
         
         # Restore stdout for the final JSON output
@@ -153,7 +199,24 @@ if __name__ == "__main__":
         type=str,
         help="Path to save JSON output (optional)"
     )
+    parser.add_argument(
+        "--cache-dir",
+        type=str,
+        help="Cache YouTube API responses in this directory (optional, or set YOUTUBE_CACHE_DIR)"
+    )
+    parser.add_argument(
+        "--trends-file",
+        type=str,
+        help="Path to stream trends to as NDJSON (default: next to --output-file)"
+    )
+    parser.add_argument(
+        "--theme-count",
+        type=int,
+        default=1,
+        help="Number of distinct themes to extract in one LLM call (default: 1)"
+    )
     
     args = parser.parse_args()
     
-    run_fetch_agent(output_file=args.output_file)
+    run_fetch_agent(output_file=args.output_file, cache_dir=args.cache_dir, trends_file=args.trends_file,
+                    theme_count=args.theme_count)
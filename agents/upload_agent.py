@@ -7,6 +7,8 @@ Reuses existing youtube_upload.py functions.
 Usage:
     python agents/upload_agent.py --video-path output/videos/video.mp4 --theme "gentle rain" --narration "Soft raindrops..."
     python agents/upload_agent.py --video-path output/videos/video.mp4 --theme "cardboard tapping" --privacy unlisted
+    python agents/upload_agent.py --video-path output/videos/video.mp4 --theme "gentle rain" --enqueue --channel rain_channel
+    python agents/upload_agent.py --drain --workers 4
 """
 
 import os
@@ -15,18 +17,19 @@ import json
 import argparse
 from datetime import datetime
 from pathlib import Path
-import io
 
-# Force UTF-8 encoding for Windows console
-sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
-sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
+# Force UTF-8 encoding for Windows console (reconfigured in place so several
+# agents can be imported into one process without stacking wrappers)
+sys.stdout.reconfigure(encoding='utf-8')
+sys.stderr.reconfigure(encoding='utf-8')
 
 # Add parent directory to path for imports
 sys.path.append(str(Path(__file__).resolve().parent.parent))
 
 import dotenv
 
-from video_upload.youtube_upload import upload_youtube_short, get_authenticated_service
+from video_upload.youtube_upload import upload_youtube_short, get_credentials, drain_upload_queue
+from video_upload.upload_queue import DEFAULT_CHANNEL, DEFAULT_WORKERS, UploadQueue
 
 dotenv.load_dotenv()
 
@@ -47,7 +50,22 @@ def upload_to_youtube_tool(video_data: dict) -> dict:
     if not os.path.exists(video_path):
         return {"status": "error", "error": f"Video file not found: {video_path}"}
     
+    if video_data.get("enqueue"):
+        # Hand the video to the upload queue; a drainer uploads it with rate-limit-aware workers
+        channel = video_data.get("channel") or DEFAULT_CHANNEL
+        job_id = UploadQueue().enqueue(video_path, theme, narration, privacy, channel=channel,
+                                       result_file=video_data.get("result_file"))
+        print(f"📥 Queued upload job {job_id} for channel {channel}", flush=True)
+        return {
+            "status": "queued",
+            "job_id": job_id,
+            "channel": channel,
+            "timestamp": datetime.now().isoformat(),
+            "theme": theme
+        }
+    
     max_retries = 3
+    credentials = None
     for attempt in range(max_retries):
         try:
             print(f"📤 Uploading video to YouTube... (Attempt {attempt + 1}/{max_retries})", flush=True)
@@ -55,19 +73,25 @@ def upload_to_youtube_tool(video_data: dict) -> dict:
             print(f"   Theme: {theme}", flush=True)
             print(f"   Privacy: {privacy}", flush=True)
             
-            # Authenticate YouTube service first
-            print("🔐 Authenticating with YouTube...", flush=True)
-            youtube_service = get_authenticated_service()
+            # Authenticate once; retries reuse the credentials and resume the same upload session
+            if credentials is None:
+                print("🔐 Authenticating with YouTube...", flush=True)
+                credentials = get_credentials(video_data.get("channel") or DEFAULT_CHANNEL)
             
-            # Upload using existing function
+            # Upload using existing function (reusing the authenticated credentials)
             result = upload_youtube_short(
                 video_path=video_path,
                 theme=theme,
                 narration=narration,
-                privacy=privacy
+                privacy=privacy,
+                credentials=credentials,
+                channel=video_data.get("channel") or DEFAULT_CHANNEL
             )
             
-            print(f"✅ Upload successful!", flush=True)
+            if result.get("status") == "duplicate":
+                print(f"♻️ Already published, reusing the existing video", flush=True)
+            else:
+                print(f"✅ Upload successful!", flush=True)
             print(f"   Video ID: {result['video_id']}", flush=True)
             print(f"   URL: {result['video_url']}", flush=True)
             
@@ -80,6 +104,7 @@ def upload_to_youtube_tool(video_data: dict) -> dict:
                 "timestamp": datetime.now().isoformat(),
                 "theme": theme,
                 "ai_disclosed": result.get("ai_disclosed", True),
+                "duplicate": result.get("status") == "duplicate",
                 "upload_attempts": attempt + 1
             }
             
@@ -97,7 +122,23 @@ def upload_to_youtube_tool(video_data: dict) -> dict:
                 return {"status": "error", "error": f"Upload failed after {max_retries} attempts: {str(e)}"}
 
 
-def run_upload_agent(video_path: str, theme: str, narration: str = None, privacy: str = "public", output_file: str = None):
+def drain_upload_queue_tool(options: dict = None) -> dict:
+    """Upload everything in the upload queue with concurrent workers."""
+    options = options or {}
+    try:
+        totals = drain_upload_queue(
+            workers=int(options.get("workers") or DEFAULT_WORKERS),
+            wait=bool(options.get("wait")),
+            channels_file=options.get("channels_file")
+        )
+    except Exception as e:
+        print(f"❌ Upload queue drain failed: {e}", file=sys.stderr, flush=True)
+        return {"status": "error", "error": str(e)}
+    return {"status": "success", "timestamp": datetime.now().isoformat(), **totals}
+
+
+def run_upload_agent(video_path: str, theme: str, narration: str = None, privacy: str = "public", output_file: str = None,
+                     enqueue: bool = False, channel: str = DEFAULT_CHANNEL):
     """Main entry point for upload agent."""
     # Redirect stdout to stderr to keep the output clean for N8N
     # Only the final JSON should be on stdout
@@ -114,12 +155,14 @@ def run_upload_agent(video_path: str, theme: str, narration: str = None, privacy
             "video_path": video_path,
             "theme": theme,
             "narration": narration or "",
-            "privacy": privacy
+            "privacy": privacy,
+            "enqueue": enqueue,
+            "channel": channel
         }
         
         result = upload_to_youtube_tool(video_data)
         
-        if result.get("status") != "success":
+        if result.get("status") not in ("success", "queued"):
             raise Exception(f"Upload failed: {result.get('error')}")
         
         print("\n" + "=" * 60, flush=True)
@@ -143,6 +186,7 @@ def run_upload_agent(video_path: str, theme: str, narration: str = None, privacy
             "status": result.get("status"),
             "video_url": result.get("video_url"),
             "video_id": result.get("video_id"),
+            "job_id": result.get("job_id"),
             "timestamp": result.get("timestamp"),
             "output_file": output_file
         }
@@ -173,13 +217,11 @@ if __name__ == "__main__":
     parser.add_argument(
         "--video-path",
         type=str,
-        required=True,
         help="Path to video file to upload"
     )
     parser.add_argument(
         "--theme",
         type=str,
-        required=True,
         help="ASMR theme for video title/description"
     )
     parser.add_argument(
@@ -199,13 +241,50 @@ if __name__ == "__main__":
         type=str,
         help="Path to save JSON output (optional)"
     )
+    parser.add_argument(
+        "--enqueue",
+        action="store_true",
+        help="Add the video to the upload queue instead of uploading now"
+    )
+    parser.add_argument(
+        "--channel",
+        type=str,
+        default=DEFAULT_CHANNEL,
+        help="Upload queue channel (publish window and backoff)"
+    )
+    parser.add_argument(
+        "--drain",
+        action="store_true",
+        help="Upload everything in the upload queue and exit"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help=f"Concurrent uploads when draining (default: {DEFAULT_WORKERS})"
+    )
+    parser.add_argument(
+        "--wait",
+        action="store_true",
+        help="When draining, wait for delayed jobs instead of exiting"
+    )
     
     args = parser.parse_args()
     
+    if args.drain:
+        result = drain_upload_queue_tool({"workers": args.workers, "wait": args.wait})
+        print("\n" + json.dumps(result, indent=2), flush=True)
+        sys.exit(0 if result["status"] == "success" else 1)
+    
+    if not args.video_path or not args.theme:
+        parser.error("--video-path and --theme are required unless --drain is given")
+    
     run_upload_agent(
         video_path=args.video_path,
         theme=args.theme,
         narration=args.narration,
         privacy=args.privacy,
-        output_file=args.output_file
+        output_file=args.output_file,
+        enqueue=args.enqueue,
+        channel=args.channel
     )
@@ -14,12 +14,13 @@ import sys
 import json
 import argparse
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
-import io
 
-# Force UTF-8 encoding for Windows console
-sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
-sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
+# Force UTF-8 encoding for Windows console (reconfigured in place so several
+# agents can be imported into one process without stacking wrappers)
+sys.stdout.reconfigure(encoding='utf-8')
+sys.stderr.reconfigure(encoding='utf-8')
 
 # Add parent directory to path for imports
 sys.path.append(str(Path(__file__).resolve().parent.parent))
@@ -27,16 +28,37 @@ sys.path.append(str(Path(__file__).resolve().parent.parent))
 import dotenv
 from langchain_groq import ChatGroq
 
+from llm_api.calls import complete
 from video_generation.gemini_video import (
     generate_veo3_prompt_with_gemini,
-    generate_video_with_veo3,
-    render_frames,
-    assemble_video
+    generate_video_with_veo3
 )
+from video_generation.procedural import render_procedural_video
+from video_generation.model_registry import get_model_registry
 
 dotenv.load_dotenv()
 
 
+NARRATION_MODEL = "llama-3.3-70b-versatile"
+NARRATION_TEMPERATURE = 0.7
+
+
+@lru_cache(maxsize=None)
+def _get_narration_client(groq_api_key: str) -> ChatGroq:
+    """Build the narration LLM client once per key (reused by the agent server)."""
+    return ChatGroq(
+        model=NARRATION_MODEL,
+        temperature=NARRATION_TEMPERATURE,
+        api_key=groq_api_key
+    )
+
+
+def _narration_provider(groq_api_key: str):
+    """llm_api provider for the LangChain client (model and temperature are fixed on the client)."""
+    client = _get_narration_client(groq_api_key)
+    return lambda model, messages, params: client.invoke(messages).content
+
+
 def generate_narration_tool(theme: str) -> dict:
     """Generate ASMR video narration using Groq LLM."""
     groq_api_key = os.getenv("GROQ_API_KEY")
@@ -47,12 +69,6 @@ def generate_narration_tool(theme: str) -> dict:
     try:
         print(f"🎨 Generating narration for theme: {theme}", flush=True)
         
-        client = ChatGroq(
-            model="llama-3.3-70b-versatile",
-            temperature=0.7,
-            api_key=groq_api_key
-        )
-        
         prompt = f"""Create a 2-3 sentence ASMR video narration for this theme: "{theme}"
 
 Requirements:
@@ -65,8 +81,13 @@ Requirements:
 
 Output ONLY the narration text (no additional commentary)."""
         
-        response = client.invoke([{"role": "user", "content": prompt}])
-        narration = response.content.strip()
+        # Same theme -> same prompt, so retries and re-runs are served from the LLM cache
+        narration = complete(
+            NARRATION_MODEL,
+            [{"role": "user", "content": prompt}],
+            _narration_provider(groq_api_key),
+            temperature=NARRATION_TEMPERATURE
+        ).strip()
         
         print(f"✅ Narration generated: {narration[:100]}...", flush=True)
         
@@ -96,6 +117,9 @@ def generate_video_tool(narration_data: dict, output_file: str = None) -> dict:
         return {"status": "error", "error": "Missing narration or theme"}
     
     try:
+        # Model catalogue refreshes in the background while the prompt is generated
+        get_model_registry().warm(gemini_api_key)
+        
         print("🎬 Generating Veo 3 prompt...", flush=True)
         
         # Generate Veo 3 prompt from narration
@@ -142,14 +166,13 @@ def generate_video_tool(narration_data: dict, output_file: str = None) -> dict:
                 "timestamp": datetime.now().isoformat()
             }
         else:
-            print("⚠️ Veo 3 generation failed (likely quota exhausted), using fallback text-based video...", flush=True)
+            print("⚠️ Veo 3 generation failed (likely quota exhausted), using procedural fallback video...", flush=True)
             print("💡 Tip: Check your Gemini API quota at https://ai.dev/usage", flush=True)
             
-            # Fallback: Create text-based video
-            frames = render_frames([narration], size=(1080, 1920))
+            # Fallback: animated loop keyed to the theme
             fallback_path = output_dir / f"video_fallback_{timestamp}.mp4"
             
-            assemble_video(frames, str(fallback_path), total_duration=8, fps=24)
+            render_procedural_video(theme, str(fallback_path), duration=8, fps=24)
             
             return {
                 "status": "success",
@@ -158,7 +181,7 @@ def generate_video_tool(narration_data: dict, output_file: str = None) -> dict:
                 "theme": theme,
                 "fallback": True,
                 "veo3_used": False,
-                "note": "Used text-based fallback (Veo 3 quota exhausted or unavailable)",
+                "note": "Used procedural fallback (Veo 3 quota exhausted or unavailable)",
                 "timestamp": datetime.now().isoformat()
             }
         
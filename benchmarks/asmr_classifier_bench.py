@@ -0,0 +1,99 @@
+"""
+Benchmark: batch ASMR classifier vs. the original per-video keyword scan.
+
+Generates synthetic videos.list snippets and times the original
+is_asmr_related/extract_hashtags approach against classify_snippets() and
+filter_asmr(). About 30% of the snippets mention an ASMR keyword.
+
+Usage:
+    python benchmarks/asmr_classifier_bench.py
+    python benchmarks/asmr_classifier_bench.py --count 100000
+"""
+
+import re
+import sys
+import time
+import random
+import argparse
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from trend_fetching.asmr_classifier import ASMR_KEYWORDS, classify_snippets, filter_asmr
+
+WORDS = ("gentle morning routine cooking vlog unboxing crafting tutorial review "
+         "slime sand foam glass tapping crinkle paper brushing satisfying cozy").split()
+HASHTAG_RE = re.compile(r"#([\w\d_]+)")
+
+
+def make_snippets(count: int, seed: int = 42, asmr_ratio: float = 0.3) -> list:
+    rng = random.Random(seed)
+    snippets = []
+    for _ in range(count):
+        # Roughly asmr_ratio of the snippets mention any ASMR keyword at all
+        vocabulary = WORDS + ASMR_KEYWORDS if rng.random() < asmr_ratio else WORDS
+        title = " ".join(rng.choice(vocabulary) for _ in range(rng.randint(4, 10)))
+        description = " ".join(rng.choice(vocabulary) for _ in range(rng.randint(20, 80)))
+        description += " " + " ".join(f"#{rng.choice(vocabulary).replace(' ', '')}" for _ in range(rng.randint(0, 6)))
+        tags = [rng.choice(vocabulary) for _ in range(rng.randint(0, 8))]
+        snippets.append({"title": title, "description": description, "tags": tags})
+    return snippets
+
+
+def baseline(snippets: list) -> list:
+    """The original per-video implementation from trend_fetch.py."""
+    results = []
+    for snip in snippets:
+        title, description, tags = snip["title"], snip["description"], snip["tags"]
+        hashtags = []
+        for t in (title, description):
+            if t:
+                hashtags.extend([m.group(1) for m in HASHTAG_RE.finditer(t)])
+        seen = set()
+        unique = []
+        for h in hashtags:
+            if h.lower() not in seen:
+                seen.add(h.lower())
+                unique.append(h)
+        combined = f"{title} {description} {' '.join(tags)} {' '.join(unique)}".lower()
+        results.append(any(kw in combined for kw in ASMR_KEYWORDS))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the batch ASMR classifier")
+    parser.add_argument("--count", type=int, default=100000, help="Synthetic snippets (default: 100000)")
+    args = parser.parse_args()
+
+    snippets = make_snippets(args.count)
+    print(f"Generated {len(snippets):,} synthetic snippets")
+
+    started = time.perf_counter()
+    expected = baseline(snippets)
+    baseline_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    results = classify_snippets(snippets, with_hits=False)
+    batch_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    counted = classify_snippets(snippets)
+    counted_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    filtered = filter_asmr(snippets)
+    filter_time = time.perf_counter() - started
+
+    mismatches = sum(1 for e, r in zip(expected, results) if e != r["is_asmr"])
+    mismatches += sum(1 for e, r in zip(expected, counted) if e != r["is_asmr"])
+    mismatches += abs(sum(expected) - len(filtered))
+    print(f"Baseline (per-video any()):              {baseline_time:.2f}s")
+    print(f"classify_snippets(with_hits=False):      {batch_time:.2f}s")
+    print(f"classify_snippets() with hit counts:     {counted_time:.2f}s")
+    print(f"filter_asmr() (no hashtags/counts):      {filter_time:.2f}s")
+    print(f"ASMR-related: {sum(expected):,} / {len(snippets):,}, mismatches: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
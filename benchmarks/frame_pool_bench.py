@@ -0,0 +1,55 @@
+"""
+Benchmark: procedural frame rendering scaled across worker processes.
+
+Renders one procedural loop with frame_pool.render_parallel() at increasing
+worker counts, discarding the frames (no encode), and reports frames per
+second and speedup over one in-process renderer.
+
+Usage:
+    python benchmarks/frame_pool_bench.py
+    python benchmarks/frame_pool_bench.py --workers 1 2 4 8 16 --scale 2
+"""
+
+import os
+import sys
+import time
+import argparse
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from video_generation.frame_pool import render_parallel
+from video_generation.procedural import LoopScene
+
+
+def main():
+    cores = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description="Benchmark multi-process frame rendering")
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({1, 2, 4, 8, 16, cores} & set(range(1, cores + 1))),
+                        help="Worker counts to try (default: powers of two up to the core count)")
+    parser.add_argument("--scale", type=int, default=4, help="Working resolution divisor (default: 4)")
+    parser.add_argument("--theme", default="gentle rain on a frosted window")
+    args = parser.parse_args()
+
+    scene = LoopScene(args.theme, scale=args.scale)
+    shape = (scene.low[1], scene.low[0], 3)
+    print(f"{scene.frame_count} frames at {scene.low[0]}x{scene.low[1]}, {cores} cores")
+
+    started = time.perf_counter()
+    for index in range(scene.frame_count):
+        scene.frame(index)
+    baseline = time.perf_counter() - started
+    print(f"in-process  {baseline:6.2f}s  {scene.frame_count / baseline:6.1f} fps")
+
+    for workers in args.workers:
+        started = time.perf_counter()
+        render_parallel(scene, scene.frame_count, shape, lambda frame: None, workers=workers)
+        elapsed = time.perf_counter() - started
+        print(f"{workers:2d} workers  {elapsed:6.2f}s  {scene.frame_count / elapsed:6.1f} fps  "
+              f"{baseline / elapsed:4.1f}x")
+
+
+if __name__ == "__main__":
+    main()
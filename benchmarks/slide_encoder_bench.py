@@ -0,0 +1,85 @@
+"""
+Benchmark: text fallback encode with the ffmpeg slide encoder vs. moviepy.
+
+Renders the fallback slides once, then encodes them with each
+assemble_video() backend in a fresh child process, reporting wall time and
+peak resident memory (the Python process and its largest ffmpeg child).
+
+Usage:
+    python benchmarks/slide_encoder_bench.py
+    python benchmarks/slide_encoder_bench.py --slides 4 --duration 8 --repeat 3
+"""
+
+import os
+import sys
+import json
+import time
+import resource
+import argparse
+import tempfile
+import subprocess
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+BACKENDS = ("moviepy", "ffmpeg")
+
+
+def run_backend(backend: str, slides: int, duration: int, output_path: str) -> dict:
+    """Encode in this process and report time and peak memory (runs in the child)."""
+    from video_generation.gemini_video import assemble_video, render_frames
+
+    captions = [f"Slide {i + 1}: gentle rain on a glass window, soft crinkling paper" for i in range(slides)]
+    frames = render_frames(captions)
+    started = time.perf_counter()
+    assemble_video(frames, output_path, total_duration=duration, fps=24, backend=backend)
+    elapsed = time.perf_counter() - started
+
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    return {
+        "seconds": elapsed,
+        "python_peak_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 1e6,
+        "ffmpeg_peak_mb": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale / 1e6,
+        "bytes": os.path.getsize(output_path),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark fallback video encoding backends")
+    parser.add_argument("--slides", type=int, default=2, help="Fallback slides (default: 2)")
+    parser.add_argument("--duration", type=int, default=8, help="Video duration (default: 8)")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per backend (default: 1)")
+    parser.add_argument("--run", choices=BACKENDS, help=argparse.SUPPRESS)
+    parser.add_argument("--output", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        # Child mode: quiet the encoder's progress output, print one JSON line
+        stdout = sys.stdout
+        sys.stdout = open(os.devnull, "w")
+        result = run_backend(args.run, args.slides, args.duration, args.output)
+        sys.stdout = stdout
+        print(json.dumps(result))
+        return
+
+    print(f"{args.slides} slides, {args.duration}s at 24 fps, 1080x1920")
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend in BACKENDS:
+            runs = []
+            for i in range(args.repeat):
+                output = os.path.join(tmp, f"{backend}_{i}.mp4")
+                child = subprocess.run(
+                    [sys.executable, __file__, "--run", backend, "--output", output,
+                     "--slides", str(args.slides), "--duration", str(args.duration)],
+                    capture_output=True, text=True, check=True,
+                )
+                runs.append(json.loads(child.stdout.strip().splitlines()[-1]))
+            best = min(runs, key=lambda r: r["seconds"])
+            print(f"{backend:8s} {best['seconds']:6.2f}s   python peak {best['python_peak_mb']:7.1f} MB   "
+                  f"ffmpeg peak {best['ffmpeg_peak_mb']:7.1f} MB   {best['bytes'] / 1e3:7.1f} kB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,8 @@
+"""
+Bliss Builder LLM API Module
+
+Shared text-generation plumbing used by theme extraction, narration and
+Veo 3 prompt generation:
+- calls: cached complete() with Groq / Gemini providers
+- cache: on-disk completion cache with optional near-duplicate lookup
+"""
@@ -0,0 +1,190 @@
+"""
+On-disk cache for LLM text completions.
+
+Entries are keyed by a SHA-256 of the model, the chat messages and the
+sampling parameters, and share the TTL / size-bounded LRU behaviour of the
+YouTube response cache. With a similarity threshold set, a miss falls back to
+the most similar stored prompt for the same model and parameters (cosine
+similarity of prompt embeddings), so near-identical requests from different
+channels reuse one completion.
+
+The default embedder hashes character trigrams and needs no API calls;
+gemini_embedder() uses Gemini text embeddings instead.
+
+Usage:
+    cache = get_llm_cache()                       # None if BLISS_LLM_CACHE=0
+    text = cache.lookup(model, messages, params)
+    if text is None:
+        text = call_model(...)
+        cache.store(model, messages, params, text)
+"""
+
+import os
+import sys
+import json
+import math
+import hashlib
+import threading
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from trend_fetching.response_cache import ResponseCache
+
+LLM_CACHE_DIR = Path(__file__).resolve().parent.parent / "output" / "llm_cache"
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+DEFAULT_MAX_BYTES = 20 * 1024 * 1024
+DEFAULT_SIMILARITY = 0.97
+EMBEDDING_DIM = 512
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def hashed_ngram_embedding(text: str, dim: int = EMBEDDING_DIM, n: int = 3) -> list:
+    """Unit-length bag of hashed character n-grams (a cheap, local text embedding)."""
+    text = " ".join(text.lower().split())
+    vector = [0.0] * dim
+    for i in range(max(1, len(text) - n + 1)):
+        digest = hashlib.blake2b(text[i:i + n].encode("utf-8"), digest_size=8).digest()
+        bucket = int.from_bytes(digest, "big")
+        vector[bucket % dim] += 1.0 if bucket & (1 << 63) else -1.0
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+
+def gemini_embedder(api_key: str, model: str = "text-embedding-004"):
+    """Embedder backed by the Gemini embeddings API (one call per new prompt)."""
+    from google import genai
+
+    client = genai.Client(api_key=api_key)
+
+    def _embed(text: str) -> list:
+        values = client.models.embed_content(model=model, contents=text).embeddings[0].values
+        norm = math.sqrt(sum(v * v for v in values)) or 1.0
+        return [v / norm for v in values]
+
+    return _embed
+
+
+def _prompt_text(messages) -> str:
+    return "\n".join(f"{m.get('role', 'user')}: {m.get('content', '')}" for m in messages)
+
+
+class LLMCache(ResponseCache):
+    """Completion cache with exact keys and an optional nearest-prompt fallback."""
+
+    def __init__(self, cache_dir=LLM_CACHE_DIR, ttl_seconds: float = DEFAULT_TTL_SECONDS,
+                 max_bytes: int = DEFAULT_MAX_BYTES, similarity: float = None, embedder=None):
+        super().__init__(cache_dir, ttl_seconds, max_bytes)
+        self.similarity = similarity
+        self.embedder = embedder or hashed_ngram_embedding
+        self.similar_hits = 0
+        self._index = None  # key -> (scope, embedding), loaded on first similarity lookup
+
+    @staticmethod
+    def _request(model: str, messages, params: dict):
+        method = f"llm:{model}"
+        scope = ResponseCache.make_key(method, params)
+        return method, {"messages": messages, "params": params}, scope
+
+    def _load_index(self) -> dict:
+        if self._index is None:
+            index = {}
+            for path in self._entries():
+                try:
+                    with open(path, "r", encoding="utf-8") as f:
+                        entry = json.load(f)
+                except (OSError, ValueError):
+                    continue
+                if entry.get("embedding"):
+                    index[path.stem] = (entry.get("scope"), entry["embedding"])
+            self._index = index
+        return self._index
+
+    def _nearest(self, scope: str, embedding: list):
+        best_key, best_score = None, self.similarity
+        with self._lock:
+            candidates = [(k, e) for k, (s, e) in self._load_index().items() if s == scope]
+        for key, other in candidates:
+            if len(other) != len(embedding):
+                continue
+            score = sum(a * b for a, b in zip(embedding, other))
+            if score >= best_score:
+                best_key, best_score = key, score
+        return best_key, best_score
+
+    def lookup(self, model: str, messages, params: dict):
+        """Cached completion text for this request (or a near-identical one), else None."""
+        method, request, scope = self._request(model, messages, params)
+        key = self.make_key(method, request)
+        entry = self._read(self._path(key))
+
+        if entry is None and self.similarity:
+            similar_key, score = self._nearest(scope, self.embedder(_prompt_text(messages)))
+            if similar_key is not None:
+                entry = self._read(self._path(similar_key))
+                if entry is None:
+                    with self._lock:
+                        self._index.pop(similar_key, None)  # evicted or expired
+                else:
+                    print(f"LLM cache: reusing a similar prompt (similarity {score:.3f})", flush=True)
+                    with self._lock:
+                        self.similar_hits += 1
+
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return entry.get("response")
+
+    def store(self, model: str, messages, params: dict, text: str):
+        method, request, scope = self._request(model, messages, params)
+        embedding = None
+        if self.similarity:
+            embedding = [round(v, 5) for v in self.embedder(_prompt_text(messages))]
+        self.set(method, request, text, scope=scope, embedding=embedding)
+        if embedding is not None:
+            with self._lock:
+                self._load_index()[self.make_key(method, request)] = (scope, embedding)
+
+    def stats(self) -> dict:
+        stats = super().stats()
+        with self._lock:
+            stats["similar_hits"] = self.similar_hits
+        return stats
+
+
+def get_llm_cache():
+    """Process-wide LLM cache configured from the environment, or None if disabled.
+
+    BLISS_LLM_CACHE: cache directory (default output/llm_cache), or 0 to disable
+    BLISS_LLM_CACHE_TTL_HOURS: entry lifetime (default 168)
+    BLISS_LLM_SIMILARITY: enable near-duplicate lookup at this cosine threshold
+                          (e.g. 0.95, or "on" for the default 0.97)
+    BLISS_LLM_EMBEDDER: "ngram" (default, local) or "gemini" (uses GEMINI_API_KEY)
+    """
+    global _cache
+    setting = os.getenv("BLISS_LLM_CACHE", "")
+    if setting.lower() in ("0", "false", "off", "no"):
+        return None
+
+    with _cache_lock:
+        if _cache is None:
+            similarity = os.getenv("BLISS_LLM_SIMILARITY", "").lower()
+            if similarity in ("on", "true", "yes", "1"):
+                similarity = DEFAULT_SIMILARITY
+            elif similarity in ("", "off", "false", "no", "0"):
+                similarity = None
+            embedder = None
+            if os.getenv("BLISS_LLM_EMBEDDER", "ngram").lower() == "gemini" and os.getenv("GEMINI_API_KEY"):
+                embedder = gemini_embedder(os.getenv("GEMINI_API_KEY"))
+            _cache = LLMCache(
+                setting or LLM_CACHE_DIR,
+                ttl_seconds=float(os.getenv("BLISS_LLM_CACHE_TTL_HOURS", DEFAULT_TTL_SECONDS / 3600)) * 3600,
+                similarity=float(similarity) if similarity else None,
+                embedder=embedder,
+            )
+        return _cache
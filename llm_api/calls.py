@@ -0,0 +1,96 @@
+"""
+Cached LLM call layer for Groq and Gemini text generation.
+
+complete() looks the request up in the LLM cache before calling the model and
+stores the answer afterwards. The actual request is made by a provider
+function (groq_chat, gemini_generate, or any callable taking
+(model, messages, params) and returning text), so callers keep their own
+client libraries.
+
+Prompts that contain random creative choices should draw them from
+prompt_rng(). It is unseeded, so every new run gets fresh creative choices,
+unless the caller names the job being retried: with a seed (the seed=
+argument or BLISS_PROMPT_SEED, e.g. the pipeline's run id) the choices are
+derived from the seed and the call's inputs, so a retry of that job builds the
+same prompt and gets the cached answer.
+
+Usage:
+    text = complete("llama-3.3-70b-versatile", messages, groq_chat(api_key), temperature=0.7)
+    text = complete("gemini-2.0-flash-exp", [{"role": "user", "content": prompt}],
+                    gemini_generate(api_key))
+"""
+
+import os
+import random
+import hashlib
+from functools import lru_cache
+
+from llm_api.cache import get_llm_cache
+
+_DEFAULT_CACHE = object()
+
+
+@lru_cache(maxsize=None)
+def _groq_client(api_key: str):
+    from groq import Groq
+    return Groq(api_key=api_key)
+
+
+@lru_cache(maxsize=None)
+def _gemini_client(api_key: str):
+    from google import genai
+    return genai.Client(api_key=api_key)
+
+
+def groq_chat(api_key: str):
+    """Provider for Groq chat completions (client built once per key)."""
+    def _call(model, messages, params):
+        response = _groq_client(api_key).chat.completions.create(model=model, messages=messages, **params)
+        return response.choices[0].message.content
+    return _call
+
+
+def gemini_generate(api_key: str):
+    """Provider for Gemini generate_content; chat messages are sent as one text prompt."""
+    def _call(model, messages, params):
+        contents = "\n\n".join(m["content"] for m in messages)
+        response = _gemini_client(api_key).models.generate_content(model=model, contents=contents, **params)
+        return response.text
+    return _call
+
+
+def prompt_rng(*inputs, seed: str = None) -> random.Random:
+    """RNG for a prompt's random choices.
+
+    Unseeded by default. With a retry seed (`seed`, else BLISS_PROMPT_SEED) and
+    the LLM cache on, it is seeded from the seed plus the inputs, so a retried
+    job repeats its choices and hits the cache.
+    """
+    seed = seed or os.getenv("BLISS_PROMPT_SEED")
+    if not seed or get_llm_cache() is None:
+        return random.Random()
+    digest = hashlib.sha256(repr((seed, inputs)).encode("utf-8")).digest()
+    return random.Random(int.from_bytes(digest[:8], "big"))
+
+
+def complete(model: str, messages: list, provider, cache=_DEFAULT_CACHE, **params) -> str:
+    """Return the model's text for `messages`, served from the cache when possible.
+
+    Pass cache=None to force a fresh call (the answer still is not stored);
+    by default the process-wide cache from get_llm_cache() is used.
+    """
+    if cache is _DEFAULT_CACHE:
+        cache = get_llm_cache()
+
+    if cache is not None:
+        cached = cache.lookup(model, messages, params)
+        if cached is not None:
+            stats = cache.stats()
+            print(f"LLM cache hit for {model} ({stats['hits']} hits, {stats['misses']} misses)", flush=True)
+            return cached
+
+    text = provider(model, messages, params)
+
+    if cache is not None and text:
+        cache.store(model, messages, params, text)
+    return text
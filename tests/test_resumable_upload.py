@@ -0,0 +1,123 @@
+"""
+ResumableUpload against the local FakeUploadServer (no OAuth, no quota).
+
+Usage:
+    python -m pytest tests/test_resumable_upload.py -q
+"""
+
+import os
+import sys
+import hashlib
+from pathlib import Path
+
+import pytest
+import requests
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from video_upload import resumable_upload
+from video_upload.fake_upload_server import FakeUploadServer
+from video_upload.resumable_upload import CHUNK_ALIGNMENT, ResumableUpload, UploadError
+
+BODY = {"snippet": {"title": "test #Shorts"}, "status": {"privacyStatus": "private"}}
+
+
+class _Interrupted(Exception):
+    """Stands in for the process dying mid-upload."""
+
+
+class _HookedSession(requests.Session):
+    """requests.Session that calls hook(chunk_number) before every chunk PUT."""
+
+    def __init__(self, hook):
+        super().__init__()
+        self.hook = hook
+        self.chunk_puts = 0
+
+    def put(self, url, *args, **kwargs):
+        if not kwargs.get("headers", {}).get("Content-Range", "").startswith("bytes */"):
+            self.chunk_puts += 1
+            self.hook(self.chunk_puts)
+        return super().put(url, *args, **kwargs)
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(resumable_upload.time, "sleep", lambda seconds: None)
+
+
+@pytest.fixture
+def video(tmp_path):
+    path = tmp_path / "video.mp4"
+    path.write_bytes(os.urandom(CHUNK_ALIGNMENT * 12 + 12345))
+    return path
+
+
+def _sha256(path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def _upload(video, session, server, **kwargs):
+    sessions_started = []
+    upload = ResumableUpload(video, BODY, session, upload_url=server.upload_url, chunk_size=CHUNK_ALIGNMENT,
+                             on_new_session=lambda: sessions_started.append(1), **kwargs)
+    return upload, sessions_started
+
+
+def test_upload_survives_chunk_failures(video):
+    with FakeUploadServer(failure_rate=0.3, seed=7) as server:
+        upload, sessions_started = _upload(video, requests.Session(), server, max_retries=50)
+        result = upload.run()
+
+    assert server.completed[result["id"]] == _sha256(video)
+    assert server.bytes_received == video.stat().st_size
+    assert len(sessions_started) == 1
+    assert not os.path.exists(upload.state_path)
+
+
+def test_expired_session_restarts_once(video):
+    with FakeUploadServer() as server:
+        def expire_once(chunk):
+            if chunk == 3:
+                server.expire()
+
+        upload, sessions_started = _upload(video, _HookedSession(expire_once), server)
+        result = upload.run()
+
+    assert server.completed[result["id"]] == _sha256(video)
+    assert len(sessions_started) == 2
+
+
+def test_session_expiring_again_raises(video):
+    with FakeUploadServer() as server:
+        def expire_every_session(chunk):
+            if chunk > 1:
+                server.expire()
+
+        upload, sessions_started = _upload(video, _HookedSession(expire_every_session), server)
+        with pytest.raises(UploadError) as excinfo:
+            upload.run()
+
+    assert excinfo.value.status == 410
+    assert len(sessions_started) == 1 + resumable_upload.MAX_SESSION_RESTARTS
+    assert not server.completed
+
+
+def test_retry_resumes_saved_session(video):
+    with FakeUploadServer() as server:
+        def die_at_chunk_3(chunk):
+            if chunk == 3:
+                raise _Interrupted()
+
+        first, sessions_started = _upload(video, _HookedSession(die_at_chunk_3), server)
+        with pytest.raises(_Interrupted):
+            first.run()
+        assert os.path.exists(first.state_path)
+
+        second, resumed_sessions = _upload(video, requests.Session(), server)
+        result = second.run()
+
+    assert server.completed[result["id"]] == _sha256(video)
+    assert len(sessions_started) == 1 and not resumed_sessions
+    assert server.bytes_received == video.stat().st_size
+    assert not os.path.exists(second.state_path)
@@ -0,0 +1,94 @@
+"""
+Async Veo batch generation against the in-process FakeVeoClient (no quota, no network).
+
+Usage:
+    python -m pytest tests/test_veo_async.py -q
+"""
+
+import sys
+import time
+import hashlib
+import itertools
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from video_generation import veo_async
+from video_generation.fake_veo import FakeVeoClient
+from video_generation.veo_async import generate_videos_batch
+from video_generation.veo_download import read_checksum
+
+
+@pytest.fixture(autouse=True)
+def fast_polling(monkeypatch):
+    monkeypatch.setattr(veo_async, "poll_intervals", lambda: itertools.repeat(0.02))
+
+
+def _jobs(tmp_path, *prompts) -> list:
+    return [{"job_id": prompt, "veo3_prompt": prompt, "output_path": str(tmp_path / f"{prompt}.mp4")}
+            for prompt in prompts]
+
+
+def _client(render_seconds: dict, **kwargs) -> FakeVeoClient:
+    # The fake sees the enhanced prompt; its first line is the job's veo3_prompt
+    return FakeVeoClient(render_seconds=lambda prompt: render_seconds[prompt.split("\n", 1)[0]], **kwargs)
+
+
+def test_results_arrive_in_completion_order_and_are_downloaded(tmp_path):
+    client = _client({"slow": 0.6, "fast": 0.1, "medium": 0.3})
+    results = generate_videos_batch(_jobs(tmp_path, "slow", "fast", "medium"), client=client)
+
+    assert [r["job_id"] for r in results] == ["fast", "medium", "slow"]
+    for result in results:
+        assert result["status"] == "success", result
+        video = Path(result["video_path"])
+        assert video.read_bytes().startswith(b"FAKE-VEO-VIDEO")
+        assert read_checksum(str(video)) == hashlib.sha256(video.read_bytes()).hexdigest()
+        assert not Path(f"{video}.part").exists()
+
+
+def test_timeout_counts_from_submission_not_queueing(tmp_path):
+    # The second job waits ~0.5s for the only slot; a queue-based clock would time it out
+    client = _client({"first": 0.5, "second": 0.5})
+    results = generate_videos_batch(_jobs(tmp_path, "first", "second"), client=client,
+                                    max_in_flight=1, timeout=0.8)
+
+    assert [r["status"] for r in results] == ["success", "success"]
+
+
+def test_job_past_timeout_fails(tmp_path):
+    client = _client({"stuck": 5.0})
+    started = time.time()
+    [result] = generate_videos_batch(_jobs(tmp_path, "stuck"), client=client, timeout=0.2)
+
+    assert result["status"] == "error" and result["error"].startswith("Timeout")
+    assert time.time() - started < 2
+    assert not Path(tmp_path / "stuck.mp4").exists()
+
+
+def test_jobs_queued_past_the_deadline_are_not_submitted(tmp_path):
+    client = _client({"first": 0.5, "second": 0.1})
+    results = generate_videos_batch(_jobs(tmp_path, "first", "second"), client=client,
+                                    max_in_flight=1, deadline=time.time() + 0.2)
+
+    by_id = {r["job_id"]: r for r in results}
+    assert by_id["first"]["status"] == "success"
+    assert by_id["second"]["error"] == "Batch deadline passed before submission"
+    assert len(client.service._operations) == 1
+
+
+def test_failed_operation_and_download_are_reported(tmp_path, monkeypatch):
+    failing = _client({"broken": 0.05}, failure_rate=1.0)
+    [result] = generate_videos_batch(_jobs(tmp_path, "broken"), client=failing)
+    assert result["status"] == "error" and "Simulated render failure" in result["error"]
+
+    client = _client({"lost": 0.05})
+
+    def _download_fails(*, file=None, **kwargs):
+        raise ConnectionError("connection reset")
+
+    monkeypatch.setattr(client.files, "download", _download_fails)
+    [result] = generate_videos_batch(_jobs(tmp_path, "lost"), client=client)
+    assert result["status"] == "error" and result["error"] == "Download failed: connection reset"
@@ -0,0 +1,115 @@
+"""
+Batch ASMR relevance classifier and hashtag extraction.
+
+All ASMR keywords are compiled into one trie-shaped alternation regex
+(shared prefixes factored out, longest match wins), which yields
+per-keyword hit counts for later scoring. Whether a text matches at all is
+decided with plain substring checks, since CPython's substring search beats
+its regex engine here (a single alternation findall over 30k joined
+snippets was slower than the old per-video `kw in text` loop). The regex
+only runs on texts that matched, and only when hit counts are wanted.
+Only the standard library is needed, so large historical trend dumps can be
+filtered without the API dependencies of trend_fetch.py.
+
+Usage:
+    results = classify_snippets(snippets)
+    asmr = [s for s, r in zip(snippets, results) if r["is_asmr"]]
+"""
+
+import re
+from collections import Counter
+
+HASHTAG_RE = re.compile(r"#([\w\d_]+)")
+
+ASMR_KEYWORDS = [
+    'asmr', 'relaxing', 'sleep', 'calm', 'soothing', 'meditation',
+    'whisper', 'tingles', 'peaceful', 'ambient', 'calming', 'quiet',
+    'soft spoken', 'rain sounds', 'nature sounds', 'white noise'
+]
+
+
+def _trie_pattern(words) -> str:
+    """Regex alternation with common prefixes factored out, e.g. calm(?:ing)?.
+
+    Optional suffixes are greedy, so the longest keyword at a position wins.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def _build(node) -> str:
+        is_end = "" in node
+        branches = [re.escape(ch) + _build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        if len(branches) == 1 and not is_end:
+            return branches[0]
+        group = "(?:" + "|".join(branches) + ")"
+        return group + "?" if is_end else group
+
+    return _build(trie)
+
+
+ASMR_KEYWORDS_RE = re.compile(_trie_pattern(ASMR_KEYWORDS))
+
+
+def extract_hashtags(*texts):
+    """Extract unique hashtags (case-insensitive, first spelling wins) from texts."""
+    unique = {}
+    for t in texts:
+        if t:
+            for h in HASHTAG_RE.findall(t):
+                unique.setdefault(h.lower(), h)
+    return list(unique.values())
+
+
+def has_keyword(text: str) -> bool:
+    """True if lowercase text contains any ASMR keyword."""
+    return any(keyword in text for keyword in ASMR_KEYWORDS)
+
+
+def keyword_hits(text: str) -> Counter:
+    """Non-overlapping ASMR keyword matches in lowercase text."""
+    return Counter(ASMR_KEYWORDS_RE.findall(text))
+
+
+def _snippet_text(snippet: dict) -> str:
+    """Lowercase title, description and tags of a videos.list snippet.
+
+    Hashtags come from title/description, so scanning those plus tags is enough.
+    """
+    return (f"{snippet.get('title', '') or ''} {snippet.get('description', '') or ''} "
+            f"{' '.join(snippet.get('tags') or [])}").lower()
+
+
+def classify_snippet(snippet: dict, with_hits: bool = True) -> dict:
+    """Classify one videos.list snippet: is_asmr, hashtags and keyword_hits.
+
+    With with_hits=False keyword_hits is empty.
+    """
+    text = _snippet_text(snippet)
+    is_asmr = has_keyword(text)
+    return {
+        "is_asmr": is_asmr,
+        "hashtags": extract_hashtags(snippet.get('title'), snippet.get('description')),
+        "keyword_hits": dict(keyword_hits(text)) if is_asmr and with_hits else {},
+    }
+
+
+def classify_snippets(snippets, with_hits: bool = True) -> list:
+    """Classify a batch of snippets; returns one result dict per snippet, in order."""
+    return [classify_snippet(snippet, with_hits) for snippet in snippets]
+
+
+def filter_asmr(snippets) -> list:
+    """Only the ASMR-related snippets of a batch (fast path, no hashtags or counts)."""
+    return [snippet for snippet in snippets if has_keyword(_snippet_text(snippet))]
+
+
+def is_asmr_related(title, description, tags, hashtags):
+    """Check if video is ASMR-related."""
+    combined = f"{title} {description} {' '.join(tags)} {' '.join(hashtags)}".lower()
+    return has_keyword(combined)
@@ -0,0 +1,128 @@
+"""
+Streaming, parallel YouTube trend fetch pipeline.
+
+Every (query, region) pair is a search page chain running on its own worker.
+As soon as a search page returns, its new video IDs are handed to a detail
+worker (videos.list), so details for early pages are fetched while later
+pages are still being searched. All API calls share one global rate limiter.
+A large pull takes roughly as long as the slowest page chain instead of the
+sum of every request.
+
+Usage:
+    for item in stream_video_details(search_fn, detail_fn,
+                                     queries=["ASMR", "ASMR sleep"], regions=["US", "GB"],
+                                     max_ids=500, rate_limiter=RateLimiter(10)):
+        ...
+"""
+
+import time
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_WORKERS = 8
+DEFAULT_QPS = 10.0
+
+_DONE = object()
+
+
+class RateLimiter:
+    """Thread-safe token bucket: at most `rate` calls per second, bursts up to `burst`."""
+
+    def __init__(self, rate: float = DEFAULT_QPS, burst: int = None):
+        self.rate = rate
+        self.capacity = burst or max(1, int(rate))
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def stream_video_details(search_fn, detail_fn, queries, regions=(None,), max_ids: int = 50,
+                         page_size: int = 50, workers: int = DEFAULT_WORKERS, rate_limiter=None):
+    """Yield videos.list items as they arrive from a pipelined search -> details fetch.
+
+    search_fn(query, region, page_token, page_size) -> (video_ids, next_page_token)
+    detail_fn(video_ids) -> list of videos.list items
+
+    Video IDs are de-duplicated across all chains, and searching stops once
+    max_ids unique IDs have been found.
+    """
+    chains = [(q, r) for q in queries for r in (regions or [None])]
+    if not chains:
+        return
+    results = queue.Queue()
+    seen = set()
+    state = {"outstanding": len(chains)}
+    lock = threading.Lock()
+
+    def _limited(fn, *args):
+        if rate_limiter is not None:
+            rate_limiter.acquire()
+        return fn(*args)
+
+    def _task_done():
+        with lock:
+            state["outstanding"] -= 1
+            if state["outstanding"] == 0:
+                results.put(_DONE)
+
+    def _fetch_details(video_ids):
+        try:
+            results.put(_limited(detail_fn, video_ids))
+        except Exception as e:
+            print(f"Detail fetch failed for {len(video_ids)} videos: {e}", flush=True)
+        finally:
+            _task_done()
+
+    def _page_chain(query, region):
+        page_token = None
+        try:
+            while True:
+                with lock:
+                    if len(seen) >= max_ids:
+                        return
+                    remaining = max_ids - len(seen)
+                video_ids, page_token = _limited(search_fn, query, region, page_token, min(page_size, remaining))
+
+                with lock:
+                    new_ids = [vid for vid in dict.fromkeys(video_ids) if vid not in seen]
+                    new_ids = new_ids[:max(0, max_ids - len(seen))]
+                    seen.update(new_ids)
+                    if new_ids:
+                        state["outstanding"] += 1
+                if new_ids:
+                    detail_pool.submit(_fetch_details, new_ids)
+
+                if not page_token:
+                    return
+        except Exception as e:
+            print(f"Search chain '{query}'/{region or 'any'} stopped: {e}", flush=True)
+        finally:
+            _task_done()
+
+    search_pool = ThreadPoolExecutor(max_workers=max(1, min(workers, len(chains))))
+    detail_pool = ThreadPoolExecutor(max_workers=max(1, workers))
+    try:
+        for query, region in chains:
+            search_pool.submit(_page_chain, query, region)
+
+        while True:
+            items = results.get()
+            if items is _DONE:
+                break
+            yield from items
+    finally:
+        search_pool.shutdown(wait=False, cancel_futures=True)
+        detail_pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,155 @@
+"""
+On-disk response cache for YouTube Data API calls.
+
+Responses are stored as JSON files named by a SHA-256 of the API method and
+its request parameters (API keys are never part of the key). Entries expire
+after a TTL, and the cache is kept under a size limit by evicting the least
+recently used files first; a hit refreshes the file's mtime.
+
+Usage:
+    cache = get_response_cache("output/cache/youtube", ttl_seconds=6 * 3600)
+    response = cache.get("search.list", params)
+    if response is None:
+        response = youtube.search().list(**params).execute()
+        cache.set("search.list", params, response)
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+from pathlib import Path
+
+DEFAULT_TTL_SECONDS = 6 * 3600
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+
+_CACHES = {}
+_CACHES_LOCK = threading.Lock()
+
+
+class ResponseCache:
+    """Content-addressed JSON response cache with TTL and size-bounded LRU eviction."""
+
+    def __init__(self, cache_dir, ttl_seconds: float = DEFAULT_TTL_SECONDS,
+                 max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._total_bytes = sum(p.stat().st_size for p in self._entries())
+
+    @staticmethod
+    def make_key(method: str, params: dict) -> str:
+        """Stable key for an API method and its request parameters."""
+        canonical = json.dumps({"method": method, "params": params}, sort_keys=True, default=str)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def _entries(self):
+        return self.cache_dir.glob("*/*.json")
+
+    def _read(self, path: Path):
+        """Load a live entry dict and mark it recently used; None if missing or expired."""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if time.time() - entry.get("stored_at", 0) > self.ttl_seconds:
+            self._remove(path)
+            return None
+
+        try:
+            os.utime(path)  # mark as recently used for LRU eviction
+        except OSError:
+            pass
+        return entry
+
+    def get(self, method: str, params: dict):
+        """Return the cached response, or None if missing or older than the TTL."""
+        entry = self._read(self._path(self.make_key(method, params)))
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return entry.get("response")
+
+    def set(self, method: str, params: dict, response, **extra):
+        """Store a response and evict old entries if the cache grew past max_bytes.
+
+        Extra keyword fields are stored alongside the response (for subclasses).
+        """
+        path = self._path(self.make_key(method, params))
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        data = json.dumps({"stored_at": time.time(), "method": method, "response": response, **extra},
+                          ensure_ascii=False).encode("utf-8")
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+
+        old_size = path.stat().st_size if path.exists() else 0
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self._total_bytes += len(data) - old_size
+            over_limit = self._total_bytes > self.max_bytes
+        if over_limit:
+            self.evict()
+
+    def _remove(self, path: Path):
+        try:
+            size = path.stat().st_size
+            path.unlink()
+        except OSError:
+            return
+        with self._lock:
+            self._total_bytes -= size
+
+    def evict(self):
+        """Drop expired entries, then least recently used ones until under max_bytes."""
+        now = time.time()
+        entries = []
+        for path in self._entries():
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+
+        total = sum(size for _, size, _ in entries)
+        for mtime, size, path in entries:
+            if total <= self.max_bytes and now - mtime <= self.ttl_seconds:
+                continue
+            try:
+                path.unlink()
+                total -= size
+            except OSError:
+                pass
+
+        with self._lock:
+            self._total_bytes = total
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "bytes": self._total_bytes}
+
+
+def get_response_cache(cache_dir, ttl_seconds: float = DEFAULT_TTL_SECONDS,
+                       max_bytes: int = DEFAULT_MAX_BYTES) -> ResponseCache:
+    """Return the process-wide cache for a directory, creating it on first use."""
+    key = str(Path(cache_dir).resolve())
+    with _CACHES_LOCK:
+        cache = _CACHES.get(key)
+        if cache is None:
+            cache = _CACHES[key] = ResponseCache(cache_dir, ttl_seconds, max_bytes)
+        return cache
@@ -0,0 +1,220 @@
+"""
+Novelty index of past themes and Veo 3 prompts.
+
+Every published theme (output/*/theme.txt of runs that produced a video, plus
+successful rows of output/pipeline_log.csv) and Veo 3 prompt is stored as a
+MinHash signature of its word shingles. Locality-sensitive hashing over
+signature bands finds near-duplicate candidates without scanning the whole
+index, so a lookup stays well under a millisecond with tens of thousands of
+entries. New themes scoring above a Jaccard threshold against a past one are
+rejected before the expensive video stage.
+
+The index is persisted to output/theme_index.json and picks up new run
+folders and log rows incrementally.
+
+Usage:
+    index = get_theme_index()
+    score, match = index.nearest("soft glass tapping with crystal chimes")
+    if score >= DEFAULT_THRESHOLD:
+        ...  # regenerate
+    index.add(theme, kind="theme", source=output_dir)
+    index.save()
+"""
+
+import io
+import os
+import re
+import csv
+import json
+import time
+import hashlib
+import threading
+from pathlib import Path
+
+import numpy as np
+
+OUTPUT_DIR = Path(__file__).resolve().parent.parent / "output"
+THEME_INDEX_PATH = OUTPUT_DIR / "theme_index.json"
+# Matches the LSH S-curve midpoint, (1 / BANDS) ** (1 / ROWS) = 0.5
+DEFAULT_THRESHOLD = 0.5
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+# a * h + b stays below 2**63 for 32-bit shingle hashes, so uint64 math cannot overflow
+_PRIME = (1 << 31) - 1
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and the of with in on for to by from at into over under its their his her "
+    "very soft gentle asmr".split()
+)
+
+
+def _stable_hash(text: str) -> int:
+    """32-bit hash that is the same in every process (unlike hash())."""
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=4).digest(), "big")
+
+
+# Fixed (a, b) pairs so signatures are stable across processes and runs
+_PERM_A = np.array([_stable_hash(f"a{i}") % (_PRIME - 1) + 1 for i in range(NUM_PERM)], dtype=np.uint64)
+_PERM_B = np.array([_stable_hash(f"b{i}") % _PRIME for i in range(NUM_PERM)], dtype=np.uint64)
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def _stem(word: str) -> str:
+    for suffix in ("ing", "es", "s"):
+        if len(word) > len(suffix) + 2 and word.endswith(suffix):
+            return word[:-len(suffix)]
+    return word
+
+
+def shingles(text: str) -> set:
+    """Word unigrams and bigrams of the content words (lowercased, lightly stemmed)."""
+    words = [_stem(w) for w in _WORD_RE.findall(text.lower()) if w not in _STOPWORDS]
+    return set(words) | {f"{a} {b}" for a, b in zip(words, words[1:])}
+
+
+def minhash(features: set) -> list:
+    """MinHash signature (NUM_PERM values) of a shingle set."""
+    hashes = np.array([_stable_hash(f) for f in features] or [0], dtype=np.uint64)
+    values = (_PERM_A[:, None] * hashes[None, :] + _PERM_B[:, None]) % np.uint64(_PRIME)
+    return values.min(axis=1).tolist()
+
+
+def _band_keys(signature: list) -> list:
+    return [f"{band}:" + ",".join(map(str, signature[band * ROWS:(band + 1) * ROWS]))
+            for band in range(BANDS)]
+
+
+def _similarity(sig_a: list, sig_b: list) -> float:
+    """Estimated Jaccard similarity: the fraction of matching signature slots."""
+    return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / NUM_PERM
+
+
+class ThemeIndex:
+    """MinHash/LSH index of past themes and prompts."""
+
+    def __init__(self, path=THEME_INDEX_PATH):
+        self.path = Path(path) if path else None  # None: in-memory only
+        self.entries = []   # {"text", "kind", "source", "added_at", "signature"}
+        self.sources = set()
+        self.log_offset = 0
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def _insert(self, entry: dict):
+        entry_id = len(self.entries)
+        self.entries.append(entry)
+        for key in _band_keys(entry["signature"]):
+            self._buckets.setdefault(key, []).append(entry_id)
+
+    def add(self, text: str, kind: str = "theme", source: str = None):
+        """Index a theme or prompt (kind="theme" / "prompt"); blank text is ignored."""
+        text = " ".join((text or "").split())
+        if not text:
+            return
+        with self._lock:
+            self._insert({
+                "text": text,
+                "kind": kind,
+                "source": source,
+                "added_at": time.time(),
+                "signature": minhash(shingles(text)),
+            })
+            if source:
+                self.sources.add(source)
+
+    def nearest(self, text: str, kind: str = "theme"):
+        """(similarity, entry) of the most similar indexed text of this kind, or (0.0, None)."""
+        signature = minhash(shingles(text))
+        best_score, best_entry = 0.0, None
+        with self._lock:
+            candidates = {i for key in _band_keys(signature) for i in self._buckets.get(key, ())}
+            for i in candidates:
+                entry = self.entries[i]
+                if entry["kind"] != kind:
+                    continue
+                score = _similarity(signature, entry["signature"])
+                if score > best_score:
+                    best_score, best_entry = score, entry
+        return best_score, best_entry
+
+    def is_novel(self, text: str, kind: str = "theme", threshold: float = DEFAULT_THRESHOLD) -> bool:
+        return self.nearest(text, kind)[0] < threshold
+
+    def refresh(self, output_dir=OUTPUT_DIR) -> int:
+        """Index run folders and pipeline_log.csv rows not seen yet; returns how many texts were added."""
+        output_dir = Path(output_dir)
+        before = len(self.entries)
+
+        run_dirs = list(output_dir.glob("*/theme.txt")) + list(output_dir.glob("batch_*/*/theme.txt"))
+        for theme_file in run_dirs:
+            run_dir = theme_file.parent
+            source = str(run_dir)
+            if source in self.sources:
+                continue
+            # Only runs that got as far as a video; failed attempts may be retried
+            if not (any(run_dir.glob("*.mp4")) or (run_dir / "upload_result.json").exists()):
+                continue
+            self.add(theme_file.read_text(encoding="utf-8").strip(), "theme", source)
+            prompt_file = run_dir / "veo3_prompt.txt"
+            if prompt_file.exists():
+                self.add(prompt_file.read_text(encoding="utf-8").strip(), "prompt", source)
+
+        log_file = output_dir / "pipeline_log.csv"
+        if log_file.exists():
+            with open(log_file, "r", encoding="utf-8", newline="") as f:
+                header = next(csv.reader([f.readline()]), [])
+                header_end = f.tell()
+                end = f.seek(0, os.SEEK_END)
+                if end < self.log_offset:
+                    self.log_offset = 0  # log was rotated
+                f.seek(max(self.log_offset, header_end))
+                # Only rows appended since the last refresh are parsed
+                for row in csv.DictReader(io.StringIO(f.read()), fieldnames=header):
+                    if row.get("success") != "true" or row.get("output_dir") in self.sources:
+                        continue
+                    theme = row.get("theme")
+                    if theme and theme != "N/A":
+                        self.add(theme, "theme", row.get("output_dir"))
+                self.log_offset = end
+
+        return len(self.entries) - before
+
+    def save(self):
+        with self._lock:
+            data = {"entries": self.entries, "sources": sorted(self.sources), "log_offset": self.log_offset}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    @classmethod
+    def load(cls, path=THEME_INDEX_PATH) -> "ThemeIndex":
+        index = cls(path)
+        try:
+            with open(index.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return index
+        for entry in data.get("entries", []):
+            if len(entry.get("signature", [])) == NUM_PERM:
+                index._insert(entry)
+        index.sources = set(data.get("sources", []))
+        index.log_offset = data.get("log_offset", 0)
+        return index
+
+
+def get_theme_index(path=THEME_INDEX_PATH, output_dir=OUTPUT_DIR) -> ThemeIndex:
+    """Process-wide index: loaded from disk, refreshed with new runs, saved if it grew."""
+    global _index
+    with _index_lock:
+        if _index is None or _index.path != Path(path):
+            _index = ThemeIndex.load(path)
+        if _index.refresh(output_dir):
+            _index.save()
+        return _index
@@ -1,168 +1,265 @@
 import os
 import sys
 import argparse
-import re
 import json
 import dotenv
-from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 import datetime
-from groq import Groq
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from trend_fetching.asmr_classifier import classify_snippet
+from trend_fetching.response_cache import DEFAULT_TTL_SECONDS, DEFAULT_MAX_BYTES, get_response_cache
+from trend_fetching.trend_io import TrendWriter
+from trend_fetching.theme_index import (
+    DEFAULT_THRESHOLD as DEFAULT_NOVELTY_THRESHOLD, THEME_INDEX_PATH, ThemeIndex, get_theme_index
+)
+from trend_fetching.trend_store import DEFAULT_STATS_MAX_AGE, TrendStore
+from trend_fetching.fetch_pipeline import DEFAULT_QPS, DEFAULT_WORKERS, RateLimiter, stream_video_details
+from llm_api.calls import complete, groq_chat, prompt_rng
+from youtube_api.client import get_youtube_service
+from youtube_api.quota import QuotaExceeded, get_quota_scheduler, is_quota_error
 
 dotenv.load_dotenv()
 
-HASHTAG_RE = re.compile(r"#([\w\d_]+)")
+# extract_theme_with_llm samples from this many of the top trends
+THEME_SAMPLE_SIZE = 20
 
-ASMR_KEYWORDS = [
-    'asmr', 'relaxing', 'sleep', 'calm', 'soothing', 'meditation',
-    'whisper', 'tingles', 'peaceful', 'ambient', 'calming', 'quiet',
-    'soft spoken', 'rain sounds', 'nature sounds', 'white noise'
-]
+def _published_after(days=7):
+    """Start of the trend window, floored to midnight UTC so request params (and cache keys) stay stable for a day."""
+    start = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=days)
+    return start.strftime('%Y-%m-%dT00:00:00Z')
 
-def extract_hashtags(*texts):
-    """Extract unique hashtags from texts."""
-    hashtags = []
-    for t in texts:
-        if t:
-            hashtags.extend([m.group(1) for m in HASHTAG_RE.finditer(t)])
-    
-    seen = set()
-    unique = []
-    for h in hashtags:
-        if h.lower() not in seen:
-            seen.add(h.lower())
-            unique.append(h)
-    return unique
+def _execute(method, params, request_fn, cache=None, quota=None):
+    """Execute an API request, serving it from the response cache when possible.
+    
+    Requests that reach the API are charged to `quota` first (cache hits are free).
+    """
+    if cache is not None:
+        cached = cache.get(method, params)
+        if cached is not None:
+            return cached
+    
+    if quota is not None:
+        quota.charge(method)
+    try:
+        response = request_fn(**params).execute()
+    except HttpError as e:
+        if quota is not None and is_quota_error(e):
+            quota.mark_exhausted()
+        raise
+    
+    if cache is not None:
+        cache.set(method, params, response)
+    return response
 
-def is_asmr_related(title, description, tags, hashtags):
-    """Check if video is ASMR-related."""
-    combined = f"{title} {description} {' '.join(tags)} {' '.join(hashtags)}".lower()
-    return any(kw in combined for kw in ASMR_KEYWORDS)
+def search_page(api_key, query='ASMR', region=None, page_token=None, page_size=50, cache=None, quota=None):
+    """Fetch one search.list page of recent videos; returns (video_ids, next_page_token)."""
+    youtube = get_youtube_service(api_key=api_key)
+    params = {
+        'part': 'snippet',
+        'q': query,
+        'type': 'video',
+        'order': 'viewCount',
+        'maxResults': page_size,
+        'pageToken': page_token,
+        'relevanceLanguage': 'en',
+        'safeSearch': 'strict',
+        'videoDefinition': 'high',
+        'publishedAfter': _published_after(days=7)
+    }
+    if region:
+        params['regionCode'] = region
+    response = _execute('search.list', params, youtube.search().list, cache, quota)
+    
+    video_ids = [item['id'].get('videoId') for item in response.get('items', [])]
+    return [vid for vid in video_ids if vid], response.get('nextPageToken')
 
-def search_asmr_videos(api_key, max_results=50):
+def search_asmr_videos(api_key, max_results=50, cache=None, query='ASMR', region=None, quota=None):
     """Search for ASMR videos using YouTube search API."""
-    youtube = build('youtube', 'v3', developerKey=api_key)
     video_ids = []
     next_page_token = None
     
     while len(video_ids) < max_results:
         try:
-            request = youtube.search().list(
-                part='snippet',
-                q='ASMR',
-                type='video',
-                order='viewCount',
-                maxResults=min(50, max_results - len(video_ids)),
-                pageToken=next_page_token,
-                relevanceLanguage='en',
-                safeSearch='strict',
-                videoDefinition='high',
-                publishedAfter=(datetime.datetime.now() - datetime.timedelta(days=7)).isoformat() + 'Z'
+            page_ids, next_page_token = search_page(
+                api_key, query, region, next_page_token,
+                page_size=min(50, max_results - len(video_ids)), cache=cache, quota=quota
             )
-            response = request.execute()
-            
-            for item in response.get('items', []):
-                video_id = item['id'].get('videoId')
-                if video_id:
-                    video_ids.append(video_id)
+            video_ids.extend(page_ids)
             
-            next_page_token = response.get('nextPageToken')
             if not next_page_token:
                 break
         except HttpError as e:
             print(f"HTTP error: {e}")
             break
+        except QuotaExceeded as e:
+            print(f"Quota: {e}")
+            break
     
     return video_ids
 
-def get_video_details(api_key, video_ids):
+def get_video_details(api_key, video_ids, cache=None, part='snippet,statistics', quota=None):
     """Get full details for videos by IDs."""
-    youtube = build('youtube', 'v3', developerKey=api_key)
+    youtube = get_youtube_service(api_key=api_key)
     videos = []
     
     for i in range(0, len(video_ids), 50):
         batch_ids = video_ids[i:i+50]
         try:
-            request = youtube.videos().list(
-                part='snippet,statistics',
-                id=','.join(batch_ids)
-            )
-            videos.extend(request.execute().get('items', []))
+            params = {
+                'part': part,
+                'id': ','.join(batch_ids)
+            }
+            response = _execute('videos.list', params, youtube.videos().list, cache, quota)
+            videos.extend(response.get('items', []))
         except HttpError as e:
             print(f"HTTP error: {e}")
+        except QuotaExceeded as e:
+            print(f"Quota: {e}")
+            break
     
     return videos
 
-def collect_trends_with_metadata(youtube_api_key: str, region: str = "US", max_results: int = 50):
-    """Collect ASMR trending videos with metadata."""
-    print("Searching for trending ASMR videos...")
-    video_ids = search_asmr_videos(youtube_api_key, max_results=max_results)
+def iter_trends_with_metadata(youtube_api_key: str, region: str = "US", max_results: int = 50, cache=None,
+                              store=None, stats_max_age: float = DEFAULT_STATS_MAX_AGE,
+                              queries=None, regions=None, workers: int = DEFAULT_WORKERS,
+                              rate_limiter=None, quota=None):
+    """Yield ASMR trend records as their detail batches arrive (search order, not sorted).
     
-    if not video_ids:
-        print("No ASMR videos found.")
-        return []
+    Searches every query variant in every region (default: "ASMR" in `region`)
+    as parallel page chains; each page's IDs go straight to a detail fetch, and
+    all calls share `rate_limiter`.
+    
+    Pass a ResponseCache (see response_cache.get_response_cache) to serve repeated
+    search/videos requests within its TTL from disk instead of spending quota.
+    Pass a TrendStore to fetch details only for unseen IDs and refresh statistics
+    older than stats_max_age seconds; the run's delta is left in store.last_delta.
+    Pass a QuotaScheduler to meter every call; search depth (and the number of
+    query/region chains) shrinks to what the discovery budget can pay for.
+    """
+    queries = queries or ['ASMR']
+    regions = regions or [region]
+    deltas = []
+    
+    if quota is not None:
+        chains = [(q, r) for q in queries for r in regions]
+        desired_pages = max(len(chains), -(-max_results // 50))
+        pages = quota.plan_search_pages(desired_pages)
+        if pages == 0:
+            print(f"Quota: no discovery budget left today ({quota.status()['available_for_discovery']} units)")
+            return
+        if pages < desired_pages:
+            print(f"Quota: budget allows {pages}/{desired_pages} search pages, reducing search depth")
+            chains = chains[:pages]
+            queries = list(dict.fromkeys(q for q, _ in chains))
+            regions = list(dict.fromkeys(r for _, r in chains))
+            max_results = min(max_results, pages * 50)
     
-    print(f"Found {len(video_ids)} videos, fetching details...")
-    videos = get_video_details(youtube_api_key, video_ids)
+    def _search(query, search_region, page_token, page_size):
+        return search_page(youtube_api_key, query, search_region, page_token, page_size, cache=cache, quota=quota)
     
-    results = []
+    def _fetch(ids, part='snippet,statistics'):
+        return get_video_details(youtube_api_key, ids, cache=cache, part=part, quota=quota)
+    
+    def _details(ids):
+        if store is None:
+            return _fetch(ids)
+        page_videos, page_delta = store.sync(ids, _fetch, stats_max_age=stats_max_age)
+        deltas.append(page_delta)
+        return page_videos
+    
+    print(f"Searching for trending ASMR videos ({len(queries)} queries x {len(regions)} regions)...")
+    videos = stream_video_details(
+        _search, _details, queries, regions,
+        max_ids=max_results, workers=workers, rate_limiter=rate_limiter or RateLimiter(DEFAULT_QPS)
+    )
+    
+    count = 0
     for v in videos:
         snip = v.get('snippet', {})
-        title = snip.get('title', '')
-        description = snip.get('description', '')
-        tags = snip.get('tags', [])
-        hashtags = extract_hashtags(title, description)
+        classified = classify_snippet(snip)
         
-        if is_asmr_related(title, description, tags, hashtags):
-            results.append({
+        if classified["is_asmr"]:
+            count += 1
+            yield {
                 "video_id": v.get('id'),
-                "title": title,
+                "title": snip.get('title', ''),
                 "channel": snip.get('channelTitle', ''),
                 "published_at": snip.get('publishedAt'),
-                "description": description,
-                "hashtags": hashtags,
-                "keywords": tags,
+                "description": snip.get('description', ''),
+                "hashtags": classified["hashtags"],
+                "keywords": snip.get('tags', []),
                 "view_count": v.get('statistics', {}).get('viewCount', '0'),
-            })
-        
-        if len(results) >= max_results:
-            break
+                "keyword_hits": classified["keyword_hits"],
+            }
+    
+    if not count:
+        print("No ASMR videos found.")
     
-    print(f"Collected {len(results)} ASMR videos")
-    return results
+    if store is not None and deltas:
+        store.last_delta = {
+            "new": [vid for d in deltas for vid in d['new']],
+            "refreshed": [vid for d in deltas for vid in d['refreshed']],
+            "cached": sum(d['cached'] for d in deltas),
+            "pruned": sum(d['pruned'] for d in deltas),
+        }
+        delta = store.last_delta
+        print(f"Trend store: {len(delta['new'])} new, {len(delta['refreshed'])} refreshed, "
+              f"{delta['cached']} unchanged, {delta['pruned']} pruned")
+    
+    print(f"Collected {count} ASMR videos")
+    if cache is not None:
+        stats = cache.stats()
+        print(f"Response cache: {stats['hits']} hits, {stats['misses']} misses")
+    if quota is not None:
+        status = quota.status()
+        print(f"Quota: {status['used']}/{status['budget']} units used today, "
+              f"{status['reserved_for_uploads']} reserved for uploads")
+
+def collect_trends_with_metadata(youtube_api_key: str, region: str = "US", max_results: int = 50, **kwargs):
+    """Collect ASMR trending videos with metadata, sorted by view count.
+    
+    Takes the same options as iter_trends_with_metadata but holds every record
+    in memory; prefer the iterator (and trend_io.TrendWriter) for large pulls.
+    """
+    results = list(iter_trends_with_metadata(youtube_api_key, region=region, max_results=max_results, **kwargs))
+    results.sort(key=lambda r: int(r['view_count'] or 0), reverse=True)
+    return results[:max_results]
 
-def extract_theme_with_llm(trends, api_key: str):
-    """Use Groq LLM to extract ASMR theme from trending videos."""
+def extract_theme_with_llm(trends, api_key: str, avoid=None):
+    """Use Groq LLM to extract ASMR theme from trending videos.
+    
+    `avoid` lists themes the answer must differ from (e.g. rejected near-duplicates).
+    """
     if not api_key:
         print("Warning: No GROQ_API_KEY, using fallback.", flush=True)
         return _fallback_theme_extraction(trends)
     
     try:
-        import random
-        
-        client = Groq(api_key=api_key)
+        # Fresh choices per run; a retry of the same run (BLISS_PROMPT_SEED) reuses the cached theme
+        rng = prompt_rng("theme", [item.get('video_id') or item.get('title') for item in trends[:THEME_SAMPLE_SIZE]],
+                         sorted(avoid or []))
         
         # Random sample for variety
-        sample_size = random.randint(10, 15)
-        sampled = random.sample(trends[:20], min(sample_size, len(trends[:20])))
+        sample_size = rng.randint(10, 15)
+        sampled = rng.sample(trends[:THEME_SAMPLE_SIZE], min(sample_size, len(trends[:THEME_SAMPLE_SIZE])))
         
         # Build context
-        context = "\n\n".join([
-            f"Title: {item.get('title', '')}\n"
-            f"Keywords: {', '.join((item.get('keywords') or [])[:5])}\n"
-            f"Hashtags: {', '.join((item.get('hashtags') or [])[:5])}"
-            for item in sampled
-        ])
+        context = _theme_context(sampled)
         
         # Random creative variations
         perspectives = ["texture-focused", "sound design", "visual aesthetics", "tactile sensation", "relaxation technique"]
         styles = ["materials and textures", "auditory experience", "visual flow", "sensory journey", "meditative quality"]
         
         prompt = (
-            f"You are an ASMR content strategist analyzing trending videos from a {random.choice(perspectives)} perspective. "
-            f"Based on these trending ASMR videos, create ONE unique theme (6-14 words) that {random.choice(styles)}.\n\n"
+            f"You are an ASMR content strategist analyzing trending videos from a {rng.choice(perspectives)} perspective. "
+            f"Based on these trending ASMR videos, create ONE unique theme (6-14 words) that {rng.choice(styles)}.\n\n"
             f"Be highly creative, brand-safe, and peaceful. Use vivid sensory imagery.\n\n"
             f"{context}\n\n"
+            f"{_avoid_block(avoid)}"
             f"Examples: 'cardboard crafting with satisfying crushing sounds', 'colorful kinetic sand cutting', "
             f"'soft spoken unboxing with crinkling paper'\n\n"
             f"Output ONLY the theme (6-14 words)."
@@ -170,21 +267,22 @@ def extract_theme_with_llm(trends, api_key: str):
         
         print("Calling Groq API...", flush=True)
         
-        chat_completion = client.chat.completions.create(
-            messages=[
+        theme = complete(
+            "llama-3.3-70b-versatile",
+            [
                 {"role": "system", "content": "You are a creative ASMR expert who creates unique, specific themes. Never repeat generic concepts."},
                 {"role": "user", "content": prompt}
             ],
-            model="llama-3.3-70b-versatile",
+            groq_chat(api_key),
             max_tokens=120,
             temperature=0.95,
             top_p=0.98,
             frequency_penalty=0.7,
             presence_penalty=0.5,
-            seed=random.randint(1, 1000000)
+            seed=rng.randint(1, 1000000)
         )
         
-        theme = chat_completion.choices[0].message.content.strip().strip('"').strip("'")
+        theme = (theme or '').strip().strip('"').strip("'")
         
         if theme and len(theme.split()) >= 4:
             print(f"Extracted theme: {theme}", flush=True)
@@ -197,6 +295,148 @@ def extract_theme_with_llm(trends, api_key: str):
         print(f"LLM extraction failed ({e}), using fallback.", flush=True)
         return _fallback_theme_extraction(trends)
 
+def _theme_context(items):
+    """Trend context block shared by the single and batched theme prompts."""
+    return "\n\n".join([
+        f"Title: {item.get('title', '')}\n"
+        f"Keywords: {', '.join((item.get('keywords') or [])[:5])}\n"
+        f"Hashtags: {', '.join((item.get('hashtags') or [])[:5])}"
+        for item in items
+    ])
+
+def _avoid_block(themes) -> str:
+    if not themes:
+        return ""
+    return "Do NOT reuse these existing themes:\n" + "\n".join(f"- {t}" for t in sorted(themes)) + "\n\n"
+
+def _normalize_theme(theme: str) -> str:
+    return " ".join(theme.lower().strip(" .\"'").split())
+
+def _parse_themes(text: str) -> list:
+    """Themes from a {"themes": [...]} JSON answer; raises ValueError if malformed."""
+    data = json.loads(text)
+    themes = data.get("themes") if isinstance(data, dict) else data
+    if not isinstance(themes, list):
+        raise ValueError("JSON answer has no themes list")
+    return [" ".join(str(t).split()).strip('"').strip("'") for t in themes if isinstance(t, str)]
+
+def extract_themes_with_llm(trends, api_key: str, count: int, exclude=None, avoid=None, _depth: int = 0):
+    """Extract `count` distinct ASMR themes from one Groq call over shared trend context.
+    
+    The model answers with JSON ({"themes": [...]}); duplicates, themes already
+    in `exclude` and too-short themes are dropped, and `avoid` themes are named
+    in the prompt as ones to steer away from. If the answer does not
+    parse or comes up short, the missing themes are requested in two smaller
+    batches; a single theme falls back to extract_theme_with_llm.
+    """
+    exclude = {_normalize_theme(t) for t in (exclude or [])}
+    if count <= 0:
+        return []
+    if count == 1 or not api_key:
+        # Too small to batch (or no LLM): the single-theme path, then fallback themes
+        candidates = [extract_theme_with_llm(trends, api_key, avoid=avoid)] if api_key else []
+        candidates += [_fallback_theme_extraction(trends) for _ in range(count * 4)]
+        themes = []
+        for theme in candidates:
+            if _normalize_theme(theme) not in exclude:
+                exclude.add(_normalize_theme(theme))
+                themes.append(theme)
+            if len(themes) == count:
+                break
+        return themes
+    
+    rng = prompt_rng("themes", count, _depth, sorted(exclude), sorted(avoid or []),
+                     [item.get('video_id') or item.get('title') for item in trends[:THEME_SAMPLE_SIZE]])
+    context = _theme_context(trends[:THEME_SAMPLE_SIZE])
+    
+    prompt = (
+        f"You are an ASMR content strategist. Based on these trending ASMR videos, create {count} "
+        f"DISTINCT themes (6-14 words each) for {count} different videos. Vary the materials, sounds, "
+        f"visuals and settings so no two themes describe the same concept.\n\n"
+        f"Be highly creative, brand-safe, and peaceful. Use vivid sensory imagery.\n\n"
+        f"{context}\n\n"
+        f"{_avoid_block(set(avoid or []) | exclude)}"
+        f"Examples: 'cardboard crafting with satisfying crushing sounds', 'colorful kinetic sand cutting', "
+        f"'soft spoken unboxing with crinkling paper'\n\n"
+        f'Respond with JSON only: {{"themes": ["theme 1", "theme 2", ...]}} containing exactly {count} themes.'
+    )
+    
+    themes = []
+    try:
+        print(f"Calling Groq API for {count} themes...", flush=True)
+        started = datetime.datetime.now()
+        text = complete(
+            "llama-3.3-70b-versatile",
+            [
+                {"role": "system", "content": "You are a creative ASMR expert who creates unique, specific themes. Never repeat generic concepts."},
+                {"role": "user", "content": prompt}
+            ],
+            groq_chat(api_key),
+            max_tokens=60 + 40 * count,
+            temperature=0.95,
+            top_p=0.98,
+            response_format={"type": "json_object"},
+            seed=rng.randint(1, 1000000)
+        )
+        elapsed = (datetime.datetime.now() - started).total_seconds()
+        for theme in _parse_themes(text):
+            key = _normalize_theme(theme)
+            if len(theme.split()) >= 4 and key not in exclude:
+                exclude.add(key)
+                themes.append(theme)
+        print(f"Extracted {len(themes)}/{count} themes in {elapsed:.1f}s", flush=True)
+    except Exception as e:
+        print(f"Batched theme extraction failed ({e}), splitting the batch.", flush=True)
+    
+    themes = themes[:count]
+    missing = count - len(themes)
+    if missing > 0:
+        # Ask for the rest in two halves; each half sees everything accepted so far
+        first = max(1, missing // 2)
+        for part in (first, missing - first):
+            if part:
+                more = extract_themes_with_llm(trends, api_key, part, exclude=exclude, avoid=avoid,
+                                               _depth=_depth + 1)
+                exclude.update(_normalize_theme(t) for t in more)
+                themes.extend(more)
+    return themes
+
+def select_novel_themes(trends, api_key: str, count: int = 1, index=None,
+                        threshold: float = DEFAULT_NOVELTY_THRESHOLD, max_rounds: int = 3):
+    """Extract `count` themes that are not near-duplicates of past ones (or of each other).
+    
+    Candidates scoring >= threshold against the ThemeIndex are rejected and
+    regenerated with the rejects named in the prompt, for up to max_rounds.
+    If that still comes up short, the least similar rejects fill the gap.
+    """
+    if index is None or not threshold:
+        if count > 1:
+            return extract_themes_with_llm(trends, api_key, count)
+        return [extract_theme_with_llm(trends, api_key)]
+    
+    accepted = ThemeIndex(path=None)  # near-duplicates within this batch count too
+    themes, rejected = [], []
+    for _ in range(max_rounds):
+        missing = count - len(themes)
+        candidates = extract_themes_with_llm(trends, api_key, missing,
+                                             exclude=themes + [t for _, t in rejected],
+                                             avoid=[t for _, t in rejected])
+        for theme in candidates:
+            score, match = max(index.nearest(theme), accepted.nearest(theme), key=lambda r: r[0])
+            if score >= threshold:
+                print(f"Theme rejected ({score:.2f} similar to '{match['text']}'): {theme}", flush=True)
+                rejected.append((score, theme))
+            else:
+                accepted.add(theme)
+                themes.append(theme)
+        if len(themes) >= count:
+            break
+    
+    if len(themes) < count:
+        print(f"Only {len(themes)}/{count} novel themes found, using the least similar rejects", flush=True)
+        themes += [theme for _, theme in sorted(rejected)[:count - len(themes)]]
+    return themes[:count]
+
 def _fallback_theme_extraction(trends):
     """Generate random creative theme from trend titles."""
     import random
@@ -221,7 +461,7 @@ def _fallback_theme_extraction(trends):
     
     # Find trending keywords
     theme_scores = {}
-    for trend in trends[:20]:
+    for trend in trends[:THEME_SAMPLE_SIZE]:
         combined = f"{trend.get('title', '')} {trend.get('description', '')}".lower()
         for keyword, _ in variations:
             if keyword in combined:
@@ -239,10 +479,37 @@ def _fallback_theme_extraction(trends):
 
 def main():
     parser = argparse.ArgumentParser(description="Collect YouTube ASMR trends and extract theme")
-    parser.add_argument("--output-json", required=True, help="Path to write trends JSON")
+    parser.add_argument("--output-json", required=True,
+                        help="Path to write trends (NDJSON, one video per line, streamed as fetched)")
     parser.add_argument("--output-theme", help="Path to write extracted theme (optional)")
+    parser.add_argument("--theme-count", type=int, default=1,
+                        help="Extract this many distinct themes in one LLM call, one per line in --output-theme")
+    parser.add_argument("--theme-index", default=str(THEME_INDEX_PATH),
+                        help="Index of past themes used to reject near-duplicates")
+    parser.add_argument("--novelty-threshold", type=float, default=DEFAULT_NOVELTY_THRESHOLD,
+                        help=f"Reject themes at least this similar to a past one, 0 to disable "
+                             f"(default: {DEFAULT_NOVELTY_THRESHOLD})")
     parser.add_argument("--region", default="US", help="YouTube region code")
     parser.add_argument("--max", type=int, default=50, help="Number of videos to fetch")
+    parser.add_argument("--cache-dir", default=os.getenv("YOUTUBE_CACHE_DIR"),
+                        help="Cache YouTube API responses in this directory (optional)")
+    parser.add_argument("--cache-ttl", type=float, default=DEFAULT_TTL_SECONDS / 3600,
+                        help="Response cache TTL in hours (default: 6)")
+    parser.add_argument("--cache-max-mb", type=float, default=DEFAULT_MAX_BYTES / (1024 * 1024),
+                        help="Response cache size limit in MB (default: 50)")
+    parser.add_argument("--store-db", default=os.getenv("TREND_STORE_DB"),
+                        help="SQLite trend store; only new videos are fetched in full (optional)")
+    parser.add_argument("--stats-max-age", type=float, default=DEFAULT_STATS_MAX_AGE / 3600,
+                        help="Refresh stored statistics older than this many hours (default: 6)")
+    parser.add_argument("--output-delta", help="Path to write the trend store delta JSON (optional)")
+    parser.add_argument("--queries", nargs="+", help='Search query variants (default: "ASMR")')
+    parser.add_argument("--regions", nargs="+", help="Region codes to search (default: --region)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help=f"Concurrent search/detail requests (default: {DEFAULT_WORKERS})")
+    parser.add_argument("--qps", type=float, default=DEFAULT_QPS,
+                        help=f"Global YouTube API request rate limit (default: {DEFAULT_QPS})")
+    parser.add_argument("--no-quota", action="store_true",
+                        help="Do not meter calls against the daily quota ledger (output/quota_usage.json)")
     args = parser.parse_args()
 
     youtube_api_key = os.getenv("YOUTUBE_API_KEY")
@@ -250,20 +517,39 @@ def main():
         print("ERROR: YOUTUBE_API_KEY not set")
         sys.exit(1)
 
-    # Fetch trends
+    cache = None
+    if args.cache_dir:
+        cache = get_response_cache(args.cache_dir, ttl_seconds=args.cache_ttl * 3600,
+                                   max_bytes=int(args.cache_max_mb * 1024 * 1024))
+
+    store = TrendStore(args.store_db) if args.store_db else None
+
+    # Fetch trends, streaming each record to disk as its detail batch arrives
     print("Fetching ASMR trending videos...")
-    data = collect_trends_with_metadata(youtube_api_key, region=args.region, max_results=args.max)
+    records = iter_trends_with_metadata(youtube_api_key, region=args.region, max_results=args.max, cache=cache,
+                                        store=store, stats_max_age=args.stats_max_age * 3600,
+                                        queries=args.queries, regions=args.regions,
+                                        workers=args.workers, rate_limiter=RateLimiter(args.qps),
+                                        quota=None if args.no_quota else get_quota_scheduler())
 
-    if not data:
+    # Theme extraction only looks at the first 20 trends, so only those are kept in memory
+    head = []
+    with TrendWriter(args.output_json) as writer:
+        for record in records:
+            writer.write(record)
+            if len(head) < THEME_SAMPLE_SIZE:
+                head.append(record)
+
+    if args.output_delta and store is not None and store.last_delta is not None:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output_delta)), exist_ok=True)
+        with open(args.output_delta, "w", encoding="utf-8") as f:
+            json.dump(store.last_delta, f, indent=2)
+
+    if not writer.count:
         print("ERROR: No ASMR videos found")
         sys.exit(1)
-
-    # Save trends
-    os.makedirs(os.path.dirname(os.path.abspath(args.output_json)), exist_ok=True)
-    with open(args.output_json, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
     
-    print(f"SUCCESS: Saved {len(data)} videos to {args.output_json}")
+    print(f"SUCCESS: Saved {writer.count} videos to {args.output_json}")
     
     # Extract theme
     if args.output_theme:
@@ -272,15 +558,18 @@ def main():
         if not groq_api_key:
             print("WARNING: GROQ_API_KEY not set")
         
-        print("\nExtracting theme...")
-        theme = extract_theme_with_llm(data, groq_api_key)
+        index = get_theme_index(args.theme_index) if args.novelty_threshold else None
+        print(f"\nExtracting {args.theme_count} theme(s)...")
+        themes = select_novel_themes(head, groq_api_key, args.theme_count, index=index,
+                                     threshold=args.novelty_threshold)
         
         os.makedirs(os.path.dirname(os.path.abspath(args.output_theme)), exist_ok=True)
         with open(args.output_theme, "w", encoding="utf-8") as f:
-            f.write(theme)
+            f.write("\n".join(themes))
         
-        print(f"SUCCESS: Saved theme to {args.output_theme}")
-        print(f"Theme: {theme}")
+        print(f"SUCCESS: Saved {len(themes)} theme(s) to {args.output_theme}")
+        for theme in themes:
+            print(f"Theme: {theme}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
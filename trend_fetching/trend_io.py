@@ -0,0 +1,130 @@
+"""
+Streaming trend files (NDJSON, one trend record per line).
+
+trend_fetch.py appends each record as soon as its detail batch arrives and
+flushes it, then drops a "<file>.done" marker when the fetch is over.
+Consumers read lazily and stop after the records they need, so memory stays
+flat. With follow=True a reader tails a file that is still being written, so
+later stages can start before the fetch finishes. Legacy trends.json files
+(one JSON array) are still readable.
+
+Usage:
+    with TrendWriter("output/run/trends.jsonl") as writer:
+        for record in records:
+            writer.write(record)
+
+    top = read_trends("output/run/trends.jsonl", limit=10)
+    for record in iter_trends("output/run/trends.jsonl", follow=True):
+        ...
+"""
+
+import os
+import json
+import time
+from itertools import islice
+
+DONE_SUFFIX = ".done"
+FOLLOW_POLL_SECONDS = 0.5
+FOLLOW_TIMEOUT_SECONDS = 900
+
+
+def done_marker(path) -> str:
+    """Path of the marker file that says `path` is complete."""
+    return f"{path}{DONE_SUFFIX}"
+
+
+class TrendWriter:
+    """Append-only NDJSON writer; every record is flushed so followers see it immediately."""
+
+    def __init__(self, path):
+        self.path = str(path)
+        self.count = 0
+        self._file = None
+
+    def __enter__(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        if os.path.exists(done_marker(self.path)):
+            os.remove(done_marker(self.path))
+        self._file = open(self.path, "w", encoding="utf-8")
+        return self
+
+    def write(self, record: dict):
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+        self.count += 1
+
+    def __exit__(self, exc_type, exc, tb):
+        self._file.close()
+        # Written even on failure, so followers stop waiting instead of timing out
+        with open(done_marker(self.path), "w", encoding="utf-8") as f:
+            f.write(str(self.count))
+        return False
+
+
+def write_trends_ndjson(path, records) -> int:
+    """Write an iterable of trend records to `path`; returns the number written."""
+    with TrendWriter(path) as writer:
+        for record in records:
+            writer.write(record)
+    return writer.count
+
+
+def _is_json_array(f) -> bool:
+    """True for a legacy whole-list trends.json file (peeks without consuming)."""
+    position = f.tell()
+    head = f.read(64).lstrip()
+    f.seek(position)
+    return head.startswith("[")
+
+
+def iter_trends(path, follow: bool = False, poll_interval: float = FOLLOW_POLL_SECONDS,
+                timeout: float = FOLLOW_TIMEOUT_SECONDS):
+    """Yield trend records from an NDJSON (or legacy JSON array) file.
+
+    With follow=True, keep reading until the writer's .done marker appears,
+    waiting for the file to be created if needed. Raises TimeoutError if the
+    writer makes no progress for `timeout` seconds.
+    """
+    path = str(path)
+    deadline = time.monotonic() + timeout
+    while follow and not os.path.exists(path):
+        if os.path.exists(done_marker(path)):
+            return  # writer gave up before producing anything
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"Trends file never appeared: {path}")
+        time.sleep(poll_interval)
+
+    with open(path, "r", encoding="utf-8") as f:
+        if _is_json_array(f):
+            yield from json.load(f)
+            return
+
+        pending = ""
+        while True:
+            line = f.readline()
+            if line:
+                pending += line
+                if not pending.endswith("\n"):
+                    continue  # writer is mid-line; wait for the rest
+                if pending.strip():
+                    yield json.loads(pending)
+                pending = ""
+                deadline = time.monotonic() + timeout
+                continue
+
+            if not follow:
+                if pending.strip():
+                    yield json.loads(pending)
+                return
+            if os.path.exists(done_marker(path)):
+                # Drain anything written between the last read and the marker
+                follow = False
+                continue
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"No new trends in {path} for {timeout:.0f}s")
+            time.sleep(poll_interval)
+
+
+def read_trends(path, limit: int = None, follow: bool = False) -> list:
+    """The first `limit` records (all if None); only those lines are read and parsed."""
+    return list(islice(iter_trends(path, follow=follow), limit))
@@ -0,0 +1,170 @@
+"""
+Incremental trend store backed by SQLite.
+
+Keeps every fetched video (snippet + statistics) keyed by video_id so each run
+only downloads details for IDs it has not seen, refreshes statistics that are
+older than a threshold, and prunes videos that fell out of the trend window.
+
+Usage:
+    store = TrendStore("output/trends.db")
+    videos, delta = store.sync(video_ids, fetch_fn, stats_max_age=6 * 3600)
+    # delta == {"new": [...], "refreshed": [...], "cached": 42, "pruned": 3}
+"""
+
+import json
+import time
+import sqlite3
+import datetime
+import threading
+from pathlib import Path
+
+DEFAULT_STATS_MAX_AGE = 6 * 3600
+DEFAULT_WINDOW_DAYS = 7
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS videos (
+    video_id         TEXT PRIMARY KEY,
+    snippet          TEXT NOT NULL,
+    statistics       TEXT NOT NULL,
+    published_at     TEXT,
+    first_seen_at    REAL NOT NULL,
+    stats_updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_videos_published_at ON videos (published_at);
+CREATE INDEX IF NOT EXISTS idx_videos_stats_updated_at ON videos (stats_updated_at);
+"""
+
+# SQLite limits the number of bound parameters per statement
+_MAX_PARAMS = 500
+
+
+def _chunks(items, size=_MAX_PARAMS):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+class TrendStore:
+    """Local index of fetched videos keyed by video_id."""
+
+    def __init__(self, db_path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.last_delta = None
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), timeout=30, check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _known(self, video_ids, where: str = "", params: tuple = ()) -> set:
+        found = set()
+        with self._lock:
+            for chunk in _chunks(list(video_ids)):
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT video_id FROM videos WHERE video_id IN ({placeholders}) {where}",
+                    (*chunk, *params)
+                ).fetchall()
+                found.update(row[0] for row in rows)
+        return found
+
+    def missing_ids(self, video_ids) -> list:
+        """IDs not stored yet, in input order."""
+        known = self._known(video_ids)
+        return [vid for vid in video_ids if vid not in known]
+
+    def stale_ids(self, video_ids, max_age_seconds: float) -> list:
+        """Stored IDs whose statistics are older than max_age_seconds, in input order."""
+        stale = self._known(video_ids, "AND stats_updated_at < ?", (time.time() - max_age_seconds,))
+        return [vid for vid in video_ids if vid in stale]
+
+    def upsert_videos(self, items):
+        """Insert or replace full videos.list items (snippet + statistics)."""
+        now = time.time()
+        rows = [
+            (
+                item["id"],
+                json.dumps(item.get("snippet", {}), ensure_ascii=False),
+                json.dumps(item.get("statistics", {})),
+                item.get("snippet", {}).get("publishedAt"),
+                now,
+                now,
+            )
+            for item in items if item.get("id")
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO videos (video_id, snippet, statistics, published_at, first_seen_at, stats_updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(video_id) DO UPDATE SET snippet = excluded.snippet, "
+                "statistics = excluded.statistics, published_at = excluded.published_at, "
+                "stats_updated_at = excluded.stats_updated_at",
+                rows
+            )
+            self._conn.commit()
+
+    def update_statistics(self, items):
+        """Refresh statistics only (videos.list part=statistics items)."""
+        now = time.time()
+        rows = [(json.dumps(item.get("statistics", {})), now, item["id"]) for item in items if item.get("id")]
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE videos SET statistics = ?, stats_updated_at = ? WHERE video_id = ?", rows
+            )
+            self._conn.commit()
+
+    def prune(self, window_days: float = DEFAULT_WINDOW_DAYS) -> int:
+        """Delete videos published before the trend window; returns the number removed."""
+        # Same midnight-UTC floor as the search window, so fresh results are never pruned
+        cutoff = (datetime.datetime.now(datetime.timezone.utc) -
+                  datetime.timedelta(days=window_days)).strftime('%Y-%m-%dT00:00:00Z')
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM videos WHERE published_at < ?", (cutoff,))
+            self._conn.commit()
+            return cursor.rowcount
+
+    def get_videos(self, video_ids) -> list:
+        """Stored videos as videos.list-shaped items, in input order."""
+        by_id = {}
+        with self._lock:
+            for chunk in _chunks(list(video_ids)):
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT video_id, snippet, statistics FROM videos WHERE video_id IN ({placeholders})",
+                    chunk
+                ).fetchall()
+                for video_id, snippet, statistics in rows:
+                    by_id[video_id] = {
+                        "id": video_id,
+                        "snippet": json.loads(snippet),
+                        "statistics": json.loads(statistics),
+                    }
+        return [by_id[vid] for vid in video_ids if vid in by_id]
+
+    def sync(self, video_ids, fetch_fn, stats_max_age: float = DEFAULT_STATS_MAX_AGE,
+             window_days: float = DEFAULT_WINDOW_DAYS):
+        """Bring the given IDs up to date and return (videos, delta).
+
+        fetch_fn(ids, part) must return videos.list items; it is called with
+        part="snippet,statistics" for new IDs and part="statistics" for stale ones.
+        """
+        video_ids = list(dict.fromkeys(video_ids))
+        new_ids = self.missing_ids(video_ids)
+        stale = self.stale_ids(video_ids, stats_max_age)
+
+        if new_ids:
+            self.upsert_videos(fetch_fn(new_ids, "snippet,statistics"))
+        if stale:
+            self.update_statistics(fetch_fn(stale, "statistics"))
+        pruned = self.prune(window_days)
+
+        self.last_delta = {
+            "new": new_ids,
+            "refreshed": stale,
+            "cached": len(video_ids) - len(new_ids) - len(stale),
+            "pruned": pruned,
+        }
+        return self.get_videos(video_ids), self.last_delta
@@ -0,0 +1,140 @@
+"""
+Fake Veo service - Bliss Builder
+
+In-process stand-in for the parts of genai.Client that Veo generation uses
+(aio.models.generate_videos, aio.operations.get, operations.get,
+models.generate_videos, files.download). Operations finish after a random
+simulated render time and can be made to fail, so the async polling loop can
+be exercised offline without spending Veo quota.
+
+`render_seconds`, a function of the prompt, replaces the random render time
+when a test needs operations to finish in a known order.
+
+Usage:
+    from video_generation.fake_veo import FakeVeoClient
+    client = FakeVeoClient(min_seconds=3, max_seconds=12, failure_rate=0.1)
+    client = FakeVeoClient(render_seconds=lambda prompt: 0.5)
+"""
+
+import time
+import random
+import hashlib
+import threading
+
+
+class _FakeVideo:
+    def __init__(self, prompt: str):
+        self.uri = None
+        self.mime_type = "video/mp4"
+        self.video_bytes = None
+        self._prompt = prompt
+
+    def save(self, path: str):
+        digest = hashlib.sha256(self._prompt.encode("utf-8")).hexdigest()
+        with open(path, "wb") as f:
+            f.write(f"FAKE-VEO-VIDEO {digest}\n".encode("ascii"))
+
+
+class _FakeGeneratedVideo:
+    def __init__(self, prompt: str):
+        self.video = _FakeVideo(prompt)
+
+
+class _FakeResponse:
+    def __init__(self, prompt: str):
+        self.generated_videos = [_FakeGeneratedVideo(prompt)]
+
+
+class _FakeOperation:
+    def __init__(self, name: str, done: bool = False, error=None, response=None):
+        self.name = name
+        self.done = done
+        self.error = error
+        self.response = response
+
+
+class FakeVeoService:
+    """Operation store shared by the sync and async fake client surfaces."""
+
+    def __init__(self, min_seconds: float = 3.0, max_seconds: float = 12.0,
+                 failure_rate: float = 0.0, seed: int = None, render_seconds=None):
+        self.min_seconds = min_seconds
+        self.max_seconds = max_seconds
+        self.failure_rate = failure_rate
+        self.render_seconds = render_seconds
+        self._random = random.Random(seed)
+        self._operations = {}
+        self._lock = threading.Lock()
+
+    def submit(self, prompt: str) -> _FakeOperation:
+        with self._lock:
+            name = f"operations/fake-{len(self._operations) + 1:05d}"
+            if self.render_seconds is not None:
+                seconds = self.render_seconds(prompt)
+            else:
+                seconds = self._random.uniform(self.min_seconds, self.max_seconds)
+            self._operations[name] = {
+                "prompt": prompt,
+                "ready_at": time.time() + seconds,
+                "fails": self._random.random() < self.failure_rate,
+            }
+        return _FakeOperation(name)
+
+    def get(self, operation) -> _FakeOperation:
+        name = operation if isinstance(operation, str) else operation.name
+        with self._lock:
+            state = self._operations[name]
+        if time.time() < state["ready_at"]:
+            return _FakeOperation(name)
+        if state["fails"]:
+            return _FakeOperation(name, done=True, error={"code": 13, "message": "Simulated render failure"})
+        return _FakeOperation(name, done=True, response=_FakeResponse(state["prompt"]))
+
+
+class _Models:
+    def __init__(self, service):
+        self._service = service
+
+    def generate_videos(self, *, model: str, prompt: str = None, config=None, **kwargs):
+        return self._service.submit(prompt or "")
+
+
+class _Operations:
+    def __init__(self, service):
+        self._service = service
+
+    def get(self, operation, **kwargs):
+        return self._service.get(operation)
+
+
+class _AsyncModels(_Models):
+    async def generate_videos(self, *, model: str, prompt: str = None, config=None, **kwargs):
+        return self._service.submit(prompt or "")
+
+
+class _AsyncOperations(_Operations):
+    async def get(self, operation, **kwargs):
+        return self._service.get(operation)
+
+
+class _Files:
+    def download(self, *, file=None, **kwargs):
+        return None
+
+
+class _Aio:
+    def __init__(self, service):
+        self.models = _AsyncModels(service)
+        self.operations = _AsyncOperations(service)
+
+
+class FakeVeoClient:
+    """Drop-in replacement for genai.Client in Veo generation code paths."""
+
+    def __init__(self, min_seconds: float = 3.0, max_seconds: float = 12.0,
+                 failure_rate: float = 0.0, seed: int = None, render_seconds=None):
+        self.service = FakeVeoService(min_seconds, max_seconds, failure_rate, seed, render_seconds)
+        self.models = _Models(self.service)
+        self.operations = _Operations(self.service)
+        self.files = _Files()
+        self.aio = _Aio(self.service)
@@ -0,0 +1,122 @@
+"""
+Multi-process frame rendering with shared-memory frame slots.
+
+A renderer is any picklable object with a frame(index) method returning an
+HxWx3 uint8 array, such as procedural.LoopScene. Each worker process gets a
+copy of the renderer once. The parent owns a fixed ring of shared-memory
+slots, one frame each. A task names a frame index and a free slot; the worker
+renders into that slot and reports back its index only, so pixels never go
+through pickling. The parent writes finished frames to the encoder strictly
+in index order, straight from the slot's buffer, and then reuses the slot.
+The slot count bounds how far rendering can run ahead of the encoder and how
+much memory is in flight.
+
+Usage:
+    scene = LoopScene(theme)
+    with FrameWriter(path, scene.low, fps=24, output_size=(1080, 1920)) as writer:
+        render_parallel(scene, scene.frame_count, (scene.low[1], scene.low[0], 3), writer.write)
+"""
+
+import os
+import queue
+import multiprocessing
+from multiprocessing import shared_memory
+
+import numpy as np
+
+_POLL_SECONDS = 1.0
+
+
+def default_workers() -> int:
+    """Worker processes to use: one per core, leaving one for the encoder on bigger boxes."""
+    cores = os.cpu_count() or 1
+    return cores - 1 if cores > 2 else cores
+
+
+def _frame_view(block, shape, writeable: bool = True) -> np.ndarray:
+    view = np.ndarray(shape, dtype=np.uint8, buffer=block.buf)
+    view.flags.writeable = writeable
+    return view
+
+
+def _worker(renderer, shape, slot_names, tasks, done):
+    slots = [shared_memory.SharedMemory(name=name) for name in slot_names]
+    views = [_frame_view(slot, shape) for slot in slots]
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            index, slot = task
+            try:
+                views[slot][...] = renderer.frame(index)
+                done.put((index, slot, None))
+            except Exception as e:
+                done.put((index, slot, f"{type(e).__name__}: {e}"))
+    finally:
+        del views
+        for slot in slots:
+            slot.close()
+
+
+def render_parallel(renderer, frame_count: int, shape, write, workers: int = None, slots: int = None):
+    """Render frames 0..frame_count-1 across processes and call write(frame) for each, in order.
+
+    write() receives a read-only view of the shared slot, valid only until it
+    returns (FrameWriter.write copies it into the ffmpeg pipe).
+    """
+    workers = max(1, workers or default_workers())
+    slot_count = max(2, slots or 2 * workers)
+    shape = tuple(shape)
+    frame_bytes = int(np.prod(shape))
+
+    ctx = multiprocessing.get_context()
+    tasks, done = ctx.Queue(), ctx.Queue()
+    blocks, views, processes = [], [], []
+    try:
+        for _ in range(slot_count):
+            blocks.append(shared_memory.SharedMemory(create=True, size=frame_bytes))
+            views.append(_frame_view(blocks[-1], shape, writeable=False))
+        for _ in range(workers):
+            process = ctx.Process(target=_worker, args=(renderer, shape, [b.name for b in blocks], tasks, done),
+                                  daemon=True)
+            process.start()
+            processes.append(process)
+
+        next_task = 0
+        for slot in range(min(slot_count, frame_count)):
+            tasks.put((next_task, slot))
+            next_task += 1
+
+        ready = {}   # frame index -> slot, finished but not yet written
+        next_write = 0
+        while next_write < frame_count:
+            try:
+                index, slot, error = done.get(timeout=_POLL_SECONDS)
+            except queue.Empty:
+                dead = [p for p in processes if not p.is_alive()]
+                if dead:
+                    raise RuntimeError(f"Frame worker exited with code {dead[0].exitcode}")
+                continue
+            if error:
+                raise RuntimeError(f"Frame {index} failed: {error}")
+            ready[index] = slot
+
+            while next_write in ready:
+                slot = ready.pop(next_write)
+                write(views[slot])
+                next_write += 1
+                if next_task < frame_count:
+                    tasks.put((next_task, slot))
+                    next_task += 1
+    finally:
+        for _ in processes:
+            tasks.put(None)
+        for process in processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        del views
+        for block in blocks:
+            block.close()
+            block.unlink()
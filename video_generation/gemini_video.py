@@ -1,43 +1,69 @@
 import os
 import sys
-import json
 import argparse
 import dotenv
 import time
+from pathlib import Path
 from google import genai
 from google.genai import types
 from groq import Groq
 
-from PIL import Image, ImageDraw, ImageFont
-from moviepy import ImageClip, concatenate_videoclips
+from PIL import Image
+
+# Add parent directory to path for imports
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from trend_fetching.trend_io import read_trends
+from trend_fetching.theme_index import DEFAULT_THRESHOLD as DEFAULT_NOVELTY_THRESHOLD, get_theme_index
+from llm_api.calls import complete, gemini_generate, prompt_rng
+from video_generation.model_registry import get_model_registry
+from video_generation.slide_encoder import DEFAULT_CRF, DEFAULT_PRESET, encode_slides
+from video_generation.text_layout import draw_line, resolve_font, wrap_text
+from video_generation.procedural import render_procedural_video
+from video_generation.veo_download import save_generated_video
+from video_generation.video_probe import probe_video
 
 dotenv.load_dotenv()
 
+# generate_veo3_prompt_with_gemini only looks at the top trends
+PROMPT_TREND_COUNT = 10
+PROMPT_NOVELTY_ATTEMPTS = 3
+
+VEO_MODEL = "veo-3.1-generate-preview"
+VEO_TIMEOUT_SECONDS = 600
+# Tried in order until one is accepted; the registry remembers which one worked
+VEO_CONFIGS = (
+    {"aspect_ratio": "9:16", "resolution": "1080p"},
+    {"aspect_ratio": "9:16", "resolution": "720p"},
+)
+
 def _fail(msg: str):
     """Print error and exit."""
     print(f"ERROR: {msg}", file=sys.stderr, flush=True)
     sys.exit(1)
 
-def generate_veo3_prompt_with_gemini(theme: str, trends: list, api_key: str):
-    """Use Gemini AI to generate a COMPLETE, CREATIVE Veo 3 prompt for 8-second looping PORTRAIT ASMR video."""
+def generate_veo3_prompt_with_gemini(theme: str, trends: list, api_key: str, variant: int = 0):
+    """Use Gemini AI to generate a COMPLETE, CREATIVE Veo 3 prompt for 8-second looping PORTRAIT ASMR video.
+    
+    A different `variant` picks different creative directions for the same inputs.
+    """
     if not api_key:
         print("Warning: No GEMINI_API_KEY, using fallback prompt generation.", flush=True)
         return _fallback_veo3_prompt(theme)
     
     try:
-        import random
-        
-        client = genai.Client(api_key=api_key)
-        
         # Extract context from trending videos
         context_keywords = []
-        for item in trends[:10]:
+        for item in trends[:PROMPT_TREND_COUNT]:
             context_keywords.extend(item.get("keywords", [])[:3])
             context_keywords.extend(item.get("hashtags", [])[:2])
         
         unique_keywords = list(dict.fromkeys(context_keywords))[:10]
         keywords_str = ", ".join(unique_keywords)
         
+        # Fresh choices per run; a retry of the same run (BLISS_PROMPT_SEED) reuses the cached prompt
+        rng = prompt_rng("veo3_prompt", theme, unique_keywords, variant)
+        
         # Random creative directions
         visual_styles = ["macro close-up photography", "slow-motion cinematic", "smooth dolly shot", 
                         "orbital camera movement", "first-person POV perspective", "top-down bird's eye view"]
@@ -46,9 +72,9 @@ def generate_veo3_prompt_with_gemini(theme: str, trends: list, api_key: str):
         motion_types = ["360-degree slow rotation", "gentle oscillating zoom in and out",
                        "smooth circular orbit around subject", "rhythmic pulsing expansion and contraction"]
         
-        chosen_visual = random.choice(visual_styles)
-        chosen_palette = random.choice(color_palettes)
-        chosen_motion = random.choice(motion_types)
+        chosen_visual = rng.choice(visual_styles)
+        chosen_palette = rng.choice(color_palettes)
+        chosen_motion = rng.choice(motion_types)
         
         prompt = (
             f"You are a creative video director specializing in ASMR content for YouTube Shorts. "
@@ -76,12 +102,12 @@ def generate_veo3_prompt_with_gemini(theme: str, trends: list, api_key: str):
         
         print("Generating Veo 3 prompt with Gemini...", flush=True)
         
-        model = client.models.generate_content(
-            model="gemini-2.0-flash-exp",
-            contents=prompt
+        veo3_prompt = complete(
+            "gemini-2.0-flash-exp",
+            [{"role": "user", "content": prompt}],
+            gemini_generate(api_key)
         )
-        
-        veo3_prompt = model.text.strip()
+        veo3_prompt = (veo3_prompt or "").strip()
         
         if veo3_prompt and len(veo3_prompt) > 100:
             return veo3_prompt
@@ -111,8 +137,57 @@ def _fallback_veo3_prompt(theme: str):
         f"Seamless loop optimized for YouTube Shorts."
     )
 
-def generate_video_with_veo3(veo3_prompt: str, api_key: str, duration: int = 8, output_path: str = "temp_veo3_video.mp4"):
-    """Use Google Veo 3 API to generate SEAMLESS LOOPING PORTRAIT video."""
+def poll_intervals(initial: float = 5.0, factor: float = 1.5, maximum: float = 30.0):
+    """Yield Veo operation poll intervals: short at first, backing off to `maximum` with jitter."""
+    import random
+    
+    interval = initial
+    while True:
+        yield interval * random.uniform(0.9, 1.1)
+        interval = min(interval * factor, maximum)
+
+def build_veo3_request(veo3_prompt: str, duration: int = 8, aspect_ratio: str = "9:16",
+                       resolution: str = "1080p") -> dict:
+    """Build the generate_videos() arguments (model, enhanced prompt, portrait config)."""
+    # Enhanced prompt
+    enhanced_prompt = (
+        f"{veo3_prompt}\n\n"
+        f"CREATIVE REQUIREMENTS:\n"
+        f"- VERTICAL 9:16 PORTRAIT FORMAT (1080x1920) REQUIRED for YouTube Shorts\n"
+        f"- Camera MUST complete full cycle and return to EXACT starting position in {duration}s\n"
+        f"- Use CIRCULAR or OSCILLATING motion (orbit, zoom cycle, rotation)\n"
+        f"- NO LINEAR MOTION, NO CUTS\n"
+        f"- Seamless loop - last frame matches first frame\n"
+        f"- Smooth, meditative pacing\n"
+        f"- Crystal clear, sharp details\n"
+        f"- Professional cinematography quality\n"
+        f"- Generate synchronized ASMR audio"
+    )
+
+    # Negative prompt to avoid unwanted content
+    negative_prompt = (
+        "text overlays, watermarks, logos, people, faces, hands, "
+        "urban scenes, cars, buildings, technology, screens, "
+        "violent content, disturbing imagery, low quality, blurry, "
+        "jerky motion, abrupt cuts, linear camera movement"
+    )
+    
+    return {
+        "model": VEO_MODEL,
+        "prompt": enhanced_prompt,
+        "config": types.GenerateVideosConfig(
+            aspect_ratio=aspect_ratio,
+            resolution=resolution,
+            negative_prompt=negative_prompt,
+        ),
+    }
+
+def generate_video_with_veo3(veo3_prompt: str, api_key: str, duration: int = 8, output_path: str = "temp_veo3_video.mp4",
+                             cancel_event=None, timeout: float = VEO_TIMEOUT_SECONDS):
+    """Use Google Veo 3 API to generate SEAMLESS LOOPING PORTRAIT video.
+    
+    Setting `cancel_event` (a threading.Event) stops polling and returns None.
+    """
     if not api_key:
         print("WARNING: No GEMINI_API_KEY, cannot use Veo 3.", flush=True)
         return None
@@ -121,127 +196,96 @@ def generate_video_with_veo3(veo3_prompt: str, api_key: str, duration: int = 8,
         print(f"Initializing Veo 3 client...", flush=True)
         client = genai.Client(api_key=api_key)
         
-        # CHECK 1: List available models
-        print("Checking available models...", flush=True)
-        try:
-            all_models = list(client.models.list())
-            model_names = [m.name for m in all_models]
-            print(f"Total models available: {len(model_names)}", flush=True)
-            
-            veo_models = [m for m in model_names if 'veo' in m.lower()]
-            if veo_models:
-                print(f"VEO 3 FOUND: {veo_models}", flush=True)
-            else:
-                print("ERROR: No Veo models found!", flush=True)
-                print("Your API key doesn't have Veo 3 access", flush=True)
-                print("Request access at: https://aistudio.google.com/", flush=True)
-                return None
-        except Exception as e:
-            print(f"ERROR: Cannot list models: {e}", flush=True)
+        # CHECK 1: Model availability (cached; known quota/permission failures skip Veo)
+        registry = get_model_registry()
+        usable, reason = registry.check(api_key, VEO_MODEL)
+        if not usable:
+            print(f"Skipping Veo 3: {reason}", flush=True)
             return None
         
-        # Enhanced prompt
-        enhanced_prompt = (
-            f"{veo3_prompt}\n\n"
-            f"CREATIVE REQUIREMENTS:\n"
-            f"- VERTICAL 9:16 PORTRAIT FORMAT (1080x1920) REQUIRED for YouTube Shorts\n"
-            f"- Camera MUST complete full cycle and return to EXACT starting position in {duration}s\n"
-            f"- Use CIRCULAR or OSCILLATING motion (orbit, zoom cycle, rotation)\n"
-            f"- NO LINEAR MOTION, NO CUTS\n"
-            f"- Seamless loop - last frame matches first frame\n"
-            f"- Smooth, meditative pacing\n"
-            f"- Crystal clear, sharp details\n"
-            f"- Professional cinematography quality\n"
-            f"- Generate synchronized ASMR audio"
-        )
-        
-        # Negative prompt to avoid unwanted content
-        negative_prompt = (
-            "text overlays, watermarks, logos, people, faces, hands, "
-            "urban scenes, cars, buildings, technology, screens, "
-            "violent content, disturbing imagery, low quality, blurry, "
-            "jerky motion, abrupt cuts, linear camera movement"
-        )
-        
-        print(f"Attempting Veo 3 generation in 9:16 portrait...", flush=True)
-        print(f"Target: 1080x1920, {duration}s duration", flush=True)
+        preferred = registry.preferred_config(api_key, VEO_MODEL)
+        configs = [c for c in VEO_CONFIGS if c != preferred and not registry.failed_config(api_key, VEO_MODEL, c)]
+        if preferred:
+            configs.insert(0, preferred)
         
-        try:
-            # Use proper GenerateVideosConfig
-            operation = client.models.generate_videos(
-                model="veo-3.1-generate-preview",
-                prompt=enhanced_prompt,
-                config=types.GenerateVideosConfig(
-                    aspect_ratio="9:16",
-                    resolution="1080p",
-                    negative_prompt=negative_prompt,
-                ),
-            )
+        operation = None
+        for config in configs or list(VEO_CONFIGS):
+            request_args = build_veo3_request(veo3_prompt, duration, **config)
             
-            print(f"Operation started: {operation.name}", flush=True)
-            print(f"Config: 9:16 portrait, 1080p, {duration}s with negative prompt", flush=True)
-            
-        except Exception as e:
-            print(f"ERROR: Veo 3 generation failed: {e}", flush=True)
-            
-            if "403" in str(e) or "permission" in str(e).lower():
-                print("REASON: API key lacks Veo 3 permissions", flush=True)
-            elif "404" in str(e):
-                print("REASON: Veo 3 model not found", flush=True)
-            elif "quota" in str(e).lower():
-                print("REASON: API quota exceeded", flush=True)
-            else:
-                print("FALLING BACK to text-based video", flush=True)
+            print(f"Attempting Veo 3 generation in {config['aspect_ratio']} at {config['resolution']}...", flush=True)
             
+            try:
+                operation = client.models.generate_videos(**request_args)
+                
+                print(f"Operation started: {operation.name}", flush=True)
+                print(f"Config: {config['aspect_ratio']}, {config['resolution']}, {duration}s with negative prompt", flush=True)
+                break
+                
+            except Exception as e:
+                print(f"ERROR: Veo 3 generation failed: {e}", flush=True)
+                
+                failure = registry.record_failure(api_key, VEO_MODEL, e, config)
+                if failure == "permission":
+                    print("REASON: API key lacks Veo 3 permissions", flush=True)
+                elif failure == "not_found":
+                    print("REASON: Veo 3 model not found", flush=True)
+                elif failure == "quota":
+                    print("REASON: API quota exceeded", flush=True)
+                elif failure == "rate_limit":
+                    print("REASON: Rate limited, Veo will be retried in a few minutes", flush=True)
+                elif failure == "invalid_config":
+                    print("REASON: Config rejected, trying the next one", flush=True)
+                    continue
+                else:
+                    print("FALLING BACK to text-based video", flush=True)
+                
+                return None
+        
+        if operation is None:
+            print("FALLING BACK to text-based video (no accepted config)", flush=True)
             return None
         
-        # Poll for completion
-        poll_count = 0
-        while not operation.done and poll_count < 60:
-            poll_count += 1
-            print(f"[{poll_count * 10}s] Polling... ({poll_count}/60)", flush=True)
-            time.sleep(10)
+        # Poll for completion with adaptive backoff
+        started = time.time()
+        intervals = poll_intervals()
+        while not operation.done and time.time() - started < timeout:
+            wait = next(intervals)
+            print(f"[{int(time.time() - started)}s] Polling... (next check in {wait:.0f}s)", flush=True)
+            if cancel_event is not None:
+                if cancel_event.wait(wait):
+                    print("Veo 3 generation cancelled", flush=True)
+                    return None
+            else:
+                time.sleep(wait)
             operation = client.operations.get(operation)
         
         if not operation.done:
-            print("ERROR: Timeout (10 minutes)", flush=True)
+            print(f"ERROR: Timeout ({timeout / 60:.0f} minutes)", flush=True)
             return None
         
         # Download video
         print("Video generation complete! Downloading...", flush=True)
         generated_video = operation.response.generated_videos[0]
-        client.files.download(file=generated_video.video)
-        generated_video.video.save(output_path)
+        save_generated_video(client, generated_video.video, output_path, api_key)
+        registry.record_success(api_key, VEO_MODEL, config)
         
-        # Verify video quality
+        # Verify video quality (probe is saved next to the video for upload validation)
         try:
-            import cv2
-            cap = cv2.VideoCapture(output_path)
-            width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-            height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-            fps = cap.get(cv2.CAP_PROP_FPS)
-            frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            probe = probe_video(output_path, motion=True)
             
-            ret, frame = cap.read()
-            if ret:
-                ret2, frame2 = cap.read()
-                has_motion = ret2 and not (frame == frame2).all()
-                cap.release()
-                
-                print(f"\nVIDEO QUALITY CHECK:")
-                print(f"  Resolution: {width}x{height}")
-                print(f"  FPS: {fps}")
-                print(f"  Frames: {frame_count}")
-                print(f"  Has motion: {'YES (Real video)' if has_motion else 'NO (Static/Text slides)'}")
-                
-                if not has_motion:
-                    print("  WARNING: This appears to be static frames, not Veo 3 video!")
-                elif height <= width:
-                    print(f"  WARNING: Not portrait! ({width}x{height})")
-                else:
-                    print("  SUCCESS: High-quality Veo 3 video confirmed!")
+            print(f"\nVIDEO QUALITY CHECK:")
+            print(f"  Resolution: {probe.width}x{probe.height}")
+            print(f"  FPS: {probe.fps}")
+            print(f"  Frames: {probe.frame_count}")
+            if probe.has_motion is not None:
+                print(f"  Has motion: {'YES (Real video)' if probe.has_motion else 'NO (Static/Text slides)'}")
+            
+            if probe.has_motion is False:
+                print("  WARNING: This appears to be static frames, not Veo 3 video!")
+            elif probe.height and probe.width and probe.height <= probe.width:
+                print(f"  WARNING: Not portrait! ({probe.width}x{probe.height})")
             else:
-                cap.release()
+                print("  SUCCESS: High-quality Veo 3 video confirmed!")
         except Exception as e:
             print(f"Could not verify properties: {e}")
         
@@ -258,75 +302,93 @@ def render_frames(captions, size=(1080, 1920), bg_color=(10, 10, 14), fg_color=(
     """Render text frames as PIL Images (fallback if Veo 3 fails)."""
     print(f"Rendering {len(captions)} fallback frames...", flush=True)
     frames = []
-    
-    try:
-        font = ImageFont.truetype("C:\\Windows\\Fonts\\Arial.ttf", 56)
-    except:
-        font = ImageFont.load_default()
+    font = resolve_font(56)
     
     for text in captions:
         img = Image.new("RGB", size, color=bg_color)
-        draw = ImageDraw.Draw(img)
         
-        words = text.split()
-        lines = []
-        cur = []
-        
-        for w in words:
-            test = " ".join(cur + [w])
-            bbox = draw.textbbox((0, 0), test, font=font)
-            if bbox[2] - bbox[0] <= size[0] * 0.8:
-                cur.append(w)
-            else:
-                if cur:
-                    lines.append(" ".join(cur))
-                cur = [w]
-        if cur:
-            lines.append(" ".join(cur))
+        lines = wrap_text(text, font, size[0] * 0.8)
         
         y = (size[1] - len(lines) * 70) // 2
-        for ln in lines:
-            bbox = draw.textbbox((0, 0), ln, font=font)
-            x = (size[0] - (bbox[2] - bbox[0])) // 2
-            draw.text((x, y), ln, font=font, fill=fg_color)
+        for ln, width in lines:
+            x = (size[0] - width) // 2
+            draw_line(img, (x, y), ln, font, fg_color)
             y += 70
         
         frames.append(img)
     
     return frames
 
-def assemble_video(frames, output_path, total_duration=8, fps=24):
-    """Assemble PIL Images into MP4 video (fallback)."""
-    import numpy as np
+def assemble_video(frames, output_path, total_duration=8, fps=24, backend="ffmpeg",
+                   preset=DEFAULT_PRESET, crf=DEFAULT_CRF):
+    """Assemble PIL Images into MP4 video (fallback).
     
+    backend="ffmpeg" pipes each slide once into ffmpeg (see slide_encoder);
+    backend="moviepy" is the original ImageClip compositing path.
+    """
     print(f"Assembling {len(frames)} frames into {total_duration}s video...", flush=True)
     
     os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
     
-    per_scene = total_duration / len(frames)
-    clips = [ImageClip(np.array(f), duration=per_scene) for f in frames]
-    
-    final = concatenate_videoclips(clips, method="compose")
-    final.write_videofile(str(output_path), fps=fps, codec="libx264", audio=False)
+    if backend == "ffmpeg":
+        encode_slides(frames, str(output_path), total_duration=total_duration, fps=fps, preset=preset, crf=crf)
+    elif backend == "moviepy":
+        import numpy as np
+        from moviepy import ImageClip, concatenate_videoclips
+        
+        per_scene = total_duration / len(frames)
+        clips = [ImageClip(np.array(f), duration=per_scene) for f in frames]
+        
+        final = concatenate_videoclips(clips, method="compose")
+        final.write_videofile(str(output_path), fps=fps, codec="libx264", audio=False,
+                              preset=preset, ffmpeg_params=["-crf", str(crf)])
+    else:
+        raise ValueError(f"Unknown backend {backend!r}, expected 'ffmpeg' or 'moviepy'")
     
     print(f"SUCCESS: Fallback video saved to {output_path}", flush=True)
 
 def main():
     parser = argparse.ArgumentParser(description="Generate 8s ASMR video using Veo 3")
-    parser.add_argument("--trends-json", required=True, help="Path to trends.json")
+    parser.add_argument("--trends-json", required=True, help="Path to trends.jsonl (or a legacy trends.json)")
     parser.add_argument("--theme-file", required=True, help="Path to theme.txt")
-    parser.add_argument("--output", required=True, help="Output MP4 path")
+    parser.add_argument("--output", help="Output MP4 path (required unless --prompt-only)")
     parser.add_argument("--output-prompt", help="Save Veo 3 prompt (optional)")
     parser.add_argument("--output-narration", help="Save narration (optional)")
     parser.add_argument("--duration", type=int, default=8, help="Video duration (default: 8)")
+    parser.add_argument("--prompt-only", action="store_true",
+                        help="Only generate the Veo 3 prompt (requires --output-prompt)")
+    parser.add_argument("--prompt-file", help="Use an existing Veo 3 prompt instead of generating one")
+    parser.add_argument("--speculative", action="store_true",
+                        help="Render the text fallback in the background while Veo 3 runs")
+    parser.add_argument("--veo-deadline", type=float, default=VEO_TIMEOUT_SECONDS,
+                        help=f"Seconds to wait for Veo 3 before giving up (default: {VEO_TIMEOUT_SECONDS})")
+    parser.add_argument("--race-policy", choices=["veo-first", "fastest"], default="veo-first",
+                        help="Speculative mode: wait for Veo until the deadline, or take the first video ready")
+    parser.add_argument("--follow-trends", action="store_true",
+                        help="Wait for trends still being written by trend_fetch.py")
+    parser.add_argument("--fallback", choices=["procedural", "slides"], default="procedural",
+                        help="Video used when Veo 3 fails: animated procedural loop or text slides (default: procedural)")
+    parser.add_argument("--render-workers", type=int, default=None,
+                        help="Processes rendering procedural fallback frames (default: one per spare core)")
+    parser.add_argument("--fallback-preset", default=DEFAULT_PRESET,
+                        help=f"x264 preset for the text fallback video (default: {DEFAULT_PRESET})")
+    parser.add_argument("--fallback-crf", type=int, default=DEFAULT_CRF,
+                        help=f"x264 CRF for the text fallback video (default: {DEFAULT_CRF})")
     args = parser.parse_args()
 
-    if not os.path.exists(args.trends_json):
+    if args.prompt_only and not args.output_prompt:
+        _fail("--prompt-only requires --output-prompt")
+    if not args.prompt_only and not args.output:
+        _fail("--output is required unless --prompt-only is set")
+
+    if not args.follow_trends and not os.path.exists(args.trends_json):
         _fail(f"Trends file not found: {args.trends_json}")
 
     try:
-        with open(args.trends_json, "r", encoding="utf-8") as f:
-            trends = json.load(f)
+        # Only the top trends feed the prompt; with a prompt file none are needed
+        trends = [] if args.prompt_file else read_trends(
+            args.trends_json, limit=PROMPT_TREND_COUNT, follow=args.follow_trends
+        )
         
         with open(args.theme_file, "r", encoding="utf-8") as f:
             theme = f.read().strip()
@@ -336,15 +398,30 @@ def main():
         gemini_api_key = os.getenv("GEMINI_API_KEY")
         if not gemini_api_key:
             _fail("GEMINI_API_KEY not set in .env")
+        get_model_registry().warm(gemini_api_key)
         
-        print("\n" + "="*60)
-        print("STEP 1: Generating Veo 3 prompt with Gemini")
-        print("="*60 + "\n")
-        
-        veo3_prompt = generate_veo3_prompt_with_gemini(theme, trends, gemini_api_key)
-        print(f"\nVeo 3 Prompt:\n{veo3_prompt}\n")
-        
-        if args.output_prompt:
+        if args.prompt_file:
+            with open(args.prompt_file, "r", encoding="utf-8") as f:
+                veo3_prompt = f.read().strip()
+            print(f"\nUsing Veo 3 prompt from {args.prompt_file}:\n{veo3_prompt}\n")
+        else:
+            print("\n" + "="*60)
+            print("STEP 1: Generating Veo 3 prompt with Gemini")
+            print("="*60 + "\n")
+            
+            veo3_prompt = generate_veo3_prompt_with_gemini(theme, trends, gemini_api_key)
+            
+            # Regenerate prompts that nearly repeat a published one before paying for a render
+            index = get_theme_index()
+            for variant in range(1, PROMPT_NOVELTY_ATTEMPTS):
+                score, _ = index.nearest(veo3_prompt, kind="prompt")
+                if score < DEFAULT_NOVELTY_THRESHOLD:
+                    break
+                print(f"Veo 3 prompt is {score:.2f} similar to a published one, regenerating...", flush=True)
+                veo3_prompt = generate_veo3_prompt_with_gemini(theme, trends, gemini_api_key, variant=variant)
+            print(f"\nVeo 3 Prompt:\n{veo3_prompt}\n")
+        
+        if args.output_prompt and not args.prompt_file:
             os.makedirs(os.path.dirname(os.path.abspath(args.output_prompt)), exist_ok=True)
             with open(args.output_prompt, "w", encoding="utf-8") as f:
                 f.write(veo3_prompt)
@@ -354,29 +431,58 @@ def main():
             with open(args.output_narration, "w", encoding="utf-8") as f:
                 f.write(veo3_prompt)
         
+        if args.prompt_only:
+            print(f"SUCCESS: Saved Veo 3 prompt to {args.output_prompt}")
+            return
+        
         print("\n" + "="*60)
         print("STEP 2: Attempting Veo 3 video generation")
         print("="*60 + "\n")
         
-        veo3_video = generate_video_with_veo3(veo3_prompt, gemini_api_key, args.duration, args.output)
-        
-        if not veo3_video or not os.path.exists(args.output):
-            print("\n" + "="*60)
-            print("VEO 3 FAILED - Using text-based fallback")
-            print("="*60)
-            print("\nGenerating text-based video...")
+        if args.speculative:
+            from video_generation.speculative import generate_video_speculative
             
-            captions = [theme, veo3_prompt[:200]]
-            frames = render_frames(captions)
-            assemble_video(frames, args.output, total_duration=args.duration, fps=24)
-            print("\nFallback video created")
-        else:
+            # The fallback renders in the background, so a failed Veo run costs no extra encode time
+            veo3_video, winner = generate_video_speculative(
+                veo3_prompt, theme, gemini_api_key, args.duration, args.output,
+                veo_deadline=args.veo_deadline, policy=args.race_policy,
+                fallback_style=args.fallback
+            )
             print("\n" + "="*60)
-            print("SUCCESS: Veo 3 video generated!")
+            if winner == "veo":
+                print("SUCCESS: Veo 3 video generated!")
+            else:
+                print(f"VEO 3 LOST THE RACE - {args.fallback} fallback video used")
             print("="*60)
+        else:
+            veo3_video = generate_video_with_veo3(veo3_prompt, gemini_api_key, args.duration, args.output,
+                                                  timeout=args.veo_deadline)
+            
+            if not veo3_video or not os.path.exists(args.output):
+                print("\n" + "="*60)
+                print(f"VEO 3 FAILED - Using {args.fallback} fallback")
+                print("="*60)
+                
+                if args.fallback == "procedural":
+                    print("\nGenerating procedural loop video...")
+                    render_procedural_video(theme, args.output, duration=args.duration, fps=24,
+                                            preset=args.fallback_preset, crf=args.fallback_crf,
+                                            workers=args.render_workers)
+                else:
+                    print("\nGenerating text-based video...")
+                    captions = [theme, veo3_prompt[:200]]
+                    frames = render_frames(captions)
+                    assemble_video(frames, args.output, total_duration=args.duration, fps=24,
+                                   preset=args.fallback_preset, crf=args.fallback_crf)
+                print("\nFallback video created")
+            else:
+                print("\n" + "="*60)
+                print("SUCCESS: Veo 3 video generated!")
+                print("="*60)
         
         if os.path.exists(args.output):
             file_size = os.path.getsize(args.output)
+            probe_video(args.output, motion=True)  # sidecar for upload validation (reused if Veo wrote one)
             print(f"\nVideo complete! Duration: {args.duration}s, Size: {file_size:,} bytes")
         else:
             _fail("Video file not created!")
@@ -0,0 +1,264 @@
+"""
+Cached model capability registry for Veo / Gemini.
+
+Remembers, per API key (stored only as a fingerprint), which Veo and Gemini
+models the key can list, which generation config (aspect ratio, resolution)
+last worked for each model, and recent failures. Quota failures last until
+the next midnight Pacific reset, short-term rate limits a couple of minutes,
+and permission and not-found failures a day. A known failure skips Veo
+without any round trip, and a fresh catalogue replaces the
+client.models.list() probe. A stale catalogue is still used while a
+background thread refreshes it.
+
+The registry lives in output/cache/model_registry.json and is shared by
+gemini_video.py and the video generation agent.
+
+Usage:
+    registry = get_model_registry()
+    usable, reason = registry.check(api_key, VEO_MODEL)
+    if usable:
+        config = registry.preferred_config(api_key, VEO_MODEL) or default_config
+        ...
+        registry.record_success(api_key, VEO_MODEL, config)   # or record_failure(api_key, VEO_MODEL, error)
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import datetime
+import threading
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from youtube_api.quota import file_lock, next_quota_reset
+
+REGISTRY_PATH = Path(__file__).resolve().parent.parent / "output" / "cache" / "model_registry.json"
+CATALOGUE_TTL_SECONDS = 24 * 3600
+FAILURE_TTL_SECONDS = 24 * 3600
+RATE_LIMIT_TTL_SECONDS = 120
+MODEL_FAMILIES = ("veo", "gemini")
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def key_fingerprint(api_key: str) -> str:
+    """Stable, non-reversible id for an API key (the key itself is never stored)."""
+    return hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()[:16]
+
+
+# HTTP status / gRPC code (operation errors) / google.rpc status -> classification
+_HTTP_REASONS = {429: "quota", 403: "permission", 404: "not_found", 400: "invalid_config"}
+_GRPC_REASONS = {8: "quota", 7: "permission", 5: "not_found", 3: "invalid_config"}
+_STATUS_REASONS = {
+    "RESOURCE_EXHAUSTED": "quota",
+    "PERMISSION_DENIED": "permission",
+    "NOT_FOUND": "not_found",
+    "INVALID_ARGUMENT": "invalid_config",
+}
+# Quota metric names marking a daily limit (anything else exhausted is a short-term rate limit)
+_DAILY_QUOTA_MARKERS = ("perday", "per_day", "per day", "daily")
+
+
+def _error_fields(error):
+    """(code, status, details text) of a google.genai APIError or an operation error dict."""
+    if isinstance(error, dict):
+        return error.get("code"), error.get("status"), json.dumps(error)
+    details = getattr(error, "details", None)
+    return getattr(error, "code", None), getattr(error, "status", None), \
+        json.dumps(details) if details is not None else str(error)
+
+
+def classify_error(error) -> str:
+    """Map an API error to "quota", "rate_limit", "permission", "not_found", "invalid_config" or "other".
+
+    Uses the error's status code (google.genai APIError.code, or the gRPC code
+    of an operation error) and its status reason, never free text, so numbers
+    such as "1400ms" in a message cannot match. RESOURCE_EXHAUSTED is "quota"
+    only when the exhausted quota is a daily one, else "rate_limit".
+    """
+    code, status, details = _error_fields(error)
+    reason = _STATUS_REASONS.get(status) if isinstance(status, str) else None
+    if reason is None and isinstance(code, int):
+        reason = _HTTP_REASONS.get(code) if code >= 100 else _GRPC_REASONS.get(code)
+    if reason is None:
+        return "other"
+    if reason == "quota" and not any(marker in details.lower() for marker in _DAILY_QUOTA_MARKERS):
+        return "rate_limit"
+    return reason
+
+
+def _config_key(config: dict) -> str:
+    return json.dumps(config, sort_keys=True)
+
+
+class ModelRegistry:
+    """On-disk registry of usable models, working configs and known failures per API key."""
+
+    def __init__(self, path=REGISTRY_PATH, catalogue_ttl: float = CATALOGUE_TTL_SECONDS):
+        self.path = Path(path)
+        self.lock_path = self.path.with_suffix(".lock")
+        self.catalogue_ttl = catalogue_ttl
+        self._lock = threading.Lock()
+        self._refreshing = set()
+
+    def _load(self) -> dict:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self, data: dict):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def _update(self, api_key: str, fn):
+        """Apply fn(entry) to this key's entry and persist it.
+
+        The read-modify-write holds the thread lock and an inter-process file
+        lock, so concurrent batch processes do not drop each other's updates.
+        """
+        with self._lock, file_lock(self.lock_path):
+            data = self._load()
+            entry = data.setdefault(key_fingerprint(api_key), {})
+            for field in ("models", "configs", "failures"):
+                entry.setdefault(field, {})
+            fn(entry)
+            self._save(data)
+
+    def _entry(self, api_key: str) -> dict:
+        with self._lock:
+            return self._load().get(key_fingerprint(api_key), {})
+
+    def refresh(self, api_key: str, client=None) -> dict:
+        """List the key's models now and store the Veo / Gemini ones; returns {family: [names]}."""
+        if client is None:
+            from google import genai
+            client = genai.Client(api_key=api_key)
+
+        names = [m.name for m in client.models.list()]
+        models = {family: sorted(n for n in names if family in n.lower()) for family in MODEL_FAMILIES}
+
+        def _apply(entry):
+            entry["models"] = models
+            entry["listed_at"] = time.time()
+            # A successful listing clears stale permission/not-found verdicts for listed models
+            for name in list(entry["failures"]):
+                if entry["failures"][name].get("reason") in ("permission", "not_found") and \
+                        any(name in listed for listed in names):
+                    del entry["failures"][name]
+
+        self._update(api_key, _apply)
+        print(f"Model registry: {len(models['veo'])} Veo, {len(models['gemini'])} Gemini models available", flush=True)
+        return models
+
+    def refresh_async(self, api_key: str):
+        """Refresh the catalogue in a background thread (at most one per key at a time)."""
+        fingerprint = key_fingerprint(api_key)
+        with self._lock:
+            if fingerprint in self._refreshing:
+                return
+            self._refreshing.add(fingerprint)
+
+        def _run():
+            try:
+                self.refresh(api_key)
+            except Exception as e:
+                print(f"Model registry: background refresh failed: {e}", flush=True)
+            finally:
+                with self._lock:
+                    self._refreshing.discard(fingerprint)
+
+        threading.Thread(target=_run, daemon=True).start()
+
+    def warm(self, api_key: str):
+        """Start a background refresh if the catalogue is missing or stale, so check() finds it fresh."""
+        listed_at = self._entry(api_key).get("listed_at")
+        if listed_at is None or time.time() - listed_at > self.catalogue_ttl:
+            self.refresh_async(api_key)
+
+    def check(self, api_key: str, model: str):
+        """(usable, reason) for a model, without an API call unless nothing is known yet.
+
+        A stale catalogue is trusted while refresh_async() updates it.
+        """
+        entry = self._entry(api_key)
+        failure = entry.get("failures", {}).get(model)
+        if failure and failure.get("until", 0) > time.time():
+            until = datetime.datetime.fromtimestamp(failure["until"]).strftime("%Y-%m-%d %H:%M")
+            return False, f"{failure['reason']} failure recorded, skipping until {until}: {failure.get('message', '')}"
+
+        if "listed_at" not in entry:
+            try:
+                entry_models = self.refresh(api_key)
+            except Exception as e:
+                return False, f"cannot list models: {e}"
+        else:
+            entry_models = entry["models"]
+            if time.time() - entry["listed_at"] > self.catalogue_ttl:
+                self.refresh_async(api_key)
+
+        family = next((f for f in MODEL_FAMILIES if f in model.lower()), None)
+        listed = entry_models.get(family, []) if family else []
+        if family and not any(model in name for name in listed):
+            return False, f"{model} is not available to this key ({len(listed)} {family} models listed)"
+        return True, None
+
+    def preferred_config(self, api_key: str, model: str):
+        """The config that most recently worked for this model, or None."""
+        configs = self._entry(api_key).get("configs", {}).get(model, {})
+        working = [c for c in configs.values() if c.get("ok_at")]
+        if not working:
+            return None
+        return max(working, key=lambda c: c["ok_at"])["config"]
+
+    def failed_config(self, api_key: str, model: str, config: dict) -> bool:
+        """True if this exact config was last rejected as invalid for the model, within FAILURE_TTL_SECONDS."""
+        record = self._entry(api_key).get("configs", {}).get(model, {}).get(_config_key(config), {})
+        failed_at = record.get("failed_at", 0)
+        return failed_at > record.get("ok_at", 0) and time.time() - failed_at < FAILURE_TTL_SECONDS
+
+    def record_success(self, api_key: str, model: str, config: dict = None):
+        def _apply(entry):
+            entry["failures"].pop(model, None)
+            if config is not None:
+                record = entry["configs"].setdefault(model, {}).setdefault(_config_key(config), {"config": config})
+                record["ok_at"] = time.time()
+        self._update(api_key, _apply)
+
+    def record_failure(self, api_key: str, model: str, error, config: dict = None) -> str:
+        """Remember a failure; returns its classification (see classify_error)."""
+        reason = classify_error(error)
+
+        def _apply(entry):
+            if reason == "invalid_config" and config is not None:
+                record = entry["configs"].setdefault(model, {}).setdefault(_config_key(config), {"config": config})
+                record["failed_at"] = time.time()
+            elif reason in ("quota", "rate_limit", "permission", "not_found"):
+                if reason == "quota":
+                    until = next_quota_reset()
+                elif reason == "rate_limit":
+                    until = time.time() + RATE_LIMIT_TTL_SECONDS
+                else:
+                    until = time.time() + FAILURE_TTL_SECONDS
+                entry["failures"][model] = {"reason": reason, "until": until, "message": str(error)[:300]}
+
+        self._update(api_key, _apply)
+        return reason
+
+
+def get_model_registry(path=REGISTRY_PATH) -> ModelRegistry:
+    """Process-wide registry instance."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ModelRegistry(path)
+        return _registry
@@ -0,0 +1,164 @@
+"""
+Procedural fallback video: seamless animated loops rendered on the CPU.
+
+Instead of static text slides, the fallback is an ambient loop built from
+three layers keyed to the theme: a slowly drifting two-colour gradient, a
+noise texture made of travelling plane waves, and a field of soft glowing
+particles. Every time-dependent term runs a whole number of cycles over the
+clip, so the last frame leads straight back into the first. The palette
+comes from theme keywords, and wave and particle parameters are seeded from
+the theme text, so a theme always renders the same loop.
+
+Each frame is computed with vectorized float32 NumPy at quarter resolution
+(the layers are all smooth) and piped to ffmpeg through
+slide_encoder.FrameWriter, which upscales to 1080x1920 while encoding. On
+multi-core machines frames are rendered by a frame_pool process pool.
+
+Usage:
+    render_procedural_video("gentle rain on a frosted window", "output/run/asmr_video.mp4")
+
+    scene = LoopScene("warm candle glow", duration=8, fps=24)
+    frame = scene.frame(0)   # HxWx3 uint8 at scene.low (270x480)
+"""
+
+import math
+import hashlib
+
+import numpy as np
+
+from video_generation.frame_pool import default_workers, render_parallel
+from video_generation.slide_encoder import DEFAULT_CRF, DEFAULT_PRESET, FrameWriter
+
+# (keywords, top colour, bottom colour, particle colour)
+PALETTES = (
+    (("rain", "water", "ocean", "sea", "wave", "ice", "glass", "frost", "snow", "crystal"),
+     (18, 42, 74), (92, 150, 190), (210, 235, 255)),
+    (("fire", "candle", "ember", "wood", "crackl", "amber", "honey", "coffee", "autumn"),
+     (40, 12, 6), (196, 96, 34), (255, 214, 140)),
+    (("forest", "leaf", "leaves", "moss", "garden", "grass", "tea", "matcha", "plant"),
+     (10, 34, 22), (86, 140, 84), (220, 255, 200)),
+    (("sand", "desert", "clay", "soap", "paper", "cardboard", "kinetic", "pottery"),
+     (62, 44, 32), (214, 178, 132), (255, 240, 215)),
+    (("night", "moon", "star", "space", "galaxy", "dream", "sleep", "midnight"),
+     (6, 6, 24), (58, 44, 110), (236, 226, 255)),
+    (("slime", "pink", "bubble", "foam", "cotton", "pastel", "sugar", "candy"),
+     (84, 46, 92), (236, 164, 196), (255, 238, 248)),
+)
+DEFAULT_PALETTE = ((14, 18, 30), (110, 100, 150), (240, 236, 255))
+
+NOISE_WAVES = 6
+PARTICLES = 90
+SCALE = 4
+
+
+def theme_palette(theme: str):
+    """(top, bottom, particle) colours for the first palette whose keyword appears in the theme."""
+    text = theme.lower()
+    for keywords, top, bottom, particle in PALETTES:
+        if any(k in text for k in keywords):
+            return top, bottom, particle
+    return DEFAULT_PALETTE
+
+
+def _sprite(radius: int) -> np.ndarray:
+    """Soft round glow, radius pixels wide, peak 1.0."""
+    y, x = np.mgrid[-radius:radius + 1, -radius:radius + 1].astype(np.float32)
+    return np.exp(-(x * x + y * y) / (0.35 * radius * radius))
+
+
+class LoopScene:
+    """A theme's loop; frame(i) is pure, so frames can be rendered in any order or process."""
+
+    def __init__(self, theme: str, size=(1080, 1920), duration: float = 8, fps: int = 24, scale: int = SCALE):
+        self.size = tuple(size)
+        self.frame_count = int(round(duration * fps))
+        self.low = (max(1, size[0] // scale), max(1, size[1] // scale))
+        seed = int.from_bytes(hashlib.sha256(theme.encode("utf-8")).digest()[:8], "big")
+        rng = np.random.default_rng(seed)
+
+        top, bottom, particle = theme_palette(theme)
+        self.top = np.array(top, dtype=np.float32) / 255
+        self.bottom = np.array(bottom, dtype=np.float32) / 255
+        self.particle = np.array(particle, dtype=np.float32) / 255
+
+        w, h = self.low
+        self.x = np.linspace(0, 1, w, dtype=np.float32)[None, :]
+        self.y = np.linspace(0, 1, h, dtype=np.float32)[:, None]
+
+        # Plane waves: spatial frequency, direction, whole cycles per loop, phase
+        angles = rng.uniform(0, 2 * np.pi, NOISE_WAVES)
+        spatial = rng.uniform(2.0, 7.0, NOISE_WAVES) * 2 * np.pi
+        self.wave_kx = (np.cos(angles) * spatial).astype(np.float32)
+        self.wave_ky = (np.sin(angles) * spatial * h / w).astype(np.float32)
+        self.wave_cycles = rng.integers(1, 3, NOISE_WAVES)
+        self.wave_phase = rng.uniform(0, 2 * np.pi, NOISE_WAVES)
+
+        # Particles rise 1-2 screen heights per loop and sway on whole-cycle orbits
+        self.p_x = rng.uniform(0, 1, PARTICLES)
+        self.p_y = rng.uniform(0, 1, PARTICLES)
+        self.p_rise = rng.integers(1, 3, PARTICLES)
+        self.p_sway = rng.uniform(0.01, 0.05, PARTICLES)
+        self.p_sway_cycles = rng.integers(1, 4, PARTICLES)
+        self.p_phase = rng.uniform(0, 2 * np.pi, PARTICLES)
+        self.p_glow = rng.uniform(0.25, 0.8, PARTICLES).astype(np.float32)
+        self.p_twinkle = rng.integers(1, 5, PARTICLES)
+        self.sprite = _sprite(max(2, w // 60))
+
+    def frame(self, index: int) -> np.ndarray:
+        """Frame `index` of the loop as an HxWx3 uint8 array at the working resolution (self.low).
+
+        The layers are smooth, so ffmpeg upscales to full size when encoding.
+        """
+        # Python floats keep the per-pixel math in float32
+        theta = 2 * math.pi * (index % self.frame_count) / self.frame_count
+        w, h = self.low
+
+        # Gradient whose midline drifts and tilts once per loop
+        blend = self.y + 0.08 * math.sin(theta) + 0.05 * math.cos(theta) * (self.x - 0.5)
+        blend = np.clip(blend, 0, 1)[..., None]
+        image = self.top * (1 - blend) + self.bottom * blend
+
+        # Noise texture: sum of travelling plane waves
+        noise = np.zeros((h, w), dtype=np.float32)
+        for kx, ky, cycles, phase in zip(self.wave_kx, self.wave_ky, self.wave_cycles, self.wave_phase):
+            noise += np.cos(float(kx) * self.x + float(ky) * self.y + float(cycles * theta + phase))
+        image *= (1 + (0.06 / math.sqrt(NOISE_WAVES)) * noise)[..., None]
+
+        # Particle field splatted with a soft sprite
+        glow = np.zeros((h, w), dtype=np.float32)
+        px = (self.p_x + self.p_sway * np.sin(self.p_sway_cycles * theta + self.p_phase)) % 1.0
+        py = (self.p_y - self.p_rise * theta / (2 * np.pi)) % 1.0
+        brightness = self.p_glow * (0.6 + 0.4 * np.sin(self.p_twinkle * theta + self.p_phase))
+        radius = self.sprite.shape[0] // 2
+        for cx, cy, b in zip((px * w).astype(int), (py * h).astype(int), brightness):
+            x0, x1 = max(cx - radius, 0), min(cx + radius + 1, w)
+            y0, y1 = max(cy - radius, 0), min(cy + radius + 1, h)
+            if x0 < x1 and y0 < y1:
+                glow[y0:y1, x0:x1] += b * self.sprite[y0 - cy + radius:y1 - cy + radius,
+                                                      x0 - cx + radius:x1 - cx + radius]
+        image += np.minimum(glow, 1.0)[..., None] * (self.particle - image) * 0.9
+
+        return (np.clip(image, 0, 1) * 255).astype(np.uint8)
+
+
+def render_procedural_video(theme: str, output_path: str, duration: float = 8, fps: int = 24,
+                            size=(1080, 1920), preset: str = DEFAULT_PRESET, crf: int = DEFAULT_CRF,
+                            workers: int = None) -> str:
+    """Render the theme's seamless loop to an MP4 (fallback when Veo is unavailable).
+
+    workers: frame rendering processes (default: one per spare core; 1 renders in-process)
+    """
+    scene = LoopScene(theme, size=size, duration=duration, fps=fps)
+    workers = workers or default_workers()
+    print(f"Rendering {scene.frame_count} procedural frames for '{theme}' "
+          f"({workers} worker{'s' if workers != 1 else ''})...", flush=True)
+
+    with FrameWriter(output_path, scene.low, fps=fps, output_size=size, preset=preset, crf=crf) as writer:
+        if workers > 1:
+            render_parallel(scene, scene.frame_count, (scene.low[1], scene.low[0], 3), writer.write, workers=workers)
+        else:
+            for index in range(scene.frame_count):
+                writer.write(scene.frame(index))
+
+    print(f"SUCCESS: Procedural fallback video saved to {output_path}", flush=True)
+    return str(output_path)
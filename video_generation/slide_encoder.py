@@ -0,0 +1,135 @@
+"""
+Still-slide encoder: pipe raw frames straight into one ffmpeg process.
+
+The moviepy path wraps every slide in an ImageClip and recomposites all
+total_duration * fps output frames in Python. Here each slide is sent to
+ffmpeg exactly once, as raw RGB at an input rate of one frame per slide
+duration, and ffmpeg repeats it up to the output frame rate itself. Frames
+are handed to the pipe through a memoryview of their pixel buffer, so NumPy
+frames are written without copies (PIL images are converted once).
+
+FrameWriter is the general pipe writer (any input rate, one frame per
+write(), optional upscale to output_size inside ffmpeg); encode_slides() is
+the fallback-video wrapper.
+
+Usage:
+    encode_slides(frames, "output/run/asmr_video.mp4", total_duration=8, fps=24)
+
+    with FrameWriter("out.mp4", size=(1080, 1920), fps=24, crf=20) as writer:
+        for frame in frames:
+            writer.write(frame)
+"""
+
+import os
+import subprocess
+from fractions import Fraction
+
+import numpy as np
+
+DEFAULT_PRESET = "veryfast"
+DEFAULT_CRF = 23
+
+
+def ffmpeg_exe() -> str:
+    """ffmpeg bundled with imageio-ffmpeg (a moviepy dependency), else the one on PATH."""
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except Exception:
+        return "ffmpeg"
+
+
+def frame_buffer(frame, size=None):
+    """Raw RGB24 bytes of a frame as a memoryview (no copy for contiguous uint8 arrays)."""
+    if isinstance(frame, (bytes, bytearray, memoryview)):
+        return memoryview(frame)
+    if not isinstance(frame, np.ndarray):
+        # PIL Image: one conversion to raw RGB, resized if it does not match the stream
+        if frame.mode != "RGB":
+            frame = frame.convert("RGB")
+        if size is not None and frame.size != tuple(size):
+            frame = frame.resize(size)
+        return memoryview(frame.tobytes())
+    if frame.dtype != np.uint8 or frame.ndim != 3 or frame.shape[2] != 3:
+        raise ValueError(f"Expected an HxWx3 uint8 frame, got {frame.dtype} {frame.shape}")
+    if size is not None and (frame.shape[1], frame.shape[0]) != tuple(size):
+        raise ValueError(f"Frame is {frame.shape[1]}x{frame.shape[0]}, stream is {size[0]}x{size[1]}")
+    return memoryview(np.ascontiguousarray(frame)).cast("B")
+
+
+class FrameWriter:
+    """Context manager feeding raw RGB frames to an ffmpeg libx264 encode."""
+
+    def __init__(self, output_path: str, size, fps: float = 24, input_fps=None,
+                 duration: float = None, preset: str = DEFAULT_PRESET, crf: int = DEFAULT_CRF,
+                 tune: str = None, output_size=None):
+        self.output_path = str(output_path)
+        self.size = tuple(size)
+        self.frames_written = 0
+        input_rate = Fraction(input_fps if input_fps is not None else fps).limit_denominator(1000)
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.output_path)), exist_ok=True)
+        command = [
+            ffmpeg_exe(), "-y", "-loglevel", "error",
+            "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{self.size[0]}x{self.size[1]}",
+            "-r", f"{input_rate.numerator}/{input_rate.denominator}", "-i", "-",
+            "-an", "-c:v", "libx264", "-preset", preset, "-crf", str(crf),
+            "-pix_fmt", "yuv420p", "-r", str(fps), "-movflags", "+faststart",
+        ]
+        if output_size is not None and tuple(output_size) != self.size:
+            command += ["-vf", f"scale={output_size[0]}:{output_size[1]}:flags=bicubic"]
+        if tune:
+            command += ["-tune", tune]
+        if duration is not None:
+            command += ["-t", f"{duration:.3f}"]
+        command.append(self.output_path)
+        self._process = subprocess.Popen(command, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+
+    def write(self, frame):
+        try:
+            self._process.stdin.write(frame_buffer(frame, self.size))
+        except BrokenPipeError:
+            self.close()  # raises with ffmpeg's error message
+            raise
+        self.frames_written += 1
+
+    def close(self):
+        if self._process.stdin and not self._process.stdin.closed:
+            try:
+                self._process.stdin.close()
+            except BrokenPipeError:
+                pass
+        stderr = self._process.stderr.read().decode("utf-8", "replace")
+        self._process.stderr.close()
+        if self._process.wait() != 0:
+            raise RuntimeError(f"ffmpeg failed ({self._process.returncode}): {stderr.strip()}")
+
+    def abort(self):
+        self._process.kill()
+        self._process.wait()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+
+def encode_slides(frames, output_path: str, total_duration: float = 8, fps: int = 24,
+                  preset: str = DEFAULT_PRESET, crf: int = DEFAULT_CRF) -> str:
+    """Encode slides (PIL Images or HxWx3 uint8 arrays) shown for equal time into an MP4."""
+    if not frames:
+        raise ValueError("No frames to encode")
+    first = frames[0]
+    size = first.size if not isinstance(first, np.ndarray) else (first.shape[1], first.shape[0])
+    slide_rate = Fraction(len(frames)) / Fraction(total_duration).limit_denominator(1000)
+
+    with FrameWriter(output_path, size, fps=fps, input_fps=slide_rate, duration=total_duration,
+                     preset=preset, crf=crf, tune="stillimage") as writer:
+        for frame in frames:
+            writer.write(frame)
+    return str(output_path)
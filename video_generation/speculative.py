@@ -0,0 +1,133 @@
+"""
+Speculative video generation: race Veo 3 against the fallback video.
+
+The fallback video (a procedural loop, or render_frames + assemble_video text
+slides) is rendered in a background process as soon as the Veo 3 job is
+submitted, so when Veo fails or runs past its deadline the fallback is
+already on disk. The loser is
+discarded: a fallback process still encoding is terminated, and a Veo job
+past the deadline stops polling.
+
+Policies:
+    veo-first  wait for Veo until the deadline; the fallback wins only if Veo
+               fails or the deadline passes (default)
+    fastest    whichever acceptable video is ready first wins
+
+Usage:
+    path, winner = generate_video_speculative(veo3_prompt, theme, api_key,
+                                              output_path="output/run/asmr_video.mp4",
+                                              veo_deadline=300)
+"""
+
+import os
+import sys
+import time
+import threading
+import multiprocessing
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from video_generation.gemini_video import (
+    VEO_TIMEOUT_SECONDS, assemble_video, generate_video_with_veo3, render_frames
+)
+from video_generation.procedural import render_procedural_video
+from video_generation.veo_download import discard_video, move_video
+
+POLICIES = ("veo-first", "fastest")
+FALLBACKS = ("procedural", "slides")
+_POLL_SECONDS = 0.5
+
+
+def render_fallback_video(captions, output_path: str, duration: int = 8, fps: int = 24,
+                          style: str = "procedural", theme: str = None, workers: int = 1):
+    """Render the fallback video (runs in the background process).
+
+    The background process is a daemon, which may not start children of its
+    own, so frames are rendered in-process by default (workers=1).
+    """
+    if style == "procedural":
+        render_procedural_video(theme or captions[0], output_path, duration=duration, fps=fps, workers=workers)
+    else:
+        frames = render_frames(captions)
+        assemble_video(frames, output_path, total_duration=duration, fps=fps)
+
+
+def generate_video_speculative(veo3_prompt: str, theme: str, api_key: str, duration: int = 8,
+                               output_path: str = "temp_veo3_video.mp4",
+                               veo_deadline: float = VEO_TIMEOUT_SECONDS, policy: str = "veo-first",
+                               captions=None, fallback_style: str = "procedural"):
+    """Race Veo 3 against the fallback renderer; returns (video_path, "veo" | "fallback" | None).
+
+    Both candidates render to side files, and the winner is moved to
+    output_path with its checksum and probe sidecars.
+    """
+    if policy not in POLICIES:
+        raise ValueError(f"Unknown policy {policy!r}, expected one of {POLICIES}")
+    if fallback_style not in FALLBACKS:
+        raise ValueError(f"Unknown fallback {fallback_style!r}, expected one of {FALLBACKS}")
+
+    base, ext = os.path.splitext(output_path)
+    veo_path, fallback_path = f"{base}.veo{ext}", f"{base}.fallback{ext}"
+    captions = captions or [theme, veo3_prompt[:200]]
+
+    fallback = multiprocessing.Process(
+        target=render_fallback_video, args=(captions, fallback_path, duration, 24, fallback_style, theme),
+        daemon=True
+    )
+    fallback.start()
+    print(f"Speculative mode: fallback rendering in background (pid {fallback.pid}), "
+          f"Veo deadline {veo_deadline:.0f}s, policy {policy}", flush=True)
+
+    cancel = threading.Event()
+    veo_result = {}
+
+    def _run_veo():
+        veo_result["path"] = generate_video_with_veo3(
+            veo3_prompt, api_key, duration, veo_path, cancel_event=cancel, timeout=veo_deadline
+        )
+
+    veo_thread = threading.Thread(target=_run_veo, daemon=True)
+    started = time.time()
+    veo_thread.start()
+
+    def _fallback_ready():
+        return not fallback.is_alive() and fallback.exitcode == 0 and os.path.exists(fallback_path)
+
+    winner = None
+    while True:
+        veo_done = not veo_thread.is_alive()
+        if veo_done and veo_result.get("path") and os.path.exists(veo_path):
+            winner = "veo"
+            break
+        if policy == "fastest" and _fallback_ready():
+            winner = "fallback"
+            break
+        if veo_done or time.time() - started > veo_deadline:
+            if not veo_done:
+                print(f"Veo missed the {veo_deadline:.0f}s deadline, cancelling", flush=True)
+            fallback.join()
+            winner = "fallback" if _fallback_ready() else None
+            break
+        time.sleep(_POLL_SECONDS)
+
+    if winner != "veo":
+        cancel.set()  # the Veo poll loop stops at its next check; its file is discarded
+    if winner != "fallback" and fallback.is_alive():
+        fallback.terminate()
+    fallback.join(timeout=5)
+
+    elapsed = time.time() - started
+    if winner is None:
+        print(f"Speculative mode: both Veo and fallback failed after {elapsed:.0f}s", flush=True)
+        discard_video(fallback_path)
+        return None, None
+
+    move_video(veo_path if winner == "veo" else fallback_path, output_path)
+    discard_video(fallback_path)
+    if winner == "fallback":
+        # A Veo job finishing after the race must not leave stray files behind
+        threading.Thread(target=lambda: (veo_thread.join(), discard_video(veo_path)), daemon=True).start()
+    print(f"Speculative mode: {winner} won after {elapsed:.0f}s", flush=True)
+    return output_path, winner
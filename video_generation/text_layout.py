@@ -0,0 +1,146 @@
+"""
+Text layout for fallback captions: cached fonts, glyph advances and wrapping.
+
+Fonts are resolved once per (path, size) per process. The font path comes
+from BLISS_FONT_PATH, then common Windows / Linux / macOS locations, then
+Pillow's built-in scalable font. Each font keeps a glyph advance-width
+cache, so measuring a word is a sum of cached advances. Wrapping is a single
+greedy pass over cumulative word widths, not one textbbox call per word prefix.
+Advances ignore kerning and side bearings, so a line within BREAK_SLACK
+pixels of the limit is measured exactly with font.getbbox() before the break
+is decided. Line widths returned for centering are ink widths (the textbbox
+width), as before.
+
+Rendered lines are cached as alpha masks too, so captions repeated across
+slides and batch runs are pasted instead of rasterized again.
+
+Usage:
+    font = resolve_font(56)
+    for line, width in wrap_text(caption, font, max_width=864):
+        draw_line(img, ((1080 - width) // 2, y), line, font, fg_color)   # centred like textbbox
+"""
+
+import os
+import threading
+from functools import lru_cache
+
+from PIL import Image, ImageDraw, ImageFont
+
+DEFAULT_FONT_SIZE = 56
+BREAK_SLACK = 8  # px; above this margin from max_width the advance sum decides a break on its own
+FONT_CANDIDATES = (
+    "C:\\Windows\\Fonts\\Arial.ttf",
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+    "/usr/share/fonts/TTF/DejaVuSans.ttf",
+    "/usr/share/fonts/dejavu/DejaVuSans.ttf",
+    "/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf",
+    "/Library/Fonts/Arial.ttf",
+    "/System/Library/Fonts/Supplemental/Arial.ttf",
+)
+
+
+def font_candidates(path: str = None) -> list:
+    """Font files to try, in order: explicit path, BLISS_FONT_PATH, platform defaults."""
+    candidates = [p for p in (path, os.getenv("BLISS_FONT_PATH")) if p]
+    return candidates + [p for p in FONT_CANDIDATES if os.path.exists(p)]
+
+
+@lru_cache(maxsize=None)
+def resolve_font(size: int = DEFAULT_FONT_SIZE, path: str = None):
+    """Load the first usable font at `size` (cached per process)."""
+    for candidate in font_candidates(path):
+        try:
+            return ImageFont.truetype(candidate, size)
+        except OSError:
+            continue
+    print("WARNING: No TrueType font found (set BLISS_FONT_PATH), using Pillow's default font", flush=True)
+    return ImageFont.load_default(size)
+
+
+class GlyphCache:
+    """Advance widths of one font, measured once per glyph."""
+
+    def __init__(self, font):
+        self.font = font
+        self._advances = {}
+        self._lock = threading.Lock()
+        self.space = self.advance(" ")
+
+    def advance(self, char: str) -> float:
+        width = self._advances.get(char)
+        if width is None:
+            width = self.font.getlength(char)
+            with self._lock:
+                self._advances[char] = width
+        return width
+
+    def width(self, text: str) -> float:
+        """Width of a run of text as the sum of its glyph advances (kerning ignored)."""
+        advances = self._advances
+        total = 0.0
+        for char in text:
+            width = advances.get(char)
+            total += width if width is not None else self.advance(char)
+        return total
+
+
+_glyph_caches = {}
+_glyph_lock = threading.Lock()
+
+
+def glyph_cache(font) -> GlyphCache:
+    """The process-wide GlyphCache for a font object."""
+    cache = _glyph_caches.get(id(font))
+    if cache is None or cache.font is not font:
+        with _glyph_lock:
+            cache = _glyph_caches[id(font)] = GlyphCache(font)
+    return cache
+
+
+@lru_cache(maxsize=2048)
+def ink_width(font, line: str) -> int:
+    """Width of the line's ink bounding box, as ImageDraw.textbbox() reports it."""
+    left, _, right, _ = font.getbbox(line)
+    return right - left
+
+
+def wrap_text(text: str, font, max_width: float) -> list:
+    """Greedy word wrap in one pass; returns [(line, ink width)].
+
+    Breaks where textbbox-based wrapping would. A word wider than max_width
+    gets a line of its own.
+    """
+    glyphs = glyph_cache(font)
+    lines = []
+    words, line_width = [], 0.0
+    for word in text.split():
+        word_width = glyphs.width(word)
+        candidate = line_width + glyphs.space + word_width if words else word_width
+        fits = candidate <= max_width
+        if words and abs(candidate - max_width) <= BREAK_SLACK:
+            left, _, right, _ = font.getbbox(" ".join(words + [word]))
+            fits = right - left <= max_width
+        if words and not fits:
+            lines.append(" ".join(words))
+            words, line_width = [word], word_width
+        else:
+            words.append(word)
+            line_width = candidate
+    if words:
+        lines.append(" ".join(words))
+    return [(line, ink_width(font, line)) for line in lines]
+
+
+@lru_cache(maxsize=2048)
+def line_mask(font, line: str):
+    """(mask, (dx, dy)): the line rasterized once as an "L" image and its offset from the text origin."""
+    left, top, right, bottom = font.getbbox(line)
+    mask = Image.new("L", (max(1, right - left), max(1, bottom - top)), 0)
+    ImageDraw.Draw(mask).text((-left, -top), line, font=font, fill=255)
+    return mask, (left, top)
+
+
+def draw_line(img, xy, line: str, font, fill):
+    """Draw one line of text at xy like ImageDraw.text(), from the cached mask."""
+    mask, (dx, dy) = line_mask(font, line)
+    img.paste(fill, (int(xy[0] + dx), int(xy[1] + dy)), mask)
@@ -0,0 +1,184 @@
+"""
+Async Veo 3 generation - Bliss Builder
+
+Submits many Veo 3 operations and polls all of them from one asyncio event
+loop with adaptive backoff, yielding each finished video as soon as it is
+ready. One process can keep dozens of renders in flight without a thread
+(and a time.sleep loop) per video.
+
+Usage:
+    python video_generation/veo_async.py --prompts-file prompts.txt --output-dir output/veo_batch
+    python video_generation/veo_async.py --prompts-file prompts.txt --output-dir /tmp/veo --fake
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+import dotenv
+from google import genai
+
+from video_generation.gemini_video import VEO_TIMEOUT_SECONDS, build_veo3_request, poll_intervals
+from video_generation.veo_download import save_generated_video
+
+dotenv.load_dotenv()
+
+
+def _result(job: dict, started: float, video_path: str = None, error: str = None) -> dict:
+    return {
+        "job_id": job["job_id"],
+        "status": "success" if video_path else "error",
+        "video_path": video_path,
+        "error": error,
+        "elapsed": round(time.time() - started, 1),
+    }
+
+
+def _save_generated_video(client, operation, output_path: str, api_key: str = None):
+    """Download the first generated video of a finished operation (blocking, streamed to disk)."""
+    generated_video = operation.response.generated_videos[0]
+    return save_generated_video(client, generated_video.video, output_path, api_key)[0]
+
+
+async def _run_job(client, job: dict, slots: asyncio.Semaphore, timeout: float, api_key: str = None,
+                   deadline: float = None) -> dict:
+    """Submit one Veo operation, poll it with backoff and download the result.
+
+    `timeout` counts from submission, so time spent waiting for a slot does
+    not eat into it. A job that only gets its slot after `deadline` (epoch
+    seconds) is not submitted at all, rather than starting a billed
+    operation that would be abandoned.
+    """
+    queued = time.time()
+    async with slots:
+        if deadline is not None and time.time() >= deadline:
+            return _result(job, queued, error="Batch deadline passed before submission")
+        started = time.time()
+        try:
+            request_args = build_veo3_request(job["veo3_prompt"], job.get("duration", 8))
+            operation = await client.aio.models.generate_videos(**request_args)
+            print(f"[{job['job_id']}] Operation started: {operation.name}", flush=True)
+        except Exception as e:
+            return _result(job, queued, error=f"Veo 3 submission failed: {e}")
+
+        intervals = poll_intervals()
+        while not operation.done:
+            if time.time() - started >= timeout:
+                return _result(job, queued, error=f"Timeout ({int(timeout)}s)")
+            await asyncio.sleep(next(intervals))
+            try:
+                operation = await client.aio.operations.get(operation)
+            except Exception as e:
+                # Transient poll failures are retried on the next interval
+                print(f"[{job['job_id']}] Poll failed ({e}), retrying...", flush=True)
+
+        if operation.error:
+            return _result(job, queued, error=f"Veo 3 operation failed: {operation.error}")
+        if not operation.response or not operation.response.generated_videos:
+            return _result(job, queued, error="Veo 3 returned no videos (likely filtered)")
+
+        try:
+            video_path = await asyncio.to_thread(
+                _save_generated_video, client, operation, job["output_path"], api_key
+            )
+        except Exception as e:
+            return _result(job, queued, error=f"Download failed: {e}")
+
+    return _result(job, queued, video_path=video_path)
+
+
+async def generate_videos_async(jobs: list, api_key: str = None, client=None,
+                                max_in_flight: int = 10, timeout: float = VEO_TIMEOUT_SECONDS,
+                                deadline: float = None):
+    """Run Veo 3 jobs concurrently and yield each result dict as soon as it finishes.
+
+    Each job is a dict with "job_id", "veo3_prompt", "output_path" and optional
+    "duration". Pass `client` to use something other than genai.Client, such
+    as video_generation.fake_veo.FakeVeoClient for offline runs. `timeout`
+    applies per job from its submission; jobs still waiting for a slot at
+    `deadline` (epoch seconds) are skipped without being submitted.
+    """
+    if client is None:
+        client = genai.Client(api_key=api_key)
+
+    slots = asyncio.Semaphore(max_in_flight)
+    tasks = [asyncio.create_task(_run_job(client, job, slots, timeout, api_key, deadline)) for job in jobs]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def generate_videos_batch(jobs: list, api_key: str = None, client=None,
+                          max_in_flight: int = 10, timeout: float = VEO_TIMEOUT_SECONDS,
+                          deadline: float = None) -> list:
+    """Blocking wrapper around generate_videos_async(); returns results in completion order."""
+    async def _collect():
+        return [result async for result in generate_videos_async(
+            jobs, api_key=api_key, client=client, max_in_flight=max_in_flight, timeout=timeout,
+            deadline=deadline
+        )]
+
+    return asyncio.run(_collect())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate several Veo 3 videos concurrently")
+    parser.add_argument("--prompts-file", required=True, help="Text file with one Veo 3 prompt per line")
+    parser.add_argument("--output-dir", required=True, help="Directory for generated MP4s")
+    parser.add_argument("--duration", type=int, default=8, help="Video duration (default: 8)")
+    parser.add_argument("--max-in-flight", type=int, default=10, help="Concurrent Veo operations (default: 10)")
+    parser.add_argument("--timeout", type=float, default=VEO_TIMEOUT_SECONDS,
+                        help=f"Per-video timeout in seconds (default: {VEO_TIMEOUT_SECONDS})")
+    parser.add_argument("--fake", action="store_true", help="Use the local fake Veo service (offline)")
+    args = parser.parse_args()
+
+    with open(args.prompts_file, "r", encoding="utf-8") as f:
+        prompts = [line.strip() for line in f if line.strip()]
+
+    jobs = [
+        {
+            "job_id": f"video_{i:03d}",
+            "veo3_prompt": prompt,
+            "output_path": os.path.join(args.output_dir, f"video_{i:03d}.mp4"),
+            "duration": args.duration,
+        }
+        for i, prompt in enumerate(prompts, start=1)
+    ]
+
+    client = None
+    if args.fake:
+        from video_generation.fake_veo import FakeVeoClient
+        client = FakeVeoClient()
+    elif not os.getenv("GEMINI_API_KEY"):
+        print("ERROR: GEMINI_API_KEY not set", file=sys.stderr, flush=True)
+        sys.exit(1)
+
+    async def _run():
+        succeeded = 0
+        async for result in generate_videos_async(
+            jobs, api_key=os.getenv("GEMINI_API_KEY"), client=client,
+            max_in_flight=args.max_in_flight, timeout=args.timeout
+        ):
+            if result["status"] == "success":
+                succeeded += 1
+                print(f"SUCCESS [{result['job_id']}] {result['video_path']} ({result['elapsed']}s)", flush=True)
+            else:
+                print(f"FAILED  [{result['job_id']}] {result['error']} ({result['elapsed']}s)", flush=True)
+        return succeeded
+
+    started = time.time()
+    succeeded = asyncio.run(_run())
+    print(f"\n{succeeded}/{len(jobs)} videos generated in {time.time() - started:.1f}s", flush=True)
+
+
+if __name__ == "__main__":
+    main()
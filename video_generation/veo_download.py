@@ -0,0 +1,234 @@
+"""
+Streaming, resumable download of finished Veo videos.
+
+client.files.download() + video.save() holds the whole MP4 in memory, and an
+interruption loses the render. download_video() streams the file URI in
+chunks to <output>.part and hashes the chunks as they are written. After a
+dropped connection it resumes with an HTTP Range request from the bytes
+already on disk. The source URI, total length and ETag are kept in
+<output>.part.json. A part file from a different URI, or one whose server
+copy changed (If-Range/ETag, length), is discarded instead of resumed. On
+completion the file is renamed into place atomically and its SHA-256 is
+written to <output>.sha256 (sha256sum format).
+
+Usage:
+    path, sha256 = save_generated_video(client, generated_video.video, "output/run/asmr_video.mp4", api_key)
+"""
+
+import os
+import json
+import time
+import hashlib
+
+import requests
+
+CHUNK_SIZE = 1024 * 1024
+MAX_ATTEMPTS = 5
+CONNECT_TIMEOUT = 15
+READ_TIMEOUT = 60
+
+
+def _hash_file(path: str, hasher=None):
+    """Feed an existing file into a hasher in chunks (used when resuming)."""
+    hasher = hasher or hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            hasher.update(chunk)
+    return hasher
+
+
+# Files kept next to a video: its checksum (write_checksum) and probe cache (video_probe)
+VIDEO_SIDECARS = (".sha256", ".probe.json")
+
+
+class _StalePart(Exception):
+    """The partial download does not belong to the current remote file."""
+
+
+def write_checksum(output_path: str, sha256: str):
+    with open(f"{output_path}.sha256", "w", encoding="utf-8") as f:
+        f.write(f"{sha256}  {os.path.basename(output_path)}\n")
+
+
+def read_checksum(video_path: str):
+    """SHA-256 recorded next to a video by download_video(), or None."""
+    try:
+        with open(f"{video_path}.sha256", "r", encoding="utf-8") as f:
+            return f.read().split()[0]
+    except (OSError, IndexError):
+        return None
+
+
+def move_video(src: str, dst: str):
+    """Rename a video into place together with its sidecars.
+
+    Sidecars left at dst by an earlier video are removed, so they cannot be
+    mistaken for the new file's.
+    """
+    os.replace(src, dst)
+    for suffix in VIDEO_SIDECARS:
+        try:
+            os.replace(f"{src}{suffix}", f"{dst}{suffix}")
+        except FileNotFoundError:
+            try:
+                os.remove(f"{dst}{suffix}")
+            except OSError:
+                pass
+
+
+def discard_video(path: str):
+    """Delete a video with its sidecars and any partial download of it."""
+    for file_path in (path, f"{path}.part", f"{path}.part.json",
+                      *(f"{path}{suffix}" for suffix in VIDEO_SIDECARS)):
+        try:
+            os.remove(file_path)
+        except OSError:
+            pass
+
+
+def _load_part_meta(part_path: str) -> dict:
+    try:
+        with open(f"{part_path}.json", "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_part_meta(part_path: str, meta: dict):
+    tmp_path = f"{part_path}.json.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, f"{part_path}.json")
+
+
+def _discard_part(part_path: str):
+    for path in (part_path, f"{part_path}.json"):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _response_total(response, offset: int):
+    """Full file length from Content-Range ("bytes a-b/total") or Content-Length, or None."""
+    content_range = response.headers.get("Content-Range", "")
+    if "/" in content_range and not content_range.endswith("/*"):
+        return int(content_range.rsplit("/", 1)[1])
+    length = response.headers.get("Content-Length")
+    return offset + int(length) if length is not None else None
+
+
+def _finish(part_path: str, output_path: str, sha256: str):
+    with open(part_path, "rb+") as f:
+        os.fsync(f.fileno())
+    os.replace(part_path, output_path)
+    _discard_part(part_path)
+    write_checksum(output_path, sha256)
+
+
+def download_video(uri: str, output_path: str, api_key: str = None, session=None,
+                   chunk_size: int = CHUNK_SIZE, max_attempts: int = MAX_ATTEMPTS,
+                   expected_sha256: str = None):
+    """Stream `uri` to output_path; returns (output_path, sha256).
+
+    A leftover <output>.part from an interrupted download of the same URI is
+    resumed too; any other part file is discarded.
+    """
+    session = session or requests.Session()
+    headers = {"x-goog-api-key": api_key} if api_key else {}
+    part_path = f"{output_path}.part"
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+
+    for attempt in range(1, max_attempts + 1):
+        meta = _load_part_meta(part_path)
+        if os.path.exists(part_path) and meta.get("uri") != uri:
+            print("Discarding a partial download from a different source", flush=True)
+            _discard_part(part_path)
+            meta = {}
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        hasher = _hash_file(part_path) if offset else hashlib.sha256()
+        request_headers = dict(headers)
+        if offset:
+            request_headers["Range"] = f"bytes={offset}-"
+            if meta.get("etag"):
+                # The server answers 200 with the whole file if its copy changed since the part was written
+                request_headers["If-Range"] = meta["etag"]
+        try:
+            with session.get(uri, headers=request_headers, stream=True,
+                             timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)) as response:
+                if response.status_code == 416 and offset:
+                    # "Content-Range: bytes */<length>" carries the server's current length
+                    content_range = response.headers.get("Content-Range", "")
+                    remote_total = int(content_range.rsplit("/", 1)[1]) if "/" in content_range else offset
+                    if meta.get("total") != offset or remote_total != offset:
+                        raise _StalePart(f"Range not satisfiable at {offset:,} bytes "
+                                         f"(expected {meta.get('total')} in total)")
+                    # Nothing left to fetch: the part file already holds the whole video
+                    total = offset
+                else:
+                    response.raise_for_status()
+                    if offset and response.status_code != 206:
+                        print("Server sent the whole file instead of the requested range, restarting download",
+                              flush=True)
+                        offset, hasher = 0, hashlib.sha256()
+                    total = _response_total(response, offset)
+                    etag = response.headers.get("ETag")
+                    if offset and ((meta.get("total") and total and total != meta["total"]) or
+                                   (etag and meta.get("etag") and etag != meta["etag"])):
+                        raise _StalePart("Remote file changed since the partial download")
+                    _save_part_meta(part_path, {"uri": uri, "total": total, "etag": etag or meta.get("etag")})
+                    if offset:
+                        print(f"Resuming download at {offset:,} bytes", flush=True)
+
+                    with open(part_path, "ab" if offset else "wb") as f:
+                        for chunk in response.iter_content(chunk_size=chunk_size):
+                            f.write(chunk)
+                            hasher.update(chunk)
+                            offset += len(chunk)
+
+            if total is not None and offset != total:
+                raise requests.ConnectionError(f"Download ended at {offset:,} of {total:,} bytes")
+        except _StalePart as e:
+            print(f"{e}, discarding the partial download", flush=True)
+            _discard_part(part_path)
+            if attempt == max_attempts:
+                raise requests.ConnectionError(str(e))
+            continue
+        except requests.RequestException as e:
+            status = getattr(getattr(e, "response", None), "status_code", None)
+            if status is not None and 400 <= status < 500 and status not in (408, 429):
+                raise
+            if attempt == max_attempts:
+                raise
+            wait = min(2 ** attempt, 30)
+            print(f"Download interrupted ({e}), retrying in {wait}s "
+                  f"[{attempt}/{max_attempts}]", flush=True)
+            time.sleep(wait)
+            continue
+
+        sha256 = hasher.hexdigest()
+        if expected_sha256 and sha256 != expected_sha256:
+            _discard_part(part_path)
+            raise ValueError(f"Checksum mismatch for {uri}: expected {expected_sha256}, got {sha256}")
+        _finish(part_path, output_path, sha256)
+        print(f"Downloaded {offset:,} bytes to {output_path} (sha256 {sha256[:12]})", flush=True)
+        return output_path, sha256
+
+
+def save_generated_video(client, video, output_path: str, api_key: str = None):
+    """Save a generated Veo video to output_path atomically; returns (output_path, sha256).
+
+    Remote videos with a URI are streamed with download_video(). Inline
+    videos (video_bytes, or test doubles without a URI) go through the
+    client's own download/save into a temp file, which is then renamed.
+    """
+    if getattr(video, "uri", None) and not getattr(video, "video_bytes", None):
+        return download_video(video.uri, output_path, api_key=api_key)
+
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    part_path = f"{output_path}.part"
+    client.files.download(file=video)
+    video.save(part_path)
+    sha256 = _hash_file(part_path).hexdigest()
+    _finish(part_path, output_path, sha256)
+    return output_path, sha256
@@ -0,0 +1,242 @@
+"""
+Single-pass video probe shared by generation and upload.
+
+probe_video() reads an MP4's container metadata (duration, resolution, frame
+count, frame rate, codecs) straight from the moov box without decoding. With
+motion=True it also decodes a few evenly spaced frames with OpenCV, scores
+how much they differ and keeps a perceptual difference hash (dHash) of each,
+which the upload ledger uses to spot re-renders of an uploaded video. The result is stored next to the video as
+<video>.probe.json, keyed by file size and mtime. Later callers (upload
+validation, logging) reuse the sidecar, so the upload process never imports
+cv2 or decodes the video again.
+
+Usage:
+    probe = probe_video("output/run/asmr_video.mp4", motion=True)   # generation
+    probe = probe_video(video_path)                                  # upload: sidecar or container only
+    for problem in probe.shorts_issues():
+        print(problem)
+"""
+
+import os
+import json
+import struct
+
+# Boxes whose children are boxes (the path down to the track metadata)
+_CONTAINERS = {b"moov", b"trak", b"mdia", b"minf", b"stbl", b"edts"}
+MOTION_SAMPLES = 8
+# Median mean-absolute-difference between sampled frames, as a fraction of 255
+MOTION_THRESHOLD = 0.002
+# dHash grid: HASH_SIZE x HASH_SIZE bits per sampled frame
+HASH_SIZE = 16
+
+
+class VideoProbe:
+    """Container metadata and optional motion score of one video file."""
+
+    FIELDS = ("path", "size", "mtime_ns", "duration", "width", "height", "frame_count", "fps",
+              "video_codec", "has_audio", "motion_score", "frame_hashes")
+
+    def __init__(self, **values):
+        for field in self.FIELDS:
+            setattr(self, field, values.get(field))
+
+    @property
+    def has_motion(self):
+        """True/False from the sampled motion score, None if it was not measured."""
+        if self.motion_score is None:
+            return None
+        return self.motion_score > MOTION_THRESHOLD
+
+    def to_dict(self) -> dict:
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    def shorts_issues(self) -> list:
+        """Problems that keep the video out of the Shorts feed (empty if it qualifies)."""
+        issues = []
+        if not self.width or not self.height:
+            return ["Could not read the video resolution"]
+        if self.height <= self.width:
+            issues.append(f"Video is NOT portrait ({self.width}x{self.height})")
+        elif not 1.5 < self.height / self.width < 2.0:
+            issues.append(f"Aspect ratio not ideal for Shorts ({self.height / self.width:.2f})")
+        if self.duration and self.duration > 60:
+            issues.append(f"Video too long for Shorts ({self.duration:.0f}s > 60s)")
+        return issues
+
+
+def _boxes(f, start: int, end: int):
+    """Yield (type, payload_start, box_end) for the boxes in [start, end)."""
+    offset = start
+    while offset + 8 <= end:
+        f.seek(offset)
+        size, box_type = struct.unpack(">I4s", f.read(8))
+        header = 8
+        if size == 1:
+            size = struct.unpack(">Q", f.read(8))[0]
+            header = 16
+        elif size == 0:
+            size = end - offset
+        if size < header:
+            return
+        yield box_type, offset + header, offset + size
+        offset += size
+
+
+def _full_box(f, start: int, length: int):
+    """(version, payload bytes) of a FullBox starting at `start`."""
+    f.seek(start)
+    data = f.read(length)
+    return data[0], data[4:]
+
+
+def _parse_track(f, start: int, end: int, track: dict):
+    for box_type, payload, box_end in _boxes(f, start, end):
+        if box_type in _CONTAINERS:
+            _parse_track(f, payload, box_end, track)
+        elif box_type == b"tkhd":
+            version, data = _full_box(f, payload, box_end - payload)
+            # width/height are 16.16 fixed point at the end of the box
+            track["width"], track["height"] = (v >> 16 for v in struct.unpack(">II", data[-8:]))
+        elif box_type == b"mdhd":
+            version, data = _full_box(f, payload, 36)
+            if version == 1:
+                track["timescale"], track["duration"] = struct.unpack(">IQ", data[16:28])
+            else:
+                track["timescale"], track["duration"] = struct.unpack(">II", data[8:16])
+        elif box_type == b"hdlr":
+            _, data = _full_box(f, payload, 12)
+            track["handler"] = data[4:8]
+        elif box_type == b"stsd":
+            _, data = _full_box(f, payload, 16)
+            track["codec"] = data[8:12].decode("ascii", "replace")
+        elif box_type == b"stsz":
+            _, data = _full_box(f, payload, 12)
+            track["samples"] = struct.unpack(">I", data[4:8])[0]
+
+
+def read_mp4_metadata(path: str) -> dict:
+    """Duration, resolution, frame count/rate and codecs from the MP4 moov box (no decoding)."""
+    meta = {"duration": None, "width": None, "height": None, "frame_count": None, "fps": None,
+            "video_codec": None, "has_audio": False}
+    with open(path, "rb") as f:
+        file_end = f.seek(0, os.SEEK_END)
+        for box_type, payload, box_end in _boxes(f, 0, file_end):
+            if box_type != b"moov":
+                continue
+            for child, child_payload, child_end in _boxes(f, payload, box_end):
+                if child == b"mvhd":
+                    version, data = _full_box(f, child_payload, 36)
+                    timescale, duration = (struct.unpack(">IQ", data[16:28]) if version == 1
+                                           else struct.unpack(">II", data[8:16]))
+                    if timescale:
+                        meta["duration"] = duration / timescale
+                elif child == b"trak":
+                    track = {}
+                    _parse_track(f, child_payload, child_end, track)
+                    if track.get("handler") == b"soun":
+                        meta["has_audio"] = True
+                    elif track.get("handler") == b"vide" and meta["width"] is None:
+                        meta["width"], meta["height"] = track.get("width"), track.get("height")
+                        meta["video_codec"] = track.get("codec")
+                        meta["frame_count"] = track.get("samples")
+                        if track.get("timescale") and track.get("duration") and track.get("samples"):
+                            seconds = track["duration"] / track["timescale"]
+                            meta["fps"] = round(track["samples"] / seconds, 3)
+            break
+    return meta
+
+
+def sample_frames(path: str, samples: int = MOTION_SAMPLES) -> list:
+    """Up to `samples` evenly spaced BGR frames, downscaled to 90x160."""
+    import cv2
+    import numpy as np
+
+    cap = cv2.VideoCapture(path)
+    frames = []
+    try:
+        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        if frame_count < 1:
+            return frames
+        for index in np.linspace(0, frame_count - 1, min(samples, frame_count)).astype(int):
+            cap.set(cv2.CAP_PROP_POS_FRAMES, int(index))
+            ok, frame = cap.read()
+            if ok:
+                frames.append(cv2.resize(frame, (90, 160), interpolation=cv2.INTER_AREA))
+    finally:
+        cap.release()
+    return frames
+
+
+def frame_dhash(frame, hash_size: int = HASH_SIZE) -> str:
+    """Difference hash of a BGR frame as hex: one bit per horizontally adjacent pixel pair."""
+    import cv2
+    import numpy as np
+
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(gray, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return np.packbits(bits).tobytes().hex()
+
+
+def _motion(frames):
+    import numpy as np
+
+    if len(frames) < 2:
+        return None
+    frames = [frame.astype(np.int16) for frame in frames]
+    diffs = [np.abs(a - b).mean() / 255 for a, b in zip(frames, frames[1:])]
+    return round(float(np.median(diffs)), 5)
+
+
+def motion_score(path: str, samples: int = MOTION_SAMPLES):
+    """Median mean-absolute difference between evenly spaced frames (0-1), or None if unreadable."""
+    return _motion(sample_frames(path, samples))
+
+
+def _sidecar(path: str) -> str:
+    return f"{path}.probe.json"
+
+
+def load_probe(path: str):
+    """The sidecar probe if it still matches the file (same size and mtime), else None."""
+    try:
+        with open(_sidecar(path), "r", encoding="utf-8") as f:
+            probe = VideoProbe(**json.load(f))
+        stat = os.stat(path)
+    except (OSError, ValueError, TypeError):
+        return None
+    if probe.size != stat.st_size or probe.mtime_ns != stat.st_mtime_ns:
+        return None
+    return probe
+
+
+def probe_video(path: str, motion: bool = False) -> VideoProbe:
+    """Probe a video once and cache the result next to it.
+
+    motion=True also measures the motion score and frame hashes (decodes a
+    few frames with cv2) unless the sidecar already has them.
+    """
+    probe = load_probe(path)
+    if probe is not None and (not motion or probe.frame_hashes is not None):
+        return probe
+
+    stat = os.stat(path)
+    values = probe.to_dict() if probe is not None else read_mp4_metadata(path)
+    values.update(path=str(path), size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+    if motion:
+        try:
+            frames = sample_frames(path)
+            values["motion_score"] = _motion(frames)
+            values["frame_hashes"] = [frame_dhash(frame) for frame in frames]
+        except Exception as e:
+            print(f"Could not measure motion: {e}", flush=True)
+    probe = VideoProbe(**values)
+
+    tmp_path = f"{_sidecar(path)}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(probe.to_dict(), f, indent=2)
+        os.replace(tmp_path, _sidecar(path))
+    except OSError as e:
+        print(f"Could not save probe sidecar: {e}", flush=True)
+    return probe
@@ -0,0 +1,265 @@
+"""
+Per-channel OAuth credential pool with proactive background refresh.
+
+Each channel's authorized-user token lives in video_upload/tokens/<channel>.json
+and is loaded once per process. Callers share the same in-memory Credentials
+object per channel. A daemon thread refreshes each token REFRESH_MARGIN
+seconds before it expires and writes it back atomically (temp file +
+os.replace), so uploads never wait on a refresh round trip. get() takes no
+lock when the token is loaded and fresh. Loading, refreshing and authorizing
+hold a lock for that channel only, so uploaders on other channels keep going.
+
+The legacy video_upload/token.pickle is migrated to the "default" channel on
+first use. A named channel without a token of its own raises
+CredentialsMissing, so a video meant for one account is never published to
+another by accident. Set BLISS_SHARE_DEFAULT_TOKEN=1 (or pass
+allow_shared=True) to let such channels publish with the default token; a
+warning is printed once per channel.
+
+Usage:
+    credentials = get_credential_manager().get("rain_channel")
+    session = AuthorizedSession(credentials)
+
+    python video_upload/credentials.py --authorize rain_channel   # one-time browser consent
+    python video_upload/credentials.py --list
+"""
+
+import os
+import sys
+import json
+import time
+import pickle
+import argparse
+import datetime
+import threading
+from pathlib import Path
+
+from google.auth.exceptions import RefreshError
+from google.auth.transport.requests import Request
+from google.oauth2.credentials import Credentials
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from video_upload.upload_queue import DEFAULT_CHANNEL
+
+SCOPES = ['https://www.googleapis.com/auth/youtube.upload']
+SCRIPT_DIR = Path(__file__).resolve().parent
+TOKEN_DIR = SCRIPT_DIR / "tokens"
+CLIENT_SECRETS_FILE = SCRIPT_DIR / "youtube_credentials.json"
+LEGACY_TOKEN_FILE = SCRIPT_DIR / "token.pickle"
+REFRESH_MARGIN = 10 * 60       # refresh this long before expiry (access tokens last an hour)
+MAX_IDLE_SECONDS = 15 * 60     # refresher wake-up interval when nothing is due
+RETRY_SECONDS = 60             # wait after a failed background refresh
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+class CredentialsMissing(Exception):
+    """No token for the channel and no client secrets to authorize one."""
+
+    status = 401  # the upload queue treats it like an HTTP 401: fatal until someone authorizes the channel
+
+
+def _utcnow() -> datetime.datetime:
+    # google.auth keeps expiry as a naive UTC datetime
+    return datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+
+
+def _seconds_left(credentials) -> float:
+    if credentials.expiry is None:
+        return float("inf")
+    return (credentials.expiry - _utcnow()).total_seconds()
+
+
+class CredentialManager:
+    """In-memory pool of per-channel OAuth credentials, refreshed ahead of expiry."""
+
+    def __init__(self, token_dir=TOKEN_DIR, client_secrets=CLIENT_SECRETS_FILE,
+                 refresh_margin: float = REFRESH_MARGIN, allow_shared: bool = False):
+        self.token_dir = Path(token_dir)
+        self.client_secrets = Path(client_secrets)
+        self.refresh_margin = refresh_margin
+        self.allow_shared = allow_shared
+        self._shared_warned = set()
+        self._credentials = {}     # channel -> Credentials (read without locking)
+        self._locks = {}           # channel -> Lock guarding load/refresh/save
+        self._locks_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._refresher = None
+
+    # -- storage -------------------------------------------------------------
+
+    def token_path(self, channel: str) -> Path:
+        return self.token_dir / f"{channel}.json"
+
+    def channels(self) -> list:
+        """Channels with a stored token."""
+        if not self.token_dir.exists():
+            return []
+        return sorted(path.stem for path in self.token_dir.glob("*.json"))
+
+    def has_token(self, channel: str) -> bool:
+        return channel in self._credentials or self.token_path(channel).exists()
+
+    def resolve(self, channel: str = None) -> str:
+        """The channel whose token to use: its own, or the default one if sharing is allowed.
+
+        Raises CredentialsMissing for a named channel without a token unless
+        allow_shared is set.
+        """
+        if not channel or channel == DEFAULT_CHANNEL or self.has_token(channel):
+            return channel or DEFAULT_CHANNEL
+        if not self.allow_shared:
+            raise CredentialsMissing(
+                f"No OAuth token for channel '{channel}'. Authorize it with "
+                f"'python video_upload/credentials.py --authorize {channel}', or set "
+                f"BLISS_SHARE_DEFAULT_TOKEN=1 to publish it with the default channel's token"
+            )
+        if channel not in self._shared_warned:
+            self._shared_warned.add(channel)
+            print(f"WARNING: channel '{channel}' has no token of its own, "
+                  f"publishing with the '{DEFAULT_CHANNEL}' channel's token", flush=True)
+        return DEFAULT_CHANNEL
+
+    def _save(self, channel: str, credentials):
+        self.token_dir.mkdir(parents=True, exist_ok=True)
+        path = self.token_path(channel)
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(credentials.to_json())
+        os.chmod(tmp_path, 0o600)
+        os.replace(tmp_path, path)
+
+    def _load(self, channel: str):
+        path = self.token_path(channel)
+        if path.exists():
+            with open(path, "r", encoding="utf-8") as f:
+                return Credentials.from_authorized_user_info(json.load(f), SCOPES)
+        if channel == DEFAULT_CHANNEL and LEGACY_TOKEN_FILE.exists():
+            with open(LEGACY_TOKEN_FILE, 'rb') as token:
+                credentials = pickle.load(token)
+            print(f"Migrating {LEGACY_TOKEN_FILE.name} to {path}", flush=True)
+            self._save(channel, credentials)
+            return credentials
+        return None
+
+    # -- credentials ---------------------------------------------------------
+
+    def _lock(self, channel: str) -> threading.Lock:
+        lock = self._locks.get(channel)
+        if lock is None:
+            with self._locks_lock:
+                lock = self._locks.setdefault(channel, threading.Lock())
+        return lock
+
+    def _refresh(self, channel: str, credentials):
+        credentials.refresh(Request())
+        self._save(channel, credentials)
+        print(f"Refreshed OAuth token for channel {channel}", flush=True)
+
+    def authorize(self, channel: str):
+        """Run the browser consent flow for a channel and store its token."""
+        from google_auth_oauthlib.flow import InstalledAppFlow
+
+        if not self.client_secrets.exists():
+            raise CredentialsMissing(f"YouTube client secrets not found at: {self.client_secrets}")
+        flow = InstalledAppFlow.from_client_secrets_file(str(self.client_secrets), SCOPES)
+
+        # Note for unverified app
+        print("Note: App not verified by Google yet.")
+        print("Click 'Advanced' then 'Go to Bliss Builder Desktop (unsafe)' to proceed.")
+        print(f"Sign in with the Google account that owns channel '{channel}'.", flush=True)
+
+        credentials = flow.run_local_server(port=0)
+        self._save(channel, credentials)
+        self._credentials[channel] = credentials
+        self._start_refresher()
+        return credentials
+
+    def get(self, channel: str = DEFAULT_CHANNEL):
+        """Valid credentials for a channel (the same object on every call).
+
+        The fast path is a dict read. The token is loaded from disk on first use,
+        refreshed synchronously only if the background refresher has not kept
+        it fresh, and authorized in the browser if the channel has no token.
+        """
+        credentials = self._credentials.get(channel)
+        if credentials is not None and credentials.valid and _seconds_left(credentials) > self.refresh_margin / 2:
+            return credentials
+
+        with self._lock(channel):
+            credentials = self._credentials.get(channel) or self._load(channel)
+            if credentials is None:
+                return self.authorize(channel)
+            if not credentials.valid or _seconds_left(credentials) <= self.refresh_margin / 2:
+                if not credentials.refresh_token:
+                    return self.authorize(channel)
+                self._refresh(channel, credentials)
+            self._credentials[channel] = credentials
+        self._start_refresher()
+        return credentials
+
+    # -- background refresh --------------------------------------------------
+
+    def _start_refresher(self):
+        if self._refresher is None or not self._refresher.is_alive():
+            with self._locks_lock:
+                if self._refresher is None or not self._refresher.is_alive():
+                    self._refresher = threading.Thread(target=self._refresh_loop, name="oauth-refresher",
+                                                       daemon=True)
+                    self._refresher.start()
+        self._wake.set()
+
+    def _refresh_loop(self):
+        retry_at = {}   # channel -> monotonic time before which a failed refresh is not retried
+        while True:
+            self._wake.clear()
+            next_check = MAX_IDLE_SECONDS
+            for channel, credentials in list(self._credentials.items()):
+                due_in = _seconds_left(credentials) - self.refresh_margin
+                if due_in <= 0 and credentials.refresh_token:
+                    if retry_at.get(channel, 0) > time.monotonic():
+                        next_check = min(next_check, RETRY_SECONDS)
+                        continue
+                    try:
+                        with self._lock(channel):
+                            if _seconds_left(credentials) - self.refresh_margin <= 0:
+                                self._refresh(channel, credentials)
+                        retry_at.pop(channel, None)
+                        due_in = _seconds_left(credentials) - self.refresh_margin
+                    except (RefreshError, OSError) as e:
+                        print(f"Background token refresh failed for {channel}: {e}", flush=True)
+                        retry_at[channel] = time.monotonic() + RETRY_SECONDS
+                        due_in = RETRY_SECONDS
+                next_check = min(next_check, max(1.0, due_in))
+            self._wake.wait(next_check)
+
+
+def get_credential_manager() -> CredentialManager:
+    """Process-wide credential manager; BLISS_SHARE_DEFAULT_TOKEN=1 enables allow_shared."""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = CredentialManager(
+                allow_shared=os.getenv("BLISS_SHARE_DEFAULT_TOKEN", "").lower() in ("1", "true", "yes"))
+        return _manager
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage per-channel YouTube OAuth tokens")
+    parser.add_argument("--authorize", metavar="CHANNEL", help="Run the consent flow and store the channel's token")
+    parser.add_argument("--list", action="store_true", help="List channels with stored tokens")
+    args = parser.parse_args()
+
+    manager = get_credential_manager()
+    if args.authorize:
+        manager.authorize(args.authorize)
+        print(f"Stored token for channel {args.authorize} in {manager.token_path(args.authorize)}")
+    if args.list or not args.authorize:
+        for channel in manager.channels():
+            print(channel)
+
+
+if __name__ == "__main__":
+    main()
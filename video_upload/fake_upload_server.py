@@ -0,0 +1,181 @@
+"""
+Fake YouTube resumable upload server - Bliss Builder
+
+Local HTTP stand-in for the videos.insert resumable upload endpoint, so the
+upload engine can be exercised offline without OAuth or quota. It implements
+session creation, chunk PUTs with 308 Resume Incomplete / Range replies, and
+status queries. Chunks can be made to fail part-way at random: the server
+keeps an aligned prefix of the chunk and answers 503, as an interrupted
+transfer would look to the client. An optional bandwidth cap makes adaptive
+chunk sizing observable.
+
+Usage:
+    from video_upload.fake_upload_server import FakeUploadServer
+    with FakeUploadServer(failure_rate=0.2, seed=1) as server:
+        ResumableUpload(path, body, requests.Session(), upload_url=server.upload_url).run()
+        print(server.bytes_received, server.completed)
+
+    python video_upload/fake_upload_server.py --port 8765 --failure-rate 0.1
+"""
+
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+ALIGNMENT = 256 * 1024
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status: int, body: dict = None, headers: dict = None):
+        payload = json.dumps(body).encode("utf-8") if body is not None else b""
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _read_body(self) -> bytes:
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def do_POST(self):
+        fake = self.server.fake
+        parsed = urlparse(self.path)
+        if "uploadType=resumable" not in parsed.query:
+            return self._reply(400, {"error": "only resumable uploads are supported"})
+        body = json.loads(self._read_body() or b"{}")
+        session_id = fake.create_session(int(self.headers["X-Upload-Content-Length"]), body)
+        self._reply(200, headers={"Location": f"{fake.base_url}/upload/session/{session_id}"})
+
+    def do_PUT(self):
+        fake = self.server.fake
+        session_id = self.path.rsplit("/", 1)[-1]
+        content_range = self.headers.get("Content-Range", "")
+        data = self._read_body()
+        status, body, headers = fake.put(session_id, content_range, data)
+        self._reply(status, body, headers)
+
+
+class FakeUploadServer:
+    """Threaded local resumable-upload endpoint; use as a context manager."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, failure_rate: float = 0.0,
+                 seed: int = None, bandwidth: float = None):
+        self.failure_rate = failure_rate
+        self.bandwidth = bandwidth  # bytes/second, None for unlimited
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.sessions = {}
+        self.completed = {}       # video id -> sha256 of the received file
+        self.bytes_received = 0   # every byte accepted, counting re-sends
+        self.chunks = []          # size of every chunk PUT, in order
+        self._httpd = ThreadingHTTPServer((host, port), _Handler)
+        self._httpd.fake = self
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def upload_url(self) -> str:
+        return f"{self.base_url}/upload/youtube/v3/videos"
+
+    def create_session(self, total: int, body: dict) -> str:
+        with self._lock:
+            session_id = f"s{len(self.sessions) + 1:04d}"
+            self.sessions[session_id] = {"total": total, "body": body, "data": bytearray()}
+        return session_id
+
+    def expire(self, session_id: str = None):
+        """Drop a session (or all), so the client sees 404 like an expired session URI."""
+        with self._lock:
+            for key in [session_id] if session_id else list(self.sessions):
+                self.sessions.pop(key, None)
+
+    def put(self, session_id: str, content_range: str, data: bytes):
+        with self._lock:
+            session = self.sessions.get(session_id)
+        if session is None:
+            return 404, {"error": "session not found"}, None
+
+        received = len(session["data"])
+        spec, _, total = content_range.replace("bytes ", "").partition("/")
+        if spec != "*":
+            start, end = (int(v) for v in spec.split("-"))
+            if self.bandwidth:
+                time.sleep(len(data) / self.bandwidth)
+            with self._lock:
+                self.chunks.append(len(data))
+                if start != received:
+                    return 308, None, self._range(received)
+                failing = self._random.random() < self.failure_rate
+                if failing:
+                    # Keep an aligned prefix of the chunk, as if the connection dropped mid-transfer
+                    data = data[:len(data) // 2 // ALIGNMENT * ALIGNMENT]
+                session["data"] += data
+                self.bytes_received += len(data)
+                received = len(session["data"])
+            if failing:
+                return 503, {"error": "simulated backend error"}, None
+
+        if received >= session["total"]:
+            video_id = "fake_" + hashlib.sha256(bytes(session["data"])).hexdigest()[:11]
+            with self._lock:
+                self.completed[video_id] = hashlib.sha256(bytes(session["data"])).hexdigest()
+            return 200, {"id": video_id, "snippet": session["body"].get("snippet", {}),
+                         "status": session["body"].get("status", {})}, None
+        return 308, None, self._range(received)
+
+    @staticmethod
+    def _range(received: int) -> dict:
+        return {"Range": f"bytes=0-{received - 1}"} if received else {}
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local fake YouTube resumable upload server")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on (default: 8765)")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of chunks that fail part-way")
+    parser.add_argument("--bandwidth", type=float, help="Simulated link speed in bytes/second")
+    args = parser.parse_args()
+
+    server = FakeUploadServer(port=args.port, failure_rate=args.failure_rate, bandwidth=args.bandwidth)
+    print(f"Fake upload endpoint: {server.upload_url}", flush=True)
+    server.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
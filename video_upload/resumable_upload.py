@@ -0,0 +1,237 @@
+"""
+Resumable upload engine for YouTube videos.insert.
+
+Speaks the resumable upload protocol directly over a requests-style session
+(google.auth's AuthorizedSession for YouTube, a plain requests.Session for
+the fake server):
+
+    POST <upload_url>?uploadType=resumable   -> session URI (Location header)
+    PUT  <session URI> Content-Range: bytes a-b/total   -> 308 + Range, or 200/201 when done
+    PUT  <session URI> Content-Range: bytes */total     -> 308 + Range (status query)
+
+The session URI is persisted next to the video in <video>.upload_session.json.
+A failed chunk, or a later retry of the whole upload (for example by the
+upload agent), asks the server for the last acknowledged byte and continues
+from there. A session that expires mid-upload is restarted from byte 0 at
+most MAX_SESSION_RESTARTS times per run, since every new session is charged
+as a new videos.insert. Chunks start at 1 MiB and are resized after every chunk toward
+TARGET_CHUNK_SECONDS of measured throughput, in multiples of 256 KiB.
+Uploads share no state, so several can run in parallel threads.
+
+Usage:
+    upload = ResumableUpload(video_path, body, AuthorizedSession(credentials))
+    video = upload.run()      # videos.insert response resource, e.g. video["id"]
+"""
+
+import os
+import json
+import time
+
+YOUTUBE_UPLOAD_URL = "https://www.googleapis.com/upload/youtube/v3/videos"
+CHUNK_ALIGNMENT = 256 * 1024
+INITIAL_CHUNK_SIZE = 1024 * 1024
+MAX_CHUNK_SIZE = 64 * 1024 * 1024
+TARGET_CHUNK_SECONDS = 4.0
+MAX_RETRIES = 8
+MAX_SESSION_RESTARTS = 1         # each new session charges videos.insert quota again
+SESSION_MAX_AGE = 6 * 24 * 3600  # YouTube keeps resumable sessions for about a week
+REQUEST_TIMEOUT = (15, 120)
+
+
+class UploadError(Exception):
+    """Non-retryable upload failure; `status` and `content` come from the HTTP response."""
+
+    def __init__(self, message: str, status: int = None, content: str = ""):
+        super().__init__(message)
+        self.status = status
+        self.content = content
+
+
+class SessionExpired(Exception):
+    """The saved session URI is gone (404/410); a new session is needed."""
+
+
+def next_chunk_size(current: int, sent: int, seconds: float) -> int:
+    """Chunk size for TARGET_CHUNK_SECONDS at the measured rate, at most doubling or halving per step."""
+    if seconds <= 0 or sent <= 0:
+        return current
+    target = sent / seconds * TARGET_CHUNK_SECONDS
+    target = max(current // 2, min(current * 2, target))
+    aligned = int(target) // CHUNK_ALIGNMENT * CHUNK_ALIGNMENT
+    return max(CHUNK_ALIGNMENT, min(MAX_CHUNK_SIZE, aligned))
+
+
+def _acknowledged(response) -> int:
+    """Bytes the server has, from a 308 response's Range header ("bytes=0-N")."""
+    value = response.headers.get("Range")
+    if not value:
+        return 0
+    return int(value.rsplit("-", 1)[1]) + 1
+
+
+class ResumableUpload:
+    """One video upload on one resumable session, resumed across failures and retries."""
+
+    def __init__(self, video_path: str, body: dict, session, upload_url: str = YOUTUBE_UPLOAD_URL,
+                 part: str = "snippet,status", mimetype: str = "video/mp4",
+                 chunk_size: int = INITIAL_CHUNK_SIZE, max_retries: int = MAX_RETRIES, on_new_session=None):
+        self.video_path = str(video_path)
+        self.body = body
+        self.session = session
+        self.upload_url = upload_url
+        self.part = part
+        self.mimetype = mimetype
+        self.chunk_size = chunk_size
+        self.max_retries = max_retries
+        self.on_new_session = on_new_session  # called before a session is created (e.g. quota charge)
+        self.total = os.path.getsize(self.video_path)
+        self.state_path = f"{self.video_path}.upload_session.json"
+        self.session_uri = None
+
+    # -- session persistence -------------------------------------------------
+
+    def _file_key(self) -> dict:
+        stat = os.stat(self.video_path)
+        return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+    def _load_session(self):
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if state.get("file") != self._file_key() or time.time() - state.get("created_at", 0) > SESSION_MAX_AGE:
+            return None
+        return state.get("session_uri")
+
+    def _save_session(self):
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"session_uri": self.session_uri, "file": self._file_key(),
+                       "created_at": time.time()}, f, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    def _clear_session(self):
+        self.session_uri = None
+        try:
+            os.remove(self.state_path)
+        except OSError:
+            pass
+
+    # -- protocol ------------------------------------------------------------
+
+    def _raise_for(self, response, action: str):
+        content = response.text[:2000]
+        if response.status_code in (404, 410):
+            raise SessionExpired(f"Upload session expired during {action}")
+        raise UploadError(f"{action} failed with HTTP {response.status_code}: {content[:300]}",
+                          response.status_code, content)
+
+    def _start_session(self):
+        if self.on_new_session is not None:
+            self.on_new_session()
+        response = self.session.post(
+            self.upload_url,
+            params={"uploadType": "resumable", "part": self.part},
+            json=self.body,
+            headers={"X-Upload-Content-Length": str(self.total), "X-Upload-Content-Type": self.mimetype},
+            timeout=REQUEST_TIMEOUT,
+        )
+        if response.status_code != 200 or "Location" not in response.headers:
+            self._raise_for(response, "Session start")
+        self.session_uri = response.headers["Location"]
+        self._save_session()
+        print(f"Upload session started ({self.total:,} bytes)", flush=True)
+
+    def _query_offset(self):
+        """(acknowledged bytes, finished resource or None) for the current session."""
+        response = self.session.put(self.session_uri, headers={"Content-Range": f"bytes */{self.total}"},
+                                    timeout=REQUEST_TIMEOUT)
+        if response.status_code in (200, 201):
+            return self.total, response.json()
+        if response.status_code == 308:
+            return _acknowledged(response), None
+        if response.status_code >= 500:
+            raise ConnectionError(f"Status query failed with HTTP {response.status_code}")
+        self._raise_for(response, "Status query")
+
+    def _send_chunk(self, f, offset: int):
+        """Send one chunk from offset; returns (new offset, finished resource or None)."""
+        length = min(self.chunk_size, self.total - offset)
+        f.seek(offset)
+        data = f.read(length)
+        started = time.monotonic()
+        response = self.session.put(
+            self.session_uri, data=data,
+            headers={"Content-Range": f"bytes {offset}-{offset + length - 1}/{self.total}",
+                     "Content-Type": self.mimetype},
+            timeout=REQUEST_TIMEOUT,
+        )
+        elapsed = time.monotonic() - started
+        if response.status_code in (200, 201):
+            return self.total, response.json()
+        if response.status_code == 308:
+            acknowledged = _acknowledged(response)
+            self.chunk_size = next_chunk_size(self.chunk_size, acknowledged - offset, elapsed)
+            return acknowledged, None
+        if response.status_code >= 500 or response.status_code == 429:
+            raise ConnectionError(f"Chunk upload failed with HTTP {response.status_code}")
+        self._raise_for(response, "Chunk upload")
+
+    def run(self) -> dict:
+        """Upload (or finish uploading) the video; returns the videos.insert response resource."""
+        self.session_uri = self._load_session()
+        offset, result = 0, None
+        if self.session_uri:
+            try:
+                offset, result = self._query_offset()
+                print(f"Resuming upload session at {offset:,} / {self.total:,} bytes", flush=True)
+            except (SessionExpired, OSError) as e:
+                print(f"Saved upload session unusable ({e}), starting a new one", flush=True)
+                self._clear_session()
+        if not self.session_uri:
+            self._start_session()
+
+        failures = 0
+        restarts = 0
+        last_progress = -1
+        resync = False
+        with open(self.video_path, "rb") as f:
+            while result is None:
+                try:
+                    if resync:
+                        # Continue from the last byte the server acknowledged
+                        offset, result = self._query_offset()
+                        resync = False
+                        if result is not None:
+                            break
+                    offset, result = self._send_chunk(f, offset)
+                    failures = 0
+                except SessionExpired as e:
+                    self._clear_session()
+                    restarts += 1
+                    if restarts > MAX_SESSION_RESTARTS:
+                        raise UploadError(f"{e}; gave up after {MAX_SESSION_RESTARTS} session restart(s)", 410)
+                    print(f"Upload session expired, restarting from byte 0 "
+                          f"[{restarts}/{MAX_SESSION_RESTARTS}]", flush=True)
+                    self._start_session()
+                    offset, resync = 0, False
+                    continue
+                except OSError as e:
+                    # Connection errors, timeouts (requests' exceptions are OSErrors) and 5xx/429
+                    failures += 1
+                    if failures > self.max_retries:
+                        raise
+                    wait = min(2 ** failures, 60)
+                    print(f"Upload interrupted ({e}), resuming in {wait}s [{failures}/{self.max_retries}]", flush=True)
+                    time.sleep(wait)
+                    resync = True
+                    continue
+
+                progress = int(offset * 100 / self.total) if self.total else 100
+                if progress != last_progress:
+                    print(f"Upload progress: {progress}% (chunk {self.chunk_size // 1024} KiB)", flush=True)
+                    last_progress = progress
+
+        self._clear_session()
+        return result
@@ -0,0 +1,174 @@
+"""
+Upload ledger: remembers what each channel has published, keyed by content.
+
+Every successful upload is recorded in output/upload_ledger.db with the
+file's SHA-256 and the perceptual frame hashes from its probe sidecar.
+Before uploading, upload_youtube_short() asks the ledger whether the channel
+already has this content and returns the existing video instead of spending
+1600 quota units and the upload bandwidth again. Two cases count as the same
+content:
+- the same bytes (same SHA-256), e.g. an n8n retry after an upload that
+  succeeded but timed out, or byte-identical fallback slides
+- a visual near-match for the same theme: the sampled frames' dHashes differ
+  by at most PERCEPTUAL_THRESHOLD bits on average, e.g. a re-render
+
+The SHA-256 comes from the <video>.sha256 sidecar written by veo_download
+when it is newer than the video. Otherwise the file is hashed in chunks and
+the sidecar is written for next time. Frame hashes are only present when
+generation probed the video with motion=True. Without them only exact
+matches are found.
+
+Usage:
+    ledger = get_upload_ledger()
+    match = ledger.find(video_path, channel="default", theme="gentle rain")
+    if match is None:
+        ...upload...
+        ledger.record(video_path, response["id"], channel="default", theme="gentle rain")
+"""
+
+import os
+import sys
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from video_generation.veo_download import read_checksum, write_checksum
+from video_generation.video_probe import load_probe
+
+UPLOAD_LEDGER_DB = Path(__file__).resolve().parent.parent / "output" / "upload_ledger.db"
+CHUNK_SIZE = 1024 * 1024
+# Mean differing bits per sampled frame (of video_probe.HASH_SIZE ** 2 = 256) for a visual match
+PERCEPTUAL_THRESHOLD = 12
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS uploads (
+    video_id     TEXT PRIMARY KEY,
+    channel      TEXT NOT NULL,
+    sha256       TEXT NOT NULL,
+    size         INTEGER NOT NULL,
+    duration     REAL,
+    frame_hashes TEXT,
+    theme        TEXT,
+    video_url    TEXT,
+    uploaded_at  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_uploads_channel_sha256 ON uploads (channel, sha256);
+"""
+
+_ledger = None
+_ledger_lock = threading.Lock()
+
+
+def file_sha256(path: str) -> str:
+    """SHA-256 of a file, from its .sha256 sidecar when that is newer than the file."""
+    try:
+        if os.path.getmtime(f"{path}.sha256") >= os.path.getmtime(path):
+            recorded = read_checksum(path)
+            if recorded:
+                return recorded
+    except OSError:
+        pass
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            hasher.update(chunk)
+    sha256 = hasher.hexdigest()
+    try:
+        write_checksum(path, sha256)
+    except OSError:
+        pass  # the sidecar only saves re-hashing next time
+    return sha256
+
+
+def hash_distance(a: list, b: list):
+    """Mean Hamming distance between two equally long lists of hex frame hashes, or None."""
+    if not a or not b or len(a) != len(b):
+        return None
+    bits = sum(bin(int(x, 16) ^ int(y, 16)).count("1") for x, y in zip(a, b))
+    return bits / len(a)
+
+
+class UploadLedger:
+    """Published videos per channel, looked up by content hash and frame fingerprints."""
+
+    def __init__(self, db_path=UPLOAD_LEDGER_DB):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), timeout=30, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def find(self, video_path: str, channel: str, theme: str = None, sha256: str = None):
+        """The channel's earlier upload of this content as a dict (plus "match"), or None."""
+        sha256 = sha256 or file_sha256(video_path)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM uploads WHERE channel = ? AND sha256 = ? ORDER BY uploaded_at LIMIT 1",
+                (channel, sha256)
+            ).fetchone()
+        if row is not None:
+            return dict(row, match="sha256")
+
+        probe = load_probe(video_path)
+        frame_hashes = probe.frame_hashes if probe is not None else None
+        if not frame_hashes or not theme:
+            return None
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM uploads WHERE channel = ? AND theme = ? AND frame_hashes IS NOT NULL",
+                (channel, theme)
+            ).fetchall()
+        best, best_distance = None, None
+        for row in rows:
+            distance = hash_distance(frame_hashes, json.loads(row["frame_hashes"]))
+            if distance is not None and distance <= PERCEPTUAL_THRESHOLD and \
+                    (best_distance is None or distance < best_distance):
+                best, best_distance = row, distance
+        if best is None:
+            return None
+        return dict(best, match=f"frames (mean distance {best_distance:.1f} bits)")
+
+    def record(self, video_path: str, video_id: str, channel: str, theme: str = None,
+               video_url: str = None, sha256: str = None):
+        """Remember a finished upload of video_path."""
+        sha256 = sha256 or file_sha256(video_path)
+        probe = load_probe(video_path)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO uploads (video_id, channel, sha256, size, duration, frame_hashes, "
+                "theme, video_url, uploaded_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    video_id, channel, sha256, os.path.getsize(video_path),
+                    probe.duration if probe is not None else None,
+                    json.dumps(probe.frame_hashes) if probe is not None and probe.frame_hashes else None,
+                    theme, video_url, time.time(),
+                )
+            )
+            self._conn.commit()
+
+    def forget(self, video_id: str) -> bool:
+        """Drop a ledger entry (e.g. after deleting the video on YouTube)."""
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM uploads WHERE video_id = ?", (video_id,))
+            self._conn.commit()
+            return cursor.rowcount > 0
+
+
+def get_upload_ledger() -> UploadLedger:
+    """Process-wide ledger at output/upload_ledger.db."""
+    global _ledger
+    with _ledger_lock:
+        if _ledger is None:
+            _ledger = UploadLedger()
+        return _ledger
@@ -0,0 +1,390 @@
+"""
+Persistent upload queue backed by SQLite.
+
+Generation enqueues finished videos in output/upload_queue.db and moves on.
+Uploads are drained separately by youtube_upload.py --drain, the upload
+agent, or a batch run's background drainer, using N concurrent workers.
+Claims are atomic (BEGIN IMMEDIATE), so several drainers in different
+processes never pick the same job.
+
+Dispatch is rate-limit aware:
+- per-channel publish windows: a minimum interval between uploads and
+  optional local publish hours, configured in the batch channels file
+  ("publish_interval_minutes", "publish_hours": [9, 21])
+- a 403/429 rate-limit response blocks that channel with exponential backoff
+- a quota rejection (or the local quota ledger running out) pauses the whole
+  queue until the next quota reset (midnight Pacific)
+- other failures are retried with backoff until MAX_ATTEMPTS; 4xx errors fail
+
+A job that was mid-upload when its worker died is reclaimed after
+LEASE_SECONDS and resumes its saved resumable upload session.
+
+Usage:
+    queue = UploadQueue()
+    queue.enqueue("output/run/asmr_video.mp4", "gentle rain", channel="rain_channel",
+                  result_file="output/run/upload_result.json")
+    drain(queue, lambda job: upload_youtube_short(job["video_path"], job["theme"]), workers=4)
+"""
+
+import os
+import re
+import json
+import time
+import sqlite3
+import datetime
+import threading
+from pathlib import Path
+
+from youtube_api.quota import QuotaExceeded, is_quota_error, next_quota_reset
+
+UPLOAD_QUEUE_DB = Path(__file__).resolve().parent.parent / "output" / "upload_queue.db"
+DEFAULT_CHANNEL = "default"
+DEFAULT_WORKERS = 2
+MAX_ATTEMPTS = 6
+RETRY_BASE_SECONDS = 60
+RETRY_MAX_SECONDS = 3600
+THROTTLE_BASE_SECONDS = 300
+THROTTLE_MAX_SECONDS = 6 * 3600
+LEASE_SECONDS = 3 * 3600
+POLL_SECONDS = 30.0
+
+# Pseudo-channel whose block pauses every channel (daily quota is per project)
+_ALL_CHANNELS = "*"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS uploads (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    video_path  TEXT NOT NULL UNIQUE,
+    theme       TEXT NOT NULL,
+    narration   TEXT,
+    privacy     TEXT NOT NULL,
+    channel     TEXT NOT NULL,
+    result_file TEXT,
+    status      TEXT NOT NULL,
+    attempts    INTEGER NOT NULL DEFAULT 0,
+    not_before  REAL NOT NULL DEFAULT 0,
+    claimed_at  REAL,
+    video_id    TEXT,
+    video_url   TEXT,
+    error       TEXT,
+    created_at  REAL NOT NULL,
+    updated_at  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_uploads_status ON uploads (status, not_before);
+CREATE TABLE IF NOT EXISTS channels (
+    channel          TEXT PRIMARY KEY,
+    last_dispatch_at REAL NOT NULL DEFAULT 0,
+    blocked_until    REAL NOT NULL DEFAULT 0,
+    throttles        INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+
+class PublishWindow:
+    """When a channel may start an upload: min_interval seconds apart, within local hours [start, end)."""
+
+    def __init__(self, min_interval: float = 0, hours=None):
+        self.min_interval = min_interval
+        self.hours = tuple(hours) if hours else None
+
+    def next_open(self, last_dispatch: float, now: float) -> float:
+        """Earliest epoch time >= now at which the channel may start its next upload."""
+        at = max(now, last_dispatch + self.min_interval)
+        if not self.hours:
+            return at
+        start, end = self.hours
+        local = datetime.datetime.fromtimestamp(at)
+        inside = start <= local.hour < end if start < end else (local.hour >= start or local.hour < end)
+        if inside:
+            return at
+        opening = local.replace(hour=start, minute=0, second=0, microsecond=0)
+        if opening <= local:
+            opening += datetime.timedelta(days=1)
+        return opening.timestamp()
+
+
+def load_publish_windows(channels_file: str) -> dict:
+    """Upload channel -> PublishWindow from a batch channels JSON file (entries without settings are skipped).
+
+    Windows are keyed by the entry's "channel" (the default channel if unset),
+    since they pace uploads to one YouTube account. If several entries share
+    a channel, the last one with settings wins.
+    """
+    with open(channels_file, "r", encoding="utf-8") as f:
+        channels = json.load(f)
+    windows = {}
+    for channel in channels:
+        interval = channel.get("publish_interval_minutes")
+        hours = channel.get("publish_hours")
+        if interval or hours:
+            windows[channel.get("channel") or DEFAULT_CHANNEL] = PublishWindow((interval or 0) * 60, hours)
+    return windows
+
+
+def classify_upload_error(error) -> str:
+    """quota, throttled, fatal or retry for an exception raised by an upload."""
+    if isinstance(error, QuotaExceeded) or is_quota_error(error):
+        return "quota"
+    status = getattr(error, "status", None) or getattr(getattr(error, "resp", None), "status", None)
+    text = str(error)
+    if status is None:
+        # Subprocess uploads only surface the message, e.g. "Chunk upload failed with HTTP 403: ..."
+        match = re.search(r"HTTP (\d{3})", text)
+        status = int(match.group(1)) if match else None
+        if "quotaExceeded" in text or "dailyLimitExceeded" in text or "QuotaExceeded" in text:
+            return "quota"
+    if status in (403, 429):
+        return "throttled"
+    if isinstance(error, FileNotFoundError) or (status is not None and 400 <= status < 500):
+        return "fatal"
+    return "retry"
+
+
+def _write_result(result_file: str, result: dict):
+    os.makedirs(os.path.dirname(os.path.abspath(result_file)), exist_ok=True)
+    tmp_path = f"{result_file}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+    os.replace(tmp_path, result_file)
+
+
+class UploadQueue:
+    """Durable queue of pending YouTube uploads shared by every process on the machine."""
+
+    def __init__(self, db_path=UPLOAD_QUEUE_DB, windows: dict = None):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.windows = windows or {}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), timeout=30, check_same_thread=False,
+                                     isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _window(self, channel: str) -> PublishWindow:
+        return self.windows.get(channel) or PublishWindow()
+
+    def enqueue(self, video_path: str, theme: str, narration: str = None, privacy: str = "public",
+                channel: str = DEFAULT_CHANNEL, result_file: str = None) -> int:
+        """Queue a video for upload; returns the job id.
+
+        Re-enqueueing a path that is already queued or uploaded keeps the
+        existing job; a failed job is reset to pending.
+        """
+        video_path = os.path.abspath(video_path)
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("SELECT id, status FROM uploads WHERE video_path = ?",
+                                         (video_path,)).fetchone()
+                if row is None:
+                    job_id = self._conn.execute(
+                        "INSERT INTO uploads (video_path, theme, narration, privacy, channel, result_file, "
+                        "status, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, 'pending', ?, ?)",
+                        (video_path, theme, narration, privacy, channel, result_file, now, now)
+                    ).lastrowid
+                else:
+                    job_id = row["id"]
+                    if row["status"] == "failed":
+                        self._conn.execute(
+                            "UPDATE uploads SET status = 'pending', attempts = 0, not_before = 0, error = NULL, "
+                            "updated_at = ? WHERE id = ?", (now, job_id)
+                        )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return job_id
+
+    def claim(self):
+        """Atomically take the next dispatchable job (marking it uploading), or None.
+
+        Also returns the earliest time a pending job becomes dispatchable, as
+        (job dict or None, next_ready epoch or None).
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Reclaim jobs whose worker died mid-upload; their resumable session picks up where it stopped
+                self._conn.execute(
+                    "UPDATE uploads SET status = 'pending', updated_at = ? "
+                    "WHERE status = 'uploading' AND claimed_at < ?", (now, now - LEASE_SECONDS)
+                )
+                channels = {row["channel"]: row for row in self._conn.execute("SELECT * FROM channels")}
+                paused = channels.get(_ALL_CHANNELS)
+                paused_until = paused["blocked_until"] if paused else 0
+
+                job, next_ready = None, None
+                for row in self._conn.execute(
+                        "SELECT * FROM uploads WHERE status = 'pending' ORDER BY not_before, id").fetchall():
+                    state = channels.get(row["channel"])
+                    ready = max(row["not_before"], paused_until, state["blocked_until"] if state else 0)
+                    ready = self._window(row["channel"]).next_open(state["last_dispatch_at"] if state else 0,
+                                                                    ready)
+                    if ready <= now:
+                        job = dict(row)
+                        break
+                    next_ready = ready if next_ready is None else min(next_ready, ready)
+
+                if job is not None:
+                    self._conn.execute(
+                        "UPDATE uploads SET status = 'uploading', claimed_at = ?, updated_at = ? WHERE id = ?",
+                        (now, now, job["id"])
+                    )
+                    self._conn.execute(
+                        "INSERT INTO channels (channel, last_dispatch_at) VALUES (?, ?) "
+                        "ON CONFLICT(channel) DO UPDATE SET last_dispatch_at = excluded.last_dispatch_at",
+                        (job["channel"], now)
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return job, next_ready
+
+    def complete(self, job: dict, result: dict):
+        """Mark a job uploaded and write its result file."""
+        now = time.time()
+        if job.get("result_file"):
+            _write_result(job["result_file"], result)
+        with self._lock:
+            self._conn.execute(
+                "UPDATE uploads SET status = 'done', video_id = ?, video_url = ?, error = NULL, "
+                "updated_at = ? WHERE id = ?",
+                (result.get("video_id"), result.get("video_url"), now, job["id"])
+            )
+            self._conn.execute("UPDATE channels SET throttles = 0 WHERE channel = ?", (job["channel"],))
+
+    def fail(self, job: dict, error) -> str:
+        """Record a failed attempt and schedule the retry; returns the job's new status."""
+        kind = classify_upload_error(error)
+        now = time.time()
+        message = f"{type(error).__name__}: {error}"[:2000]
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                attempts = job["attempts"]
+                not_before = now
+                if kind == "quota":
+                    # Not the job's fault: hold every channel until the quota day rolls over
+                    self._block(_ALL_CHANNELS, next_quota_reset())
+                elif kind == "throttled":
+                    attempts += 1
+                    row = self._conn.execute("SELECT throttles FROM channels WHERE channel = ?",
+                                             (job["channel"],)).fetchone()
+                    throttles = (row["throttles"] if row else 0) + 1
+                    wait = min(THROTTLE_BASE_SECONDS * 2 ** (throttles - 1), THROTTLE_MAX_SECONDS)
+                    self._block(job["channel"], now + wait, throttles)
+                else:
+                    attempts += 1
+                    not_before = now + min(RETRY_BASE_SECONDS * 2 ** (attempts - 1), RETRY_MAX_SECONDS)
+
+                status = "failed" if kind == "fatal" or attempts >= MAX_ATTEMPTS else "pending"
+                self._conn.execute(
+                    "UPDATE uploads SET status = ?, attempts = ?, not_before = ?, error = ?, updated_at = ? "
+                    "WHERE id = ?",
+                    (status, attempts, not_before, message, now, job["id"])
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return status
+
+    def _block(self, channel: str, until: float, throttles: int = None):
+        self._conn.execute(
+            "INSERT INTO channels (channel, blocked_until, throttles) VALUES (?, ?, ?) "
+            "ON CONFLICT(channel) DO UPDATE SET blocked_until = MAX(blocked_until, excluded.blocked_until), "
+            "throttles = COALESCE(?, throttles)",
+            (channel, until, throttles or 0, throttles)
+        )
+
+    def counts(self) -> dict:
+        """Number of jobs per status."""
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM uploads GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+    def jobs(self, status: str = None) -> list:
+        with self._lock:
+            if status:
+                rows = self._conn.execute("SELECT * FROM uploads WHERE status = ? ORDER BY id", (status,))
+            else:
+                rows = self._conn.execute("SELECT * FROM uploads ORDER BY id")
+            return [dict(row) for row in rows.fetchall()]
+
+
+def drain(queue: UploadQueue, upload_fn, workers: int = DEFAULT_WORKERS, wait: bool = False,
+          stop_event: threading.Event = None, on_finished=None, poll: float = POLL_SECONDS) -> dict:
+    """Upload queued jobs on `workers` threads; returns {"done": n, "failed": n, "retrying": n}.
+
+    upload_fn(job) uploads one job and returns its result dict (with
+    video_id/video_url). Workers exit once no job is ready, unless `wait` is
+    set (then they sleep until every pending job is finished) or `stop_event`
+    is given (then they keep polling until it is set, e.g. while a batch is
+    still generating). on_finished(job, result, error) is called when a job
+    reaches done or failed.
+    """
+    totals = {"done": 0, "failed": 0, "retrying": 0}
+    totals_lock = threading.Lock()
+
+    def _count(key):
+        with totals_lock:
+            totals[key] += 1
+
+    def _keep_waiting() -> bool:
+        if stop_event is not None and not stop_event.is_set():
+            return True
+        if wait:
+            counts = queue.counts()
+            return bool(counts.get("pending") or counts.get("uploading"))
+        return False
+
+    def _worker():
+        while True:
+            job, next_ready = queue.claim()
+            if job is None:
+                if not _keep_waiting():
+                    return
+                delay = poll if next_ready is None else min(poll, max(1.0, next_ready - time.time()))
+                if stop_event is not None:
+                    stop_event.wait(delay)
+                else:
+                    time.sleep(delay)
+                continue
+
+            print(f"[upload {job['id']}] {job['channel']}: {job['video_path']} "
+                  f"(attempt {job['attempts'] + 1})", flush=True)
+            try:
+                result = upload_fn(job)
+            except Exception as e:
+                status = queue.fail(job, e)
+                print(f"[upload {job['id']}] {classify_upload_error(e)} error, {status}: {e}", flush=True)
+                if status == "failed":
+                    _count("failed")
+                    if on_finished:
+                        on_finished(job, None, e)
+                else:
+                    _count("retrying")
+                continue
+
+            queue.complete(job, result)
+            _count("done")
+            print(f"[upload {job['id']}] done: {result.get('video_url')}", flush=True)
+            if on_finished:
+                on_finished(job, result, None)
+
+    threads = [threading.Thread(target=_worker, name=f"upload-worker-{i}", daemon=True)
+               for i in range(max(1, workers))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return totals
@@ -3,89 +3,79 @@ import sys
 import argparse
 import json
 import dotenv
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
-import pickle
+from google.auth.transport.requests import AuthorizedSession
+import threading
 from pathlib import Path
 
-dotenv.load_dotenv()
+# Add parent directory to path for imports
+sys.path.append(str(Path(__file__).resolve().parent.parent))
 
-SCOPES = ['https://www.googleapis.com/auth/youtube.upload']
+from youtube_api.client import get_youtube_service
+from youtube_api.quota import get_quota_scheduler, is_quota_error
+from video_generation.video_probe import probe_video
+from video_upload.resumable_upload import YOUTUBE_UPLOAD_URL, ResumableUpload
+from video_upload.upload_queue import DEFAULT_CHANNEL, DEFAULT_WORKERS, UploadQueue, drain, load_publish_windows
+from video_upload.credentials import CredentialsMissing, get_credential_manager
+from video_upload.upload_ledger import file_sha256, get_upload_ledger
+from workflow_automation.pipeline_log import log_upload_finished
 
-# Get script directory for relative paths
-SCRIPT_DIR = Path(__file__).resolve().parent
+dotenv.load_dotenv()
 
-def get_authenticated_service():
-    """Authenticate and return YouTube service."""
-    credentials = None
+def get_credentials(channel: str = DEFAULT_CHANNEL):
+    """The channel's OAuth credentials from the shared pool (kept fresh in the background).
     
-    # Use paths relative to script directory
-    token_file = SCRIPT_DIR / 'token.pickle'
-    credentials_file = SCRIPT_DIR / 'youtube_credentials.json'
+    Exits if the channel has no token of its own and sharing the default
+    token is not enabled (BLISS_SHARE_DEFAULT_TOKEN=1).
+    """
+    manager = get_credential_manager()
+    try:
+        return manager.get(manager.resolve(channel))
+    except CredentialsMissing as e:
+        print(f"ERROR: {e}")
+        if not manager.client_secrets.exists():
+            print("Please ensure youtube_credentials.json is in the video_upload folder")
+        sys.exit(1)
+
+def get_authenticated_service(channel: str = DEFAULT_CHANNEL):
+    """Authenticate and return YouTube service."""
+    return get_youtube_service(credentials=get_credentials(channel))
+
+def upload_youtube_short(video_path: str, theme: str, narration: str = None, privacy: str = "public", youtube=None,
+                         credentials=None, session=None, upload_url: str = YOUTUBE_UPLOAD_URL,
+                         meter_quota: bool = True, channel: str = DEFAULT_CHANNEL, dedup: bool = True):
+    """Upload video as YouTube Short with AI content disclosure.
     
-    if token_file.exists():
-        with open(token_file, 'rb') as token:
-            credentials = pickle.load(token)
+    Without `credentials` (or an already authenticated service as `youtube`)
+    the channel's pooled credentials are used. `session` and `upload_url`
+    replace the OAuth session and endpoint, e.g. for the fake upload server
+    (with meter_quota=False, dedup=False). A retried call resumes the
+    interrupted upload session instead of starting over.
     
-    if not credentials or not credentials.valid:
-        if credentials and credentials.expired and credentials.refresh_token:
-            credentials.refresh(Request())
-        else:
-            if not credentials_file.exists():
-                print(f"ERROR: YouTube credentials not found at: {credentials_file}")
-                print("Please ensure youtube_credentials.json is in the video_upload folder")
-                sys.exit(1)
-            
-            flow = InstalledAppFlow.from_client_secrets_file(
-                str(credentials_file), SCOPES)
-            
-            # Note for unverified app
-            print("Note: App not verified by Google yet.")
-            print("Click 'Advanced' then 'Go to Bliss Builder Desktop (unsafe)' to proceed.")
-            
-            credentials = flow.run_local_server(port=0)
-        
-        with open(token_file, 'wb') as token:
-            pickle.dump(credentials, token)
+    With dedup, a video the channel already published (same bytes, or the
+    same theme with near-identical frames) is not uploaded again; the earlier
+    video is returned with status "duplicate".
+    """
+    if session is None:
+        if credentials is None and youtube is not None:
+            credentials = getattr(getattr(youtube, "_http", None), "credentials", None)
+        session = AuthorizedSession(credentials or get_credentials(channel))
     
-    return build('youtube', 'v3', credentials=credentials)
-
-def upload_youtube_short(video_path: str, theme: str, narration: str = None, privacy: str = "public"):
-    """Upload video as YouTube Short with AI content disclosure."""
-    youtube = get_authenticated_service()
-    
-    # CRITICAL: Verify video is portrait before upload
+    # CRITICAL: Verify video is portrait before upload (probe sidecar from generation, no decode)
     try:
-        import cv2
-        cap = cv2.VideoCapture(video_path)
-        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-        duration_sec = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) / cap.get(cv2.CAP_PROP_FPS))
-        cap.release()
+        probe = probe_video(video_path)
         
         print(f"\nPre-upload validation:")
-        print(f"  Resolution: {width}x{height}")
-        print(f"  Duration: {duration_sec}s")
-        
-        # Shorts requirements
-        is_portrait = height > width
-        is_short_duration = duration_sec <= 60
-        is_correct_ratio = 1.5 < (height / width) < 2.0  # Roughly 9:16
-        
-        if not is_portrait:
-            print(f"  ERROR: Video is NOT portrait! ({width}x{height})")
-            print(f"  This will NOT appear as a Short!")
-            print(f"  Please fix video generation to output 1080x1920")
-        
-        if not is_short_duration:
-            print(f"  ERROR: Video too long for Shorts! ({duration_sec}s > 60s)")
+        print(f"  Resolution: {probe.width}x{probe.height}")
+        print(f"  Duration: {probe.duration:.0f}s" if probe.duration else "  Duration: unknown")
+        if probe.has_motion is not None:
+            print(f"  Has motion: {'YES' if probe.has_motion else 'NO (static frames)'}")
         
-        if not is_correct_ratio:
-            print(f"  WARNING: Aspect ratio not ideal for Shorts ({height/width:.2f})")
-        
-        if is_portrait and is_short_duration and is_correct_ratio:
+        issues = probe.shorts_issues()
+        for issue in issues:
+            print(f"  ERROR: {issue}")
+        if issues:
+            print(f"  This may NOT appear as a Short! Please fix video generation to output 1080x1920")
+        else:
             print(f"  SUCCESS: Video meets YouTube Shorts requirements!")
         
     except Exception as e:
@@ -138,38 +128,52 @@ def upload_youtube_short(video_path: str, theme: str, narration: str = None, pri
         }
     }
     
+    # Skip the upload (1600 quota units) if this channel already has the content
+    # Recorded under the channel whose token publishes it (the default one when shared)
+    ledger = get_upload_ledger() if dedup else None
+    ledger_channel, sha256 = None, None
+    if ledger is not None:
+        ledger_channel = get_credential_manager().resolve(channel)
+        sha256 = file_sha256(video_path)
+        existing = ledger.find(video_path, ledger_channel, theme, sha256=sha256)
+        if existing is not None:
+            print(f"\nDUPLICATE: already published as {existing['video_id']} (match: {existing['match']})")
+            print(f"URL: {existing['video_url']}")
+            return {
+                "video_id": existing["video_id"],
+                "video_url": existing["video_url"],
+                "title": title,
+                "status": "duplicate",
+                "privacy": privacy,
+                "ai_disclosed": True
+            }
+    
     print(f"Uploading AI-generated YouTube Short: {title}")
     print(f"  Privacy: {privacy}")
     print(f"  #Shorts in title: YES")
     print(f"  #Shorts in description: YES")
     print(f"  [OK] AI disclosure in description")
     
-    # Upload with progress tracking
-    media = MediaFileUpload(
-        video_path,
-        mimetype="video/mp4",
-        resumable=True,
-        chunksize=1024*1024
-    )
-    
-    request = youtube.videos().insert(
-        part="snippet,status",
-        body=body,
-        media_body=media
-    )
-    
-    response = None
-    while response is None:
-        try:
-            status, response = request.next_chunk()
-            if status:
-                print(f"Upload progress: {int(status.progress() * 100)}%", flush=True)
-        except Exception as e:
-            print(f"Upload error: {e}", flush=True)
-            raise
+    # Meter the upload (1600 units) when a new upload session starts; raises QuotaExceeded if not
+    # affordable. Resuming a saved session is the same insert call and is not charged again.
+    quota = get_quota_scheduler() if meter_quota else None
+    upload = ResumableUpload(video_path, body, session, upload_url=upload_url,
+                             on_new_session=lambda: quota and quota.charge("videos.insert"))
+    try:
+        response = upload.run()
+    except Exception as e:
+        print(f"Upload error: {e}", flush=True)
+        if quota and is_quota_error(e):
+            quota.mark_exhausted()
+        raise
     
     video_id = response['id']
     video_url = f"https://www.youtube.com/shorts/{video_id}"
+    if ledger is not None:
+        try:
+            ledger.record(video_path, video_id, ledger_channel, theme, video_url, sha256=sha256)
+        except Exception as e:
+            print(f"Could not record upload in ledger: {e}", flush=True)
     
     print(f"\nSUCCESS: AI-generated Short published!")
     print(f"Video ID: {video_id}")
@@ -188,16 +192,92 @@ def upload_youtube_short(video_path: str, theme: str, narration: str = None, pri
         "ai_disclosed": True
     }
 
+def drain_upload_queue(workers: int = DEFAULT_WORKERS, wait: bool = False, channels_file: str = None,
+                       fake_upload_server: bool = False, queue: UploadQueue = None,
+                       stop_event: threading.Event = None, on_finished=None) -> dict:
+    """Upload everything queued in output/upload_queue.db with `workers` concurrent uploads.
+
+    Each worker thread keeps one AuthorizedSession per channel, all sharing
+    the channel's pooled credentials. Every job that ends done or failed is
+    logged to output/pipeline_log.csv for its run folder (and refreshes the
+    theme index on success), then passed to `on_finished` if given.
+    `stop_event` is passed to drain(). Returns drain()'s {"done", "failed",
+    "retrying"} counts.
+    """
+    windows = load_publish_windows(channels_file) if channels_file else None
+    queue = queue or UploadQueue(windows=windows)
+    if windows:
+        queue.windows = windows
+    print(f"Upload queue: {queue.counts()}", flush=True)
+
+    server = None
+    if fake_upload_server:
+        import requests
+        from video_upload.fake_upload_server import FakeUploadServer
+        server = FakeUploadServer().start()
+        new_session, upload_url = (lambda channel: requests.Session()), server.upload_url
+    else:
+        # Raises CredentialsMissing (the job fails, see classify_upload_error) rather than exiting a worker thread
+        manager = get_credential_manager()
+        new_session = lambda channel: AuthorizedSession(manager.get(manager.resolve(channel)))
+        upload_url = YOUTUBE_UPLOAD_URL
+    local = threading.local()
+
+    def _upload(job):
+        sessions = getattr(local, "sessions", None)
+        if sessions is None:
+            sessions = local.sessions = {}
+        if job["channel"] not in sessions:
+            sessions[job["channel"]] = new_session(job["channel"])
+        return upload_youtube_short(job["video_path"], job["theme"], job["narration"], job["privacy"],
+                                    session=sessions[job["channel"]], upload_url=upload_url,
+                                    meter_quota=not fake_upload_server, channel=job["channel"],
+                                    dedup=not fake_upload_server)
+
+    def _finished(job, result, error):
+        log_upload_finished(job, result, error)
+        if on_finished is not None:
+            on_finished(job, result, error)
+
+    try:
+        totals = drain(queue, _upload, workers=workers, wait=wait, stop_event=stop_event, on_finished=_finished)
+    finally:
+        if server is not None:
+            server.stop()
+    print(f"Upload queue drained: {totals} (remaining: {queue.counts()})", flush=True)
+    return totals
+
 def main():
     parser = argparse.ArgumentParser(description="Upload AI-generated video to YouTube as Short")
-    parser.add_argument("--video", required=True, help="Path to video file")
-    parser.add_argument("--theme-file", required=True, help="Path to theme.txt")
+    parser.add_argument("--video", help="Path to video file")
+    parser.add_argument("--theme-file", help="Path to theme.txt")
     parser.add_argument("--narration-file", help="Path to narration.txt (optional)")
     parser.add_argument("--output-result", help="Path to save upload result JSON")
     parser.add_argument("--privacy", default="public", choices=["public", "unlisted", "private"],
                        help="Privacy status (default: public)")
+    parser.add_argument("--fake-upload-server", action="store_true",
+                        help="Upload to a local fake resumable upload server (offline, no OAuth or quota)")
+    parser.add_argument("--no-dedup", action="store_true",
+                        help="Upload even if the channel already published this video (upload ledger)")
+    parser.add_argument("--enqueue", action="store_true",
+                        help="Add the video to the upload queue (output/upload_queue.db) instead of uploading now")
+    parser.add_argument("--channel", default=DEFAULT_CHANNEL,
+                        help="Channel to publish to (token in video_upload/tokens/, queue publish window and backoff)")
+    parser.add_argument("--drain", action="store_true", help="Upload everything in the upload queue")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help=f"Concurrent uploads when draining (default: {DEFAULT_WORKERS})")
+    parser.add_argument("--wait", action="store_true",
+                        help="When draining, wait for delayed jobs (publish windows, backoff) instead of exiting")
+    parser.add_argument("--channels-file", help="Channels JSON with publish_interval_minutes / publish_hours")
     args = parser.parse_args()
     
+    if args.drain:
+        drain_upload_queue(args.workers, args.wait, args.channels_file, args.fake_upload_server)
+        return
+    
+    if not args.video or not args.theme_file:
+        parser.error("--video and --theme-file are required unless --drain is given")
+    
     # Validate video file
     if not os.path.exists(args.video):
         print(f"ERROR: Video file not found: {args.video}")
@@ -217,8 +297,23 @@ def main():
         with open(args.narration_file, 'r', encoding='utf-8') as f:
             narration = f.read().strip()
     
+    if args.enqueue:
+        job_id = UploadQueue().enqueue(args.video, theme, narration, args.privacy, channel=args.channel,
+                                       result_file=args.output_result)
+        print(f"Queued upload job {job_id} for channel {args.channel}: {args.video}")
+        return
+    
     # Upload
-    result = upload_youtube_short(args.video, theme, narration, args.privacy)
+    if args.fake_upload_server:
+        import requests
+        from video_upload.fake_upload_server import FakeUploadServer
+        with FakeUploadServer() as server:
+            result = upload_youtube_short(args.video, theme, narration, args.privacy,
+                                          session=requests.Session(), upload_url=server.upload_url,
+                                          meter_quota=False, dedup=False)
+    else:
+        result = upload_youtube_short(args.video, theme, narration, args.privacy, channel=args.channel,
+                                      dedup=not args.no_dedup)
     
     # Save result
     if args.output_result:
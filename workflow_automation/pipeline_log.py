@@ -0,0 +1,116 @@
+"""
+Pipeline run log - Bliss Builder
+
+Appends one row per pipeline event to output/pipeline_log.csv. A run that
+uploads inline logs success or failure once. A run that only queues its
+upload logs "queued" first. The final row (with the video ID, or the
+upload error) is logged when the queue drainer finishes the job, whichever
+process drains it (batch drainer, youtube_upload.py --drain or the upload
+agent). Successful rows refresh the theme index so later runs avoid
+near-duplicates.
+
+Usage:
+    log_pipeline_result(run_id(output_dir), output_dir, success=True)
+    log_pipeline_result(run_id(output_dir), output_dir, success=True, queued=True)
+    drain(queue, upload_fn, on_finished=log_upload_finished)
+"""
+
+import os
+import sys
+import csv
+import json
+import logging
+import threading
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+PIPELINE_LOG_CSV = Path(__file__).resolve().parent.parent / "output" / "pipeline_log.csv"
+
+logger = logging.getLogger(__name__)
+
+# Serializes pipeline_log.csv writes when several batch jobs or upload workers finish together
+_LOG_LOCK = threading.Lock()
+
+
+def run_id(output_dir: str) -> str:
+    """The log timestamp of a run folder: <timestamp> or <batch dir>_<job name>."""
+    output_dir = os.path.abspath(output_dir)
+    parent = os.path.basename(os.path.dirname(output_dir))
+    if parent.startswith("batch_"):
+        return f"{parent}_{os.path.basename(output_dir)}"
+    return os.path.basename(output_dir)
+
+
+def log_pipeline_result(timestamp: str, output_dir: str, success: bool, error: str = None,
+                        queued: bool = False, theme: str = None, result: dict = None):
+    """Log pipeline execution result to CSV.
+
+    With queued=True the row records that the video waits in the upload queue
+    ("queued" in the success column), and the theme index is left alone. The
+    theme and upload result are read from the run folder unless given.
+    """
+    log_file = PIPELINE_LOG_CSV
+
+    try:
+        os.makedirs(os.path.dirname(log_file), exist_ok=True)
+
+        with _LOG_LOCK, open(log_file, 'a', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+
+            # Write header if new file
+            if f.tell() == 0:
+                writer.writerow(['timestamp', 'success', 'output_dir', 'theme', 'video_id', 'video_url', 'error'])
+
+            # Read theme and upload result if successful
+            video_id = ""
+            video_url = ""
+
+            if success or queued:
+                try:
+                    theme_file = os.path.join(output_dir, "theme.txt")
+                    if theme is None and os.path.exists(theme_file):
+                        with open(theme_file, 'r', encoding='utf-8') as tf:
+                            theme = tf.read().strip()
+
+                    result_file = os.path.join(output_dir, "upload_result.json")
+                    if result is None and success and os.path.exists(result_file):
+                        with open(result_file, 'r', encoding='utf-8') as rf:
+                            result = json.load(rf)
+                    if result:
+                        video_id = result.get('video_id', '')
+                        video_url = result.get('video_url', '')
+                except Exception as e:
+                    logger.warning(f"Could not read theme/result: {e}")
+
+            # Write log entry
+            writer.writerow([
+                timestamp,
+                'queued' if queued else 'true' if success else 'false',
+                output_dir,
+                theme or "N/A",
+                video_id,
+                video_url,
+                error or 'None'
+            ])
+
+        logger.info(f"Logged result to {log_file}")
+
+    except Exception as e:
+        logger.error(f"Failed to write log: {e}")
+
+    if success and not queued:
+        try:
+            # Picks up this run's theme and Veo 3 prompt so later runs avoid near-duplicates
+            from trend_fetching.theme_index import get_theme_index
+            get_theme_index()
+        except Exception as e:
+            logger.warning(f"Could not update theme index: {e}")
+
+
+def log_upload_finished(job: dict, result: dict, error):
+    """drain() on_finished callback: log the final outcome of a queued upload for its run."""
+    output_dir = os.path.dirname(os.path.abspath(job["video_path"]))
+    log_pipeline_result(run_id(output_dir), output_dir, success=error is None,
+                        error=f"Upload failed: {error}" if error is not None else None,
+                        theme=job.get("theme"), result=result)
@@ -1,16 +1,25 @@
 import os
 import sys
+import json
+import argparse
 import logging
 import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from pathlib import Path  # ADD THIS IMPORT
-import csv
 
 # Define paths to scripts and output directory
 BASE_DIR = Path(__file__).resolve().parent.parent  # Go up one level to project root
 TREND_GEN_SCRIPT = BASE_DIR / "trend_fetching" / "trend_fetch.py"
 VIDEO_GEN_SCRIPT = BASE_DIR / "video_generation" / "gemini_video.py"
 OUTPUTS_DIR = BASE_DIR / "output"
+YOUTUBE_CACHE_DIR = OUTPUTS_DIR / "cache" / "youtube"  # shared by runs and batch jobs
+TREND_STORE_DB = OUTPUTS_DIR / "trends.db"  # incremental trend store (trend_fetching/trend_store.py)
+
+sys.path.append(str(BASE_DIR))
+from trend_fetching.trend_io import done_marker
+from workflow_automation.pipeline_log import log_pipeline_result
 
 # Ensure output directory exists
 OUTPUTS_DIR.mkdir(parents=True, exist_ok=True)
@@ -27,6 +36,9 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)  # ADD THIS LINE
 
+# Default worker count per stage for batch mode (see run_batch)
+DEFAULT_STAGE_CONCURRENCY = {"fetch": 2, "prompt": 4, "video": 8, "upload": 2}
+
 def run_script(script_path, *args):
     """Run a Python script with arguments."""
     cmd = [sys.executable, str(script_path)] + list(args)
@@ -40,63 +52,61 @@ def run_script(script_path, *args):
     logging.info(f"Script {script_path} completed successfully.")
     return result.stdout.strip()
 
-def log_pipeline_result(timestamp: str, output_dir: str, success: bool, error: str = None):
-    """Log pipeline execution result to CSV."""
-    log_file = os.path.join(BASE_DIR, "output", "pipeline_log.csv")
-    
-    # Create log file with headers if it doesn't exist
-    file_exists = os.path.exists(log_file)
-    
-    try:
-        os.makedirs(os.path.dirname(log_file), exist_ok=True)
-        
-        with open(log_file, 'a', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f)
-            
-            # Write header if new file
-            if not file_exists:
-                writer.writerow(['timestamp', 'success', 'output_dir', 'theme', 'video_id', 'video_url', 'error'])
-            
-            # Read theme and upload result if successful
-            theme = "N/A"
-            video_id = ""
-            video_url = ""
-            
-            if success:
-                try:
-                    theme_file = os.path.join(output_dir, "theme.txt")
-                    if os.path.exists(theme_file):
-                        with open(theme_file, 'r', encoding='utf-8') as tf:
-                            theme = tf.read().strip()
-                    
-                    result_file = os.path.join(output_dir, "upload_result.json")
-                    if os.path.exists(result_file):
-                        import json
-                        with open(result_file, 'r', encoding='utf-8') as rf:
-                            result = json.load(rf)
-                            video_id = result.get('video_id', '')
-                            video_url = result.get('video_url', '')
-                except Exception as e:
-                    logger.warning(f"Could not read theme/result: {e}")
-            
-            # Write log entry
-            writer.writerow([
-                timestamp,
-                'true' if success else 'false',
-                output_dir,
-                theme,
-                video_id,
-                video_url,
-                error or 'None'
-            ])
-        
-        logger.info(f"Logged result to {log_file}")
-        
-    except Exception as e:
-        logger.error(f"Failed to write log: {e}")
+def run_stages_via_agent_server(output_dir: str, agent_url: str, privacy: str = "public"):
+    """Run fetch, generation and upload on a resident agent server (agents/agent_server.py).
+
+    Writes the same per-run files as the script path so log_pipeline_result works unchanged.
+    """
+    from agents.agent_server import call_tool
+
+    os.makedirs(output_dir, exist_ok=True)
+
+    def _call(tool_name, payload):
+        logging.info(f"Calling agent tool {tool_name} at {agent_url}")
+        result = call_tool(tool_name, payload, base_url=agent_url)
+        if result.get("status") != "success":
+            raise RuntimeError(f"Agent tool {tool_name} failed: {result.get('error')}")
+        return result
+
+    fetch_result = _call("fetch_trends_tool", {
+        "input": "fetch trends",
+        "trends_file": os.path.join(output_dir, "trends.jsonl")
+    })
+    theme = fetch_result["theme"]
+    with open(os.path.join(output_dir, "theme.txt"), "w", encoding="utf-8") as f:
+        f.write(theme)
+
+    narration_result = _call("generate_narration_tool", {"theme": theme})
+    with open(os.path.join(output_dir, "narration.txt"), "w", encoding="utf-8") as f:
+        f.write(narration_result["narration"])
+
+    video_result = _call("generate_video_tool", {
+        "narration_data": narration_result,
+        "output_file": os.path.join(output_dir, "video_metadata.json")
+    })
+
+    upload_result = _call("upload_to_youtube_tool", {
+        "video_data": {
+            "video_path": video_result["video_path"],
+            "theme": theme,
+            "narration": narration_result["narration"],
+            "privacy": privacy
+        }
+    })
+    with open(os.path.join(output_dir, "upload_result.json"), "w", encoding="utf-8") as f:
+        json.dump(upload_result, f, indent=2)
+
+    return upload_result
 
-def run_pipeline():
-    """Execute the complete Bliss Builder pipeline."""
+def run_pipeline(agent_url: str = None, queue_upload: bool = False):
+    """Execute the complete Bliss Builder pipeline.
+
+    With agent_url set, the stages run on a resident agent server instead of
+    one Python subprocess per step. With queue_upload the video is added to
+    the upload queue (output/upload_queue.db) instead of being uploaded here
+    and the run is logged as "queued"; youtube_upload.py --drain or the upload
+    agent uploads it later and logs the final result.
+    """
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     output_dir = os.path.join(BASE_DIR, "output", timestamp)
     
@@ -105,9 +115,19 @@ def run_pipeline():
     logger.info(f"Output directory: {output_dir}")
     
     try:
+        if agent_url:
+            logger.info(f"Steps 1-3: Running stages on agent server {agent_url}...")
+            run_stages_via_agent_server(output_dir, agent_url, privacy="public")
+
+            logger.info("Step 4: Logging pipeline results...")
+            log_pipeline_result(timestamp, output_dir, success=True)
+
+            logger.info("=== Bliss Builder Pipeline Completed Successfully ===")
+            return True
+
         # Step 1: Fetch ASMR trends and extract theme
         logger.info("Step 1: Fetching ASMR trends and extracting theme...")
-        trends_json = os.path.join(output_dir, "trends.json")
+        trends_json = os.path.join(output_dir, "trends.jsonl")
         theme_file = os.path.join(output_dir, "theme.txt")
         
         run_script(
@@ -115,7 +135,9 @@ def run_pipeline():
             "--output-json", trends_json,
             "--output-theme", theme_file,
             "--region", "US",
-            "--max", "50"
+            "--max", "50",
+            "--cache-dir", str(YOUTUBE_CACHE_DIR),
+            "--store-db", str(TREND_STORE_DB)
         )
         
         # Step 2: Generate video with Veo 3
@@ -135,21 +157,25 @@ def run_pipeline():
         )
         
         # Step 3: Upload to YouTube as PUBLIC Short with AI disclosure
-        logger.info("Step 3: Uploading to YouTube as PUBLIC Short with AI disclosure...")
         upload_result_file = os.path.join(output_dir, "upload_result.json")
-        
-        run_script(
-            os.path.join(BASE_DIR, "video_upload", "youtube_upload.py"),
+        upload_args = [
             "--video", video_file,
             "--theme-file", theme_file,
             "--narration-file", narration_file,
             "--output-result", upload_result_file,
             "--privacy", "public"  # CHANGED: Set to public by default
-        )
+        ]
+        if queue_upload:
+            logger.info("Step 3: Queueing PUBLIC Short for upload...")
+            upload_args.append("--enqueue")
+        else:
+            logger.info("Step 3: Uploading to YouTube as PUBLIC Short with AI disclosure...")
+        
+        run_script(os.path.join(BASE_DIR, "video_upload", "youtube_upload.py"), *upload_args)
         
         # Step 4: Log results
         logger.info("Step 4: Logging pipeline results...")
-        log_pipeline_result(timestamp, output_dir, success=True)
+        log_pipeline_result(timestamp, output_dir, success=True, queued=queue_upload)
         
         logger.info("=== Bliss Builder Pipeline Completed Successfully ===")
         return True
@@ -161,11 +187,274 @@ def run_pipeline():
     finally:
         logger.info("=== Bliss Builder Pipeline Finished ===")
 
+def load_batch_jobs(themes: list = None, channels_file: str = None, region: str = "US",
+                    privacy: str = "public") -> list:
+    """Build batch job dicts from explicit themes and/or a channels JSON file.
+
+    The channels file is a list of objects such as
+    {"name": "rain_channel", "region": "GB", "theme": "optional fixed theme", "privacy": "unlisted",
+     "channel": "rain_channel"};
+    jobs without a theme get one extracted from their region's trends. "channel"
+    names the YouTube channel token to publish with (video_upload/credentials.py);
+    without it, and for --themes jobs, the default channel is used.
+    """
+    from video_upload.upload_queue import DEFAULT_CHANNEL
+
+    jobs = []
+    for i, theme in enumerate(themes or [], start=1):
+        jobs.append({"name": f"theme_{i:02d}", "region": region, "theme": theme, "privacy": privacy,
+                     "channel": DEFAULT_CHANNEL})
+
+    if channels_file:
+        with open(channels_file, 'r', encoding='utf-8') as f:
+            channels = json.load(f)
+        for i, channel in enumerate(channels, start=1):
+            jobs.append({
+                "name": channel.get("name") or f"channel_{i:02d}",
+                "region": channel.get("region", region),
+                "theme": channel.get("theme"),
+                "privacy": channel.get("privacy", privacy),
+                "channel": channel.get("channel") or DEFAULT_CHANNEL
+            })
+
+    return jobs
+
+def _run_batch_job(job: dict, batch_dir: str, stage_slots: dict, upload_queue=None) -> dict:
+    """Run one job through fetch -> prompt -> video -> upload, holding one slot per stage.
+
+    The video is published with the job's "channel" token, inline or via the
+    upload_queue. With a queue the job is logged as "queued" and returns right
+    away; the drainer uploads it and logs the final result.
+    """
+    name = job["name"]
+    output_dir = os.path.join(batch_dir, name)
+    os.makedirs(output_dir, exist_ok=True)
+
+    trends_json = os.path.join(output_dir, "trends.jsonl")
+    theme_file = os.path.join(output_dir, "theme.txt")
+    prompt_file = os.path.join(output_dir, "veo3_prompt.txt")
+    narration_file = os.path.join(output_dir, "narration.txt")
+    video_file = os.path.join(output_dir, "asmr_video.mp4")
+    upload_result_file = os.path.join(output_dir, "upload_result.json")
+
+    timestamp = f"{os.path.basename(batch_dir)}_{name}"
+    started = datetime.now()
+
+    try:
+        fetch_args = ["--output-json", trends_json, "--region", job["region"], "--max", "50",
+                      "--cache-dir", str(YOUTUBE_CACHE_DIR), "--store-db", str(TREND_STORE_DB)]
+        prompt_args = ["--trends-json", trends_json, "--theme-file", theme_file,
+                       "--output-prompt", prompt_file, "--prompt-only"]
+
+        def _fetch():
+            with stage_slots["fetch"]:
+                logger.info(f"[{name}] Fetching trends for region {job['region']}...")
+                try:
+                    run_script(TREND_GEN_SCRIPT, *fetch_args)
+                except Exception:
+                    # Release a prompt stage following trends.jsonl instead of letting it time out
+                    open(done_marker(trends_json), 'w').close()
+                    raise
+
+        if job.get("theme"):
+            with open(theme_file, 'w', encoding='utf-8') as f:
+                f.write(job["theme"])
+            # The theme is fixed, so the prompt stage can follow trends.jsonl while it is still being written
+            with ThreadPoolExecutor(max_workers=1) as fetch_executor:
+                fetch_future = fetch_executor.submit(_fetch)
+                with stage_slots["prompt"]:
+                    logger.info(f"[{name}] Generating Veo 3 prompt (following trends)...")
+                    run_script(VIDEO_GEN_SCRIPT, *prompt_args, "--follow-trends")
+                fetch_future.result()
+        else:
+            fetch_args += ["--output-theme", theme_file]
+            _fetch()
+            with stage_slots["prompt"]:
+                logger.info(f"[{name}] Generating Veo 3 prompt...")
+                run_script(VIDEO_GEN_SCRIPT, *prompt_args)
+
+        with stage_slots["video"]:
+            logger.info(f"[{name}] Generating video...")
+            run_script(
+                VIDEO_GEN_SCRIPT,
+                "--trends-json", trends_json,
+                "--theme-file", theme_file,
+                "--prompt-file", prompt_file,
+                "--output", video_file,
+                "--output-narration", narration_file,
+                "--duration", "8"
+            )
+
+        if upload_queue is not None:
+            with open(theme_file, 'r', encoding='utf-8') as f:
+                theme = f.read().strip()
+            narration = None
+            if os.path.exists(narration_file):
+                with open(narration_file, 'r', encoding='utf-8') as f:
+                    narration = f.read().strip()
+            job_id = upload_queue.enqueue(video_file, theme, narration, job["privacy"], channel=job["channel"],
+                                          result_file=upload_result_file)
+            log_pipeline_result(timestamp, output_dir, success=True, queued=True)
+            elapsed = (datetime.now() - started).total_seconds()
+            logger.info(f"[{name}] Generated in {elapsed:.0f}s, queued as upload job {job_id}")
+            return {"name": name, "success": True, "queued": True, "output_dir": output_dir, "elapsed": elapsed}
+
+        with stage_slots["upload"]:
+            logger.info(f"[{name}] Uploading to YouTube ({job['privacy']})...")
+            run_script(
+                BASE_DIR / "video_upload" / "youtube_upload.py",
+                "--video", video_file,
+                "--theme-file", theme_file,
+                "--narration-file", narration_file,
+                "--output-result", upload_result_file,
+                "--privacy", job["privacy"],
+                "--channel", job["channel"]
+            )
+
+        log_pipeline_result(timestamp, output_dir, success=True)
+        elapsed = (datetime.now() - started).total_seconds()
+        logger.info(f"[{name}] Completed in {elapsed:.0f}s")
+        return {"name": name, "success": True, "output_dir": output_dir, "elapsed": elapsed}
+
+    except Exception as e:
+        logger.error(f"[{name}] Failed: {e}")
+        log_pipeline_result(timestamp, output_dir, success=False, error=str(e))
+        return {"name": name, "success": False, "output_dir": output_dir, "error": str(e)}
+
+def assign_batch_themes(jobs: list, batch_dir: str) -> list:
+    """Give every job without a theme one from a single batched extraction per region.
+
+    One trend_fetch.py run per region extracts as many distinct themes as that
+    region has theme-less jobs, instead of one LLM call per job. Jobs whose
+    region fails keep theme=None and extract their own theme later.
+    """
+    by_region = {}
+    for job in jobs:
+        if not job.get("theme"):
+            by_region.setdefault(job["region"], []).append(job)
+
+    for region, region_jobs in by_region.items():
+        if len(region_jobs) < 2:
+            continue
+        themes_file = os.path.join(batch_dir, f"themes_{region}.txt")
+        logger.info(f"Extracting {len(region_jobs)} themes for region {region} in one call...")
+        try:
+            run_script(
+                TREND_GEN_SCRIPT,
+                "--output-json", os.path.join(batch_dir, f"trends_{region}.jsonl"),
+                "--output-theme", themes_file,
+                "--theme-count", str(len(region_jobs)),
+                "--region", region,
+                "--max", "50",
+                "--cache-dir", str(YOUTUBE_CACHE_DIR),
+                "--store-db", str(TREND_STORE_DB)
+            )
+            with open(themes_file, 'r', encoding='utf-8') as f:
+                themes = [line.strip() for line in f if line.strip()]
+        except Exception as e:
+            logger.error(f"Batched theme extraction for {region} failed: {e}")
+            continue
+        for job, theme in zip(region_jobs, themes):
+            job["theme"] = theme
+
+    return jobs
+
+def run_batch(jobs: list, concurrency: dict = None, queue_uploads: bool = False, channels_file: str = None) -> list:
+    """Run many pipeline jobs at once with a bounded worker pool per stage.
+
+    Each job moves through the stages independently, so a slow Veo render only
+    holds one "video" slot while other jobs keep fetching and uploading. With
+    enough video slots the batch takes about as long as its slowest job.
+
+    With queue_uploads, jobs enqueue their videos and a background drainer
+    uploads them with the "upload" worker count while generation continues,
+    honouring the channels file's publish windows. Jobs it cannot dispatch
+    before generation ends (publish window, backoff) stay queued for the next
+    youtube_upload.py --drain.
+    """
+    stage_concurrency = dict(DEFAULT_STAGE_CONCURRENCY)
+    stage_concurrency.update({k: v for k, v in (concurrency or {}).items() if v})
+    stage_slots = {stage: threading.BoundedSemaphore(n) for stage, n in stage_concurrency.items()}
+
+    batch_dir = os.path.join(BASE_DIR, "output", f"batch_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+    os.makedirs(batch_dir, exist_ok=True)
+
+    logger.info(f"=== Bliss Builder Batch Started: {len(jobs)} jobs ===")
+    logger.info(f"Stage concurrency: {stage_concurrency}")
+    logger.info(f"Batch directory: {batch_dir}")
+
+    assign_batch_themes(jobs, batch_dir)
+
+    upload_queue = drainer = None
+    if queue_uploads:
+        from video_upload.upload_queue import UploadQueue, load_publish_windows
+        from video_upload.youtube_upload import drain_upload_queue
+
+        upload_queue = UploadQueue(windows=load_publish_windows(channels_file) if channels_file else None)
+        upload_errors = {}   # job output_dir -> final upload error
+        generation_done = threading.Event()
+
+        def _upload_finished(upload_job, result, error):
+            # drain_upload_queue() already logs every finished job; only this batch's failures are kept here
+            output_dir = os.path.dirname(upload_job["video_path"])
+            if error is not None and os.path.dirname(output_dir) == os.path.abspath(batch_dir):
+                upload_errors[output_dir] = str(error)
+
+        drainer = threading.Thread(
+            target=drain_upload_queue,
+            kwargs={"workers": stage_concurrency["upload"], "queue": upload_queue,
+                    "stop_event": generation_done, "on_finished": _upload_finished},
+            name="upload-drainer", daemon=True
+        )
+        drainer.start()
+
+    results = []
+    with ThreadPoolExecutor(max_workers=max(1, len(jobs))) as executor:
+        futures = [executor.submit(_run_batch_job, job, batch_dir, stage_slots, upload_queue) for job in jobs]
+        for future in as_completed(futures):
+            results.append(future.result())
+
+    if drainer is not None:
+        logger.info(f"Generation finished, waiting for queued uploads: {upload_queue.counts()}")
+        generation_done.set()
+        drainer.join()
+        upload_queue.close()
+        for result in results:
+            error = upload_errors.get(os.path.abspath(result["output_dir"]))
+            if error:
+                result.update(success=False, error=error)
+
+    succeeded = sum(1 for r in results if r["success"])
+    logger.info(f"=== Bliss Builder Batch Finished: {succeeded}/{len(jobs)} succeeded ===")
+    return results
+
 def main():
+    parser = argparse.ArgumentParser(description="Run the Bliss Builder pipeline")
+    parser.add_argument("--agent-url", default=os.getenv("BLISS_AGENT_URL"),
+                        help="Run stages on a resident agent server, e.g. http://127.0.0.1:8765")
+    parser.add_argument("--themes", nargs="+", help="Batch mode: one video per theme")
+    parser.add_argument("--channels", help="Batch mode: JSON list of channels with their own region/theme")
+    parser.add_argument("--region", default="US", help="Default YouTube region code for batch jobs")
+    parser.add_argument("--privacy", default="public", choices=["public", "unlisted", "private"],
+                        help="Default privacy for batch uploads (default: public)")
+    parser.add_argument("--queue-uploads", action="store_true",
+                        help="Enqueue videos in output/upload_queue.db instead of uploading inline "
+                             "(batch mode drains the queue in the background)")
+    for stage, default in DEFAULT_STAGE_CONCURRENCY.items():
+        parser.add_argument(f"--{stage}-workers", type=int, default=default,
+                            help=f"Batch mode: concurrent {stage} jobs (default: {default})")
+    args = parser.parse_args()
+
+    if args.themes or args.channels:
+        jobs = load_batch_jobs(args.themes, args.channels, region=args.region, privacy=args.privacy)
+        run_batch(jobs, {stage: getattr(args, f"{stage}_workers") for stage in DEFAULT_STAGE_CONCURRENCY},
+                  queue_uploads=args.queue_uploads, channels_file=args.channels)
+        return
+
     logger.info("=== Bliss Builder Pipeline Started ===")
     
     try:
-        run_pipeline()
+        run_pipeline(agent_url=args.agent_url, queue_upload=args.queue_uploads)
     except Exception as e:
         logger.error(f"Pipeline execution failed: {e}")
     finally:
@@ -0,0 +1,7 @@
+"""
+Bliss Builder YouTube API Module
+
+Shared YouTube Data API plumbing used by trend fetching and uploads:
+- client: one pooled, keep-alive service object per process/thread
+- quota: daily quota metering, upload reservation and search budgeting
+"""
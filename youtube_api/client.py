@@ -0,0 +1,115 @@
+"""
+Shared YouTube Data API client factory.
+
+googleapiclient.discovery.build() re-reads and parses the discovery document
+and opens a fresh HTTP transport on every call. Here the document is loaded
+once per process (and cached on disk), and services are reused:
+get_youtube_service() returns the same object for the same API key or
+credentials on a given thread. httplib2 transports keep TLS connections
+alive but are not thread-safe, so each thread gets its own.
+
+Usage:
+    from youtube_api.client import get_youtube_service
+    youtube = get_youtube_service(api_key=youtube_api_key)       # Data API key
+    youtube = get_youtube_service(credentials=oauth_credentials)  # OAuth (uploads)
+"""
+
+import os
+import json
+import time
+import threading
+from functools import lru_cache
+from pathlib import Path
+
+import httplib2
+import google_auth_httplib2
+from googleapiclient import discovery_cache
+from googleapiclient.discovery import build_from_document
+
+API_NAME = "youtube"
+API_VERSION = "v3"
+DISCOVERY_URL = f"https://www.googleapis.com/discovery/v1/apis/{API_NAME}/{API_VERSION}/rest"
+DISCOVERY_CACHE_DIR = Path(__file__).resolve().parent.parent / "output" / "cache" / "discovery"
+DISCOVERY_MAX_AGE = 7 * 24 * 3600
+HTTP_TIMEOUT = 60
+
+_local = threading.local()
+
+
+@lru_cache(maxsize=None)
+def get_discovery_document() -> str:
+    """YouTube discovery document JSON, loaded once per process.
+
+    Order: fresh on-disk copy, then the copy bundled with googleapiclient,
+    then a network fetch. Whatever is found is written back to disk. The raw
+    text is returned because build_from_document() mutates parsed documents.
+    """
+    cache_file = DISCOVERY_CACHE_DIR / f"{API_NAME}.{API_VERSION}.json"
+    if cache_file.exists() and time.time() - cache_file.stat().st_mtime < DISCOVERY_MAX_AGE:
+        try:
+            with open(cache_file, "r", encoding="utf-8") as f:
+                content = f.read()
+            json.loads(content)  # reject truncated/corrupt copies
+            return content
+        except (OSError, ValueError):
+            pass
+
+    content = discovery_cache.get_static_doc(API_NAME, API_VERSION)
+    if content is None:
+        response, content = httplib2.Http(timeout=HTTP_TIMEOUT).request(DISCOVERY_URL)
+        if response.status != 200:
+            raise RuntimeError(f"Could not fetch discovery document ({response.status})")
+        content = content.decode("utf-8")
+
+    try:
+        DISCOVERY_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp_file = cache_file.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            f.write(content)
+        os.replace(tmp_file, cache_file)
+    except OSError:
+        pass  # disk cache is an optimization only
+
+    return content
+
+
+def _services() -> dict:
+    services = getattr(_local, "services", None)
+    if services is None:
+        services = _local.services = {}
+    return services
+
+
+def get_youtube_service(api_key: str = None, credentials=None):
+    """Return this thread's YouTube service for an API key or OAuth credentials.
+
+    The service (and its keep-alive transport) is built on first use and reused
+    afterwards. Credentials are matched by identity, so refreshing a
+    credentials object in place keeps the same service.
+    """
+    if not api_key and credentials is None:
+        raise ValueError("get_youtube_service needs an api_key or credentials")
+
+    cache_key = ("credentials", id(credentials)) if credentials is not None else ("key", api_key)
+    services = _services()
+    entry = services.get(cache_key)
+    if entry is not None:
+        return entry[1]
+
+    http = httplib2.Http(timeout=HTTP_TIMEOUT)
+    if credentials is not None:
+        service = build_from_document(
+            get_discovery_document(),
+            http=google_auth_httplib2.AuthorizedHttp(credentials, http=http)
+        )
+    else:
+        service = build_from_document(get_discovery_document(), developerKey=api_key, http=http)
+
+    # Keep a reference to the credentials so their id() cannot be reused while cached
+    services[cache_key] = (credentials, service)
+    return service
+
+
+def clear_services():
+    """Drop this thread's cached services (e.g. after replacing credentials)."""
+    _services().clear()
@@ -0,0 +1,210 @@
+"""
+Quota-aware scheduling for the YouTube Data API.
+
+Every API call is metered against a daily unit budget (search.list = 100,
+videos.list = 1, videos.insert = 1600). Usage is persisted in
+output/quota_usage.json, so separate runs and processes share one ledger.
+The ledger resets at midnight Pacific time, like YouTube's own quota.
+
+Units for the day's planned uploads are reserved up front. Trend discovery
+may only spend what is left after that reservation, and search depth is
+reduced when the budget is tight. A quotaExceeded error marks the day as
+exhausted so later calls fail fast instead of half-way through a batch.
+
+Usage:
+    quota = get_quota_scheduler()
+    quota.charge("search.list")          # raises QuotaExceeded if not affordable
+    pages = quota.plan_search_pages(10)  # how many search pages fit right now
+"""
+
+import os
+import json
+import time
+import datetime
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+QUOTA_COSTS = {
+    "search.list": 100,
+    "videos.list": 1,
+    "videos.insert": 1600,
+}
+DEFAULT_DAILY_BUDGET = 10000
+DEFAULT_DAILY_UPLOADS = 1
+QUOTA_LEDGER = Path(__file__).resolve().parent.parent / "output" / "quota_usage.json"
+
+_DISCOVERY_METHODS = ("search.list", "videos.list")
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+class QuotaExceeded(Exception):
+    """Raised when a call would exceed the daily budget (or the day is exhausted)."""
+
+
+def is_quota_error(error) -> bool:
+    """True if a googleapiclient HttpError (or resumable UploadError) is a daily quota rejection."""
+    status = getattr(getattr(error, "resp", None), "status", None) or getattr(error, "status", None)
+    content = getattr(error, "content", b"") or b""
+    if isinstance(content, bytes):
+        content = content.decode("utf-8", errors="replace")
+    return status == 403 and ("quotaExceeded" in content or "dailyLimitExceeded" in content)
+
+
+def _quota_day() -> str:
+    """Current quota day; YouTube resets quotas at midnight Pacific time."""
+    try:
+        from zoneinfo import ZoneInfo
+        now = datetime.datetime.now(ZoneInfo("America/Los_Angeles"))
+    except Exception:
+        now = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(hours=8)
+    return now.strftime("%Y-%m-%d")
+
+
+def next_quota_reset() -> float:
+    """Epoch seconds of the next quota reset (midnight Pacific time)."""
+    try:
+        from zoneinfo import ZoneInfo
+        now = datetime.datetime.now(ZoneInfo("America/Los_Angeles"))
+    except Exception:
+        now = datetime.datetime.now(datetime.timezone(datetime.timedelta(hours=-8)))
+    midnight = (now + datetime.timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return midnight.timestamp()
+
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+@contextmanager
+def file_lock(lock_path: Path):
+    """Exclusive inter-process lock on a sidecar lock file (fcntl or msvcrt)."""
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(lock_path, "a+b") as handle:
+        if fcntl is not None:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+        else:
+            handle.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    time.sleep(0.05)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+            else:
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class QuotaScheduler:
+    """Daily quota ledger with upload reservation and discovery budgeting."""
+
+    def __init__(self, ledger_path=QUOTA_LEDGER, daily_budget: int = DEFAULT_DAILY_BUDGET,
+                 daily_uploads: int = DEFAULT_DAILY_UPLOADS):
+        self.ledger_path = Path(ledger_path)
+        self.lock_path = self.ledger_path.with_suffix(".lock")
+        self.daily_budget = daily_budget
+        self.daily_uploads = daily_uploads
+        self._lock = threading.Lock()
+
+    def _load(self) -> dict:
+        today = _quota_day()
+        try:
+            with open(self.ledger_path, "r", encoding="utf-8") as f:
+                ledger = json.load(f)
+        except (OSError, ValueError):
+            ledger = {}
+        if ledger.get("day") != today:
+            ledger = {"day": today, "used": {}, "calls": {}, "exhausted": False}
+        return ledger
+
+    def _save(self, ledger: dict):
+        self.ledger_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.ledger_path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(ledger, f, indent=2)
+        os.replace(tmp_path, self.ledger_path)
+
+    @contextmanager
+    def _ledger(self):
+        with self._lock, file_lock(self.lock_path):
+            ledger = self._load()
+            yield ledger
+            self._save(ledger)
+
+    def _reserved(self, ledger: dict) -> int:
+        """Units still held back for today's remaining planned uploads."""
+        uploads_done = ledger["calls"].get("videos.insert", 0)
+        return max(0, self.daily_uploads - uploads_done) * QUOTA_COSTS["videos.insert"]
+
+    def status(self) -> dict:
+        with self._lock, file_lock(self.lock_path):
+            ledger = self._load()
+        used = sum(ledger["used"].values())
+        reserved = self._reserved(ledger)
+        return {
+            "day": ledger["day"],
+            "budget": self.daily_budget,
+            "used": used,
+            "reserved_for_uploads": reserved,
+            "available_for_discovery": 0 if ledger["exhausted"] else max(0, self.daily_budget - used - reserved),
+            "exhausted": ledger["exhausted"],
+            "by_method": dict(ledger["used"]),
+        }
+
+    def charge(self, method: str, calls: int = 1):
+        """Record `calls` calls of `method`, or raise QuotaExceeded if they do not fit.
+
+        Discovery methods (search.list, videos.list) may not dip into the upload
+        reservation; videos.insert may.
+        """
+        cost = QUOTA_COSTS.get(method, 1) * calls
+        with self._ledger() as ledger:
+            if ledger["exhausted"]:
+                raise QuotaExceeded(f"YouTube quota exhausted for {ledger['day']}")
+
+            used = sum(ledger["used"].values())
+            limit = self.daily_budget
+            if method in _DISCOVERY_METHODS:
+                limit -= self._reserved(ledger)
+            if used + cost > limit:
+                raise QuotaExceeded(
+                    f"{method} needs {cost} units but only {max(0, limit - used)} are available "
+                    f"({used}/{self.daily_budget} used, {self._reserved(ledger)} reserved for uploads)"
+                )
+
+            ledger["used"][method] = ledger["used"].get(method, 0) + cost
+            ledger["calls"][method] = ledger["calls"].get(method, 0) + calls
+
+    def mark_exhausted(self):
+        """Record that YouTube rejected a call for quota; blocks further calls today."""
+        with self._ledger() as ledger:
+            ledger["exhausted"] = True
+
+    def plan_search_pages(self, desired_pages: int) -> int:
+        """How many search pages (each plus its videos.list batch) fit in the discovery budget."""
+        available = self.status()["available_for_discovery"]
+        per_page = QUOTA_COSTS["search.list"] + QUOTA_COSTS["videos.list"] * 2  # details + a stats refresh
+        return max(0, min(desired_pages, available // per_page))
+
+
+def get_quota_scheduler() -> QuotaScheduler:
+    """Process-wide scheduler configured from YOUTUBE_DAILY_QUOTA / YOUTUBE_DAILY_UPLOADS."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = QuotaScheduler(
+                daily_budget=int(os.getenv("YOUTUBE_DAILY_QUOTA", DEFAULT_DAILY_BUDGET)),
+                daily_uploads=int(os.getenv("YOUTUBE_DAILY_UPLOADS", DEFAULT_DAILY_UPLOADS)),
+            )
+        return _scheduler